@@ -1,23 +1,31 @@
 import numpy as np
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-from utils.text_preprocessing import text_normalize
+from utils.intent_classifier import KerasIntentClassifier
+from utils.metrics import StageClock
+from utils.model_registry import IntentBundle
+from utils.preprocessing_cache import CachedPreprocessor
 from utils.response_generator import generate_hybrid_response
-from utils.session_manager import SessionManager
+from utils.session_store import InMemorySessionStore
 from utils.clarification_data import CLARIFICATION_MAP
 
 class AgentOrchestrator:
-    def __init__(self, model, tokenizer, lbl_encoder, intent_map, stemmer, max_len=30):
+    def __init__(self, model=None, tokenizer=None, lbl_encoder=None, intent_map=None, stemmer=None, max_len=30, inference_engine=None, classifier=None, preprocessor=None, session_store=None, bundle=None):
+        if bundle is None:
+            if classifier is None:
+                classifier = KerasIntentClassifier(model, tokenizer, lbl_encoder, max_len=max_len)
+            bundle = IntentBundle(classifier, intent_map, inference_engine)
+        self.bundle = bundle
         self.model = model
         self.tokenizer = tokenizer
         self.lbl_encoder = lbl_encoder
-        self.intent_map = intent_map
         self.stemmer = stemmer
         self.max_len = max_len
+        self.preprocessor = preprocessor if preprocessor is not None else CachedPreprocessor(stemmer)
         
         self.CONFIDENCE_THRESHOLD = 0.45
         self.CLARIFICATION_THRESHOLD = 0.20
+        self.SESSION_SAVE_RETRIES = 5
         
-        self.sessions = {}
+        self.sessions = session_store if session_store is not None else InMemorySessionStore()
 
         self.tools = {
             'cek_nilai': self.tool_check_grades,
@@ -30,29 +38,69 @@ class AgentOrchestrator:
             'siakad_error': self.tool_system_status
         }
 
+    @property
+    def classifier(self):
+        return self.bundle.classifier
+
+    @property
+    def intent_map(self):
+        return self.bundle.intent_map
+
+    @property
+    def inference_engine(self):
+        return self.bundle.inference_engine
+
+    def swap_bundle(self, bundle):
+        # Satu assignment atribut: request yang sedang jalan tetap memakai bundle yang sudah dipegangnya.
+        previous, self.bundle = self.bundle, bundle
+        return previous
+
     def get_session(self, session_id):
-        if session_id not in self.sessions:
-            self.sessions[session_id] = SessionManager()
-        return self.sessions[session_id]
+        return self.sessions.get(session_id)
 
     def reset_session(self, session_id):
-        if session_id in self.sessions:
-            self.sessions[session_id].reset_session()
+        self.sessions.reset(session_id)
 
     def process_query(self, user_input, session_id):
-        session = self.get_session(session_id)
-        session.update_history("user", user_input)
-        session.extract_entities(user_input) 
-
-        processed_inp = self.stemmer.stem(text_normalize(user_input))
-        seq = self.tokenizer.texts_to_sequences([processed_inp])
-        padded = pad_sequences(seq, truncating='post', maxlen=self.max_len)
-
-        result = self.model.predict(padded, verbose=0)
+        clock = StageClock()
+        bundle = self.bundle
+        processed_inp = self.preprocessor.process(user_input)
+        clock.lap("preprocess")
+        padded = bundle.classifier.encode([processed_inp])
+        clock.lap("tokenize")
+
+        result = bundle.predict(padded)
+        clock.lap("predict")
         max_prob = np.max(result)
         tag_index = np.argmax(result)
-        tag = self.lbl_encoder.inverse_transform([tag_index])[0]
+        tag = bundle.classifier.decode(tag_index)
+
+        # Baca-ubah-simpan sesi diulang bila worker lain menyimpan sesi yang sama lebih dulu (store berversi).
+        for _ in range(self.SESSION_SAVE_RETRIES):
+            session = self.get_session(session_id)
+            session.update_history("user", user_input)
+            session.extract_entities(user_input)
+            clock.lap("session_load")
 
+            response_text, emotion = self._respond(session, user_input, tag, max_prob, bundle)
+            clock.lap("respond")
+
+            session.update_history("ai", response_text)
+            saved = self.sessions.save(session_id, session)
+            clock.lap("session_save")
+            if saved:
+                break
+        clock.total("process_query")
+
+        return {
+            "reply": response_text,
+            "emotion": emotion,
+            "intent": tag,
+            "confidence": float(max_prob),
+            "debug": session.debug_memory()
+        }
+
+    def _respond(self, session, user_input, tag, max_prob, bundle):
         response_text = ""
         emotion = "neutral"
 
@@ -69,7 +117,7 @@ class AgentOrchestrator:
                 emotion = "neutral"
 
             else:
-                static_responses = self.intent_map.get(tag, ["Maaf, data respon tidak ditemukan."])
+                static_responses = bundle.intent_map.get(tag, ["Maaf, data respon tidak ditemukan."])
                 response_text = generate_hybrid_response(tag, static_responses, session.memory_slots)
                 
                 if tag in ['sapaan', 'terimakasih']:
@@ -88,16 +136,10 @@ class AgentOrchestrator:
         else:
             response_text = "Maaf, saya belum memahami maksud Anda. Bisa gunakan kata kunci lain seperti 'Jadwal', 'Nilai', atau 'UKT'?"
             emotion = "confused"
+        return response_text, emotion
 
-        session.update_history("ai", response_text)
-
-        return {
-            "reply": response_text,
-            "emotion": emotion,
-            "intent": tag,
-            "confidence": float(max_prob),
-            "debug": session.debug_memory()
-        }
+    def predict_intent(self, padded):
+        return self.bundle.predict(padded)
 
     def tool_check_grades(self, session, tag):
         nim = session.memory_slots.get('nim')
@@ -1,30 +1,29 @@
 # server/app.py
 import os
-import json
-import pickle
+import time
 import traceback
-import threading
 import logging
-import re
-import tensorflow as tf
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-from tensorflow.keras.models import load_model
-from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
 import base64
-import tempfile
-from agent_core import AgentOrchestrator
-from voice import AnimeVoiceAssistant
+from bootstrap import (
+    METRICS_TIMING_HEADERS, STREAM_MIMETYPES, admin_model_action, agent_stats, build_agent, check_admin_token,
+    get_model_reloader, handle_chat, get_voice, record_http_request, start_model_watch, start_voice_warmup,
+    stt_stream_finish, stt_stream_open, stt_stream_push, transcribe_turn, tts_stream_events, turn_events,
+    voice_warmup_status
+)
+from utils.audio_codec import CODECS, encode_audio, negotiate_audio_format
+from utils.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY, begin_request, end_request, server_timing_header
+from utils.stt_service import STTOverloadedError
 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 
 logging.getLogger("werkzeug").setLevel(logging.ERROR)
-tf.get_logger().setLevel("ERROR")
 logging.raiseExceptions = False
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["Server-Timing"])
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_DIR = os.path.join(BASE_DIR, "logs")
@@ -44,132 +43,35 @@ def _safe_log_exception(prefix, e):
 
 app.logger.info("--- System Init: Loading Assets ---")
 
-def _sanitize_reply_for_tts(text):
-    s = (text or "")
-    s = re.sub(r"```[\s\S]*?```", " ", s)
-    s = re.sub(r"`[^`]*`", " ", s)
-    s = re.sub(r"^\s*\[[A-Z_]{2,}\][^\n]*$", " ", s, flags=re.MULTILINE)
-    s = re.sub(r"\[[^\]]+\]", " ", s)
-    s = re.sub(r"https?://\S+", " ", s, flags=re.IGNORECASE)
-    s = re.sub(r"\bwww\.\S+", " ", s, flags=re.IGNORECASE)
-    s = re.sub(r"[A-Za-z]:\\[^\s]+", " ", s)
-    s = re.sub(r"\b\w+\.(?:py|js|ts|tsx|jsx|svelte|html|css|json|md|txt)\b", " ", s, flags=re.IGNORECASE)
-    s = re.sub(r"\s+", " ", s).strip()
-    if not s: return ""
-    if s[-1] not in ".!?": s += "."
-    return s
-
-class SafeKerasUnpickler(pickle.Unpickler):
-    def find_class(self, module, name):
-        if module in ("keras.src.preprocessing.text", "keras.src.legacy.preprocessing.text", "keras.preprocessing.text"):
-            module = "tensorflow.keras.preprocessing.text"
-        elif module.startswith("keras.src.legacy"):
-            module = "tensorflow.keras"
-        elif module.startswith("keras.") and not module.startswith("keras.src"):
-            module = module.replace("keras.", "tensorflow.keras.", 1)
-        return super().find_class(module, name)
-
-class CompatUnpickler(pickle.Unpickler):
-    def find_class(self, module, name):
-        if module.startswith("numpy._core"):
-            module = module.replace("numpy._core", "numpy.core", 1)
-        return super().find_class(module, name)
-
 try:
-    model_path = os.path.join(BASE_DIR, 'models', 'chatbot_model.h5')
-    token_path = os.path.join(BASE_DIR, 'models', 'tokenizer.pickle')
-    label_path = os.path.join(BASE_DIR, 'models', 'label_encoder.pickle')
-    data_path = os.path.join(BASE_DIR, 'data', 'intents.json')
-
-    with open(token_path, 'rb') as handle:
-        tokenizer = SafeKerasUnpickler(handle).load()
-    with open(label_path, 'rb') as ecn_file:
-        lbl_encoder = CompatUnpickler(ecn_file).load()
-
-    vocab_size = getattr(tokenizer, "num_words", None) or (len(getattr(tokenizer, "word_index", {})) + 1)
-    num_labels = len(getattr(lbl_encoder, "classes_", []))
-    try:
-        model = load_model(model_path, compile=False)
-    except Exception:
-        input_layer = tf.keras.layers.Input(shape=(30,), name="input_layer")
-        x = tf.keras.layers.Embedding(vocab_size, 128, name="embedding")(input_layer)
-        x = tf.keras.layers.SpatialDropout1D(0.4, name="spatial_dropout1d")(x)
-        x = tf.keras.layers.Bidirectional(tf.keras.layers.LSTM(64, return_sequences=True, name="lstm"), name="bidirectional")(x)
-        avg_pool = tf.keras.layers.GlobalAveragePooling1D(name="global_average_pooling1d")(x)
-        max_pool = tf.keras.layers.GlobalMaxPooling1D(name="global_max_pooling1d")(x)
-        merged = tf.keras.layers.Concatenate(name="concatenate")([avg_pool, max_pool])
-        x = tf.keras.layers.Dense(128, activation="relu", name="dense")(merged)
-        x = tf.keras.layers.Dropout(0.5, name="dropout")(x)
-        output_layer = tf.keras.layers.Dense(num_labels, activation="softmax", name="dense_1")(x)
-        model = tf.keras.models.Model(inputs=input_layer, outputs=output_layer)
-        model.load_weights(model_path)
-
-    with open(data_path, encoding='utf-8') as file:
-        data = json.load(file)
-    intent_map = {i['tag']: i['responses'] for i in data['intents']}
-    factory = StemmerFactory()
-    stemmer = factory.create_stemmer()
-
-    bot_agent = AgentOrchestrator(
-        model=model,
-        tokenizer=tokenizer,
-        lbl_encoder=lbl_encoder,
-        intent_map=intent_map,
-        stemmer=stemmer,
-        max_len=30
-    )
+    bot_agent = build_agent(app.logger)
     app.logger.info("--- System Ready ---")
 
 except Exception as e:
     _safe_log_exception("CRITICAL ERROR", e)
     exit(1)
 
-voice_assistant = None
-voice_assistant_lock = threading.Lock()
-voice_warmup_lock = threading.Lock()
-voice_warmup_state = {"started": False, "done": False, "ok": False, "error": None}
-
-def get_voice():
-    global voice_assistant
-    if voice_assistant is not None: return voice_assistant
-    with voice_assistant_lock:
-        if voice_assistant is None:
-            voice_assistant = AnimeVoiceAssistant()
-        return voice_assistant
-
-def _voice_warmup_worker():
-    global voice_warmup_state
-    try:
-        va = get_voice()
-        ok = bool(va.warmup_rvc())
-        with voice_warmup_lock:
-            voice_warmup_state = {"started": True, "done": True, "ok": ok, "error": None}
-    except Exception as e:
-        with voice_warmup_lock:
-            voice_warmup_state = {"started": True, "done": True, "ok": False, "error": str(e)}
-
-def start_voice_warmup():
-    with voice_warmup_lock:
-        if voice_warmup_state["started"]: return
-        voice_warmup_state["started"] = True
-    t = threading.Thread(target=_voice_warmup_worker, daemon=True)
-    t.start()
+@app.before_request
+def _metrics_begin():
+    g.metrics_token = begin_request()
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _metrics_end(response):
+    token = g.pop('metrics_token', None)
+    if token is None: return response
+    timings = end_request(token)
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    record_http_request(request.method, route, response.status_code, (time.perf_counter() - g.request_started) * 1000.0)
+    if METRICS_TIMING_HEADERS and timings:
+        response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
 
 @app.route('/chat', methods=['POST'])
 def chat_endpoint():
     try:
         data = request.get_json(silent=True) or {}
-        user_input = data.get('message', '')
-        session_id = data.get('session_id', 'default_user')
-        if "reset" in user_input.lower().strip():
-            bot_agent.reset_session(session_id)
-            return jsonify({"reply": "Sesi direset.", "emotion": "neutral"})
-        if not user_input.strip():
-            return jsonify({"reply": "...", "emotion": "neutral"})
-        result = bot_agent.process_query(user_input, session_id)
-        if isinstance(result, dict) and "reply" in result:
-            result["reply_tts"] = _sanitize_reply_for_tts(result.get("reply"))
-        return jsonify(result)
+        return jsonify(handle_chat(bot_agent, data))
     except Exception as e:
         return jsonify({"reply": "Error internal.", "emotion": "sad", "debug": str(e)}), 500
 
@@ -179,8 +81,16 @@ def tts_endpoint():
         data = request.get_json(silent=True) or {}
         text = data.get('text', '').strip()
         if not text: return jsonify({"error": "No text"}), 400
+        fmt = negotiate_audio_format(data.get('format'), request.headers.get('Accept'))
+        codec = data.get('codec', 'wav')
+        if fmt is None or codec not in CODECS: return jsonify({"error": "Unknown format"}), 400
         va = get_voice()
         audio_bytes, mime = va.synthesize_bytes(text, emotion=data.get('emotion'))
+        if fmt != "json":
+            body, mime = encode_audio(audio_bytes, fmt)
+            return Response(body, mimetype=mime, headers={"Vary": "Accept"})
+        if codec != "wav":
+            audio_bytes, mime = encode_audio(audio_bytes, codec)
         return jsonify({
             "audio_base64": base64.b64encode(audio_bytes).decode("ascii"),
             "mime": mime
@@ -188,35 +98,139 @@ def tts_endpoint():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/tts/stream', methods=['POST'])
+def tts_stream_endpoint():
+    data = request.get_json(silent=True) or {}
+    text = data.get('text', '').strip()
+    if not text: return jsonify({"error": "No text"}), 400
+    fmt = data.get('format', 'sse')
+    if fmt not in STREAM_MIMETYPES: return jsonify({"error": f"Unknown format: {fmt}"}), 400
+    codec = data.get('codec', 'wav')
+    if codec not in CODECS: return jsonify({"error": f"Unknown codec: {codec}"}), 400
+    va = get_voice()
+    return Response(
+        tts_stream_events(va, text, emotion=data.get('emotion'), fmt=fmt, codec=codec),
+        mimetype=STREAM_MIMETYPES[fmt],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.route('/warmup', methods=['GET', 'POST'])
 def warmup_endpoint():
     start_voice_warmup()
-    with voice_warmup_lock:
-        payload = dict(voice_warmup_state)
-    return jsonify(payload)
+    return jsonify(voice_warmup_status())
+
+@app.route('/healthz', methods=['GET'])
+def healthz_endpoint():
+    return jsonify({"status": "ok", "pid": os.getpid()})
+
+@app.route('/readyz', methods=['GET'])
+def readyz_endpoint():
+    try:
+        probe = bot_agent.classifier.encode(["jadwal krs"])
+        bot_agent.predict_intent(probe)
+    except Exception as e:
+        return jsonify({"ready": False, "pid": os.getpid(), "error": str(e)}), 503
+    return jsonify({"ready": True, "pid": os.getpid(), "intent_backend": bot_agent.classifier.backend, "model_version": bot_agent.bundle.version, "voice": voice_warmup_status()})
+
+@app.route('/stats', methods=['GET'])
+def stats_endpoint():
+    return jsonify(agent_stats(bot_agent))
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(REGISTRY.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+def _admin_authorized():
+    return check_admin_token(request.headers.get('Authorization'), request.headers.get('X-Admin-Token'))
+
+@app.route('/admin/models', methods=['GET'])
+def admin_models_endpoint():
+    if not _admin_authorized(): return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(get_model_reloader(bot_agent).status())
+
+@app.route('/admin/models/reload', methods=['POST'])
+def admin_models_reload_endpoint():
+    if not _admin_authorized(): return jsonify({"error": "Unauthorized"}), 401
+    status, payload = admin_model_action(bot_agent, "reload", request.get_json(silent=True) or {})
+    return jsonify(payload), status
+
+@app.route('/admin/models/rollback', methods=['POST'])
+def admin_models_rollback_endpoint():
+    if not _admin_authorized(): return jsonify({"error": "Unauthorized"}), 401
+    status, payload = admin_model_action(bot_agent, "rollback", request.get_json(silent=True) or {})
+    return jsonify(payload), status
+
+def _audio_request():
+    # Audio: multipart `audio`, JSON `audio_base64`, atau body biner mentah (parameter lewat query string).
+    if 'audio' in request.files:
+        return request.files['audio'].read(), {**request.args.to_dict(), **request.form.to_dict()}
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        return base64.b64decode(data.get('audio_base64') or b""), data
+    return request.get_data(), request.args.to_dict()
 
 @app.route('/stt', methods=['POST'])
 def stt_endpoint():
     try:
-        if 'audio' in request.files:
-            f = request.files['audio']
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-                f.save(tmp.name)
-                temp_path = tmp.name
-        else:
-            data = request.get_json(silent=True) or {}
-            raw = base64.b64decode(data.get('audio_base64'))
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-                tmp.write(raw)
-                temp_path = tmp.name
+        raw, _ = _audio_request()
+        if not raw: return jsonify({"error": "No audio"}), 400
         va = get_voice()
-        text = va.transcribe_file(temp_path)
-        try: os.remove(temp_path)
-        except: pass
+        text = va.transcribe_audio(raw)
         return jsonify({"text": text})
+    except STTOverloadedError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/turn', methods=['POST'])
+def turn_endpoint():
+    try:
+        raw, data = _audio_request()
+        if not raw: return jsonify({"error": "No audio"}), 400
+        fmt = data.get('format', 'ndjson')
+        if fmt not in STREAM_MIMETYPES: return jsonify({"error": f"Unknown format: {fmt}"}), 400
+        if data.get('codec', 'wav') not in CODECS: return jsonify({"error": "Unknown codec"}), 400
+        turn = transcribe_turn(raw)
+    except STTOverloadedError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return Response(
+        turn_events(bot_agent, turn, data, fmt=fmt),
+        mimetype=STREAM_MIMETYPES[fmt],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.route('/stt/stream', methods=['POST'])
+def stt_stream_open_endpoint():
+    try:
+        return jsonify(stt_stream_open(request.get_json(silent=True) or {}))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 503
+
+@app.route('/stt/stream/<stream_id>', methods=['POST'])
+def stt_stream_push_endpoint(stream_id):
+    try:
+        result = stt_stream_push(stream_id, request.get_data())
+        if result is None: return jsonify({"error": "Unknown stream"}), 404
+        return jsonify(result)
+    except STTOverloadedError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/stt/stream/<stream_id>/end', methods=['POST'])
+def stt_stream_end_endpoint(stream_id):
+    try:
+        result = stt_stream_finish(bot_agent, stream_id)
+        if result is None: return jsonify({"error": "Unknown stream"}), 404
+        return jsonify(result)
+    except STTOverloadedError as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
     start_voice_warmup()
+    start_model_watch(bot_agent)
     app.run(debug=True, port=8080, use_reloader=False)
\ No newline at end of file
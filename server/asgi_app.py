@@ -0,0 +1,370 @@
+# server/asgi_app.py
+import os
+import time
+import asyncio
+import contextvars
+import json
+import base64
+import logging
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+
+import bootstrap
+from bootstrap import (
+    METRICS_TIMING_HEADERS, STREAM_MIMETYPES, admin_model_action, agent_stats, build_agent, check_admin_token,
+    chat_turn, get_model_reloader, handle_chat, get_voice, record_http_request, start_model_watch, start_voice_warmup,
+    stt_stream_finish, stt_stream_open, stt_stream_push, stt_streams, transcribe_turn, tts_stream_events,
+    turn_events, voice_warmup_status
+)
+from utils.audio_codec import CODECS, encode_audio, negotiate_audio_format
+from utils.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY, begin_request, end_request, request_timings, server_timing_header
+from utils.stt_service import STTOverloadedError
+
+logger = logging.getLogger("asgi_app")
+
+CHAT_WORKERS = int(os.environ.get("ASGI_CHAT_WORKERS", "4"))
+IO_WORKERS = int(os.environ.get("ASGI_IO_WORKERS", "16"))
+DSP_WORKERS = int(os.environ.get("ASGI_DSP_WORKERS", "2"))
+STT_WORKERS = int(os.environ.get("ASGI_STT_WORKERS", os.environ.get("STT_WORKERS", "1")))
+
+class BoundedExecutor:
+    def __init__(self, name, workers, max_pending=None):
+        self.name = name
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self.slots = asyncio.Semaphore(max_pending or workers * 4)
+
+    async def run(self, fn, *args):
+        # Salin context agar timer tahap di thread executor tetap tercatat ke request ini.
+        ctx = contextvars.copy_context()
+        async with self.slots:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, ctx.run, fn, *args)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = begin_request()
+        started = time.perf_counter()
+        status = [500, None]
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                status[1] = time.perf_counter()
+                timings = request_timings()
+                if METRICS_TIMING_HEADERS and timings:
+                    MutableHeaders(scope=message).append("Server-Timing", server_timing_header(timings))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            end_request(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            record_http_request(scope["method"], route, status[0], ((status[1] or time.perf_counter()) - started) * 1000.0)
+
+class ServerState:
+    bot_agent = None
+    chat = None
+    io = None
+    dsp = None
+    stt = None
+
+state = ServerState()
+
+async def startup():
+    state.bot_agent = build_agent(logger)
+    state.chat = BoundedExecutor("chat", CHAT_WORKERS)
+    state.io = BoundedExecutor("io", IO_WORKERS)
+    state.dsp = BoundedExecutor("dsp", DSP_WORKERS)
+    state.stt = BoundedExecutor("stt", STT_WORKERS)
+    if os.environ.get("VOICE_WARMUP", "1") != "0":
+        start_voice_warmup()
+    start_model_watch(state.bot_agent)
+
+async def shutdown():
+    for executor in (state.chat, state.io, state.dsp, state.stt):
+        if executor is not None:
+            executor.shutdown()
+    if bootstrap.voice_assistant is not None:
+        await bootstrap.voice_assistant.tts_client.aclose()
+
+async def _json_body(request):
+    try:
+        return await request.json() or {}
+    except Exception:
+        return {}
+
+async def chat_endpoint(request):
+    try:
+        data = await _json_body(request)
+        result = await state.chat.run(handle_chat, state.bot_agent, data)
+        return JSONResponse(result)
+    except Exception as e:
+        return JSONResponse({"reply": "Error internal.", "emotion": "sad", "debug": str(e)}, status_code=500)
+
+async def synthesize_async(text, emotion):
+    va = get_voice()
+    key, cached = va.cached_tts_audio(text, emotion)
+    if cached is not None:
+        return cached, "audio/wav"
+    norm_text = await state.io.run(va.prepare_tts_text, text)
+    # Request ke Style-Bert-VITS2 async (httpx): menunggu backend tidak memakan thread executor.
+    raw = await va._afetch_style_bert_wav(norm_text, emotion)
+    if raw is None:
+        return va._silence_wav_bytes(), "audio/wav"
+    return await state.dsp.run(va.finish_tts_audio, key, raw), "audio/wav"
+
+async def tts_endpoint(request):
+    try:
+        data = await _json_body(request)
+        text = (data.get('text') or '').strip()
+        if not text:
+            return JSONResponse({"error": "No text"}, status_code=400)
+        fmt = negotiate_audio_format(data.get('format'), request.headers.get('accept'))
+        codec = data.get('codec', 'wav')
+        if fmt is None or codec not in CODECS:
+            return JSONResponse({"error": "Unknown format"}, status_code=400)
+        audio_bytes, mime = await synthesize_async(text, data.get('emotion'))
+        if fmt != "json":
+            body, mime = await state.dsp.run(encode_audio, audio_bytes, fmt)
+            return Response(body, media_type=mime, headers={"Vary": "Accept"})
+        if codec != "wav":
+            audio_bytes, mime = await state.dsp.run(encode_audio, audio_bytes, codec)
+        return JSONResponse({
+            "audio_base64": base64.b64encode(audio_bytes).decode("ascii"),
+            "mime": mime
+        })
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def tts_stream_endpoint(request):
+    data = await _json_body(request)
+    text = (data.get('text') or '').strip()
+    if not text:
+        return JSONResponse({"error": "No text"}, status_code=400)
+    fmt = data.get('format', 'sse')
+    if fmt not in STREAM_MIMETYPES:
+        return JSONResponse({"error": f"Unknown format: {fmt}"}, status_code=400)
+    codec = data.get('codec', 'wav')
+    if codec not in CODECS:
+        return JSONResponse({"error": f"Unknown codec: {codec}"}, status_code=400)
+    return StreamingResponse(
+        tts_stream_events(get_voice(), text, emotion=data.get('emotion'), fmt=fmt, codec=codec),
+        media_type=STREAM_MIMETYPES[fmt],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _audio_request(request):
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/"):
+        form = await request.form()
+        upload = form.get("audio")
+        data = {**request.query_params, **{k: v for k, v in form.items() if k != "audio"}}
+        return (await upload.read() if upload is not None else b""), data
+    if content_type.startswith("application/json"):
+        data = await _json_body(request)
+        return base64.b64decode(data.get('audio_base64') or b""), data
+    return await request.body(), dict(request.query_params)
+
+async def stt_endpoint(request):
+    try:
+        raw, _ = await _audio_request(request)
+        if not raw:
+            return JSONResponse({"error": "No audio"}, status_code=400)
+        va = get_voice()
+        text = await state.stt.run(va.transcribe_audio, raw)
+        return JSONResponse({"text": text})
+    except STTOverloadedError as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def turn_endpoint(request):
+    try:
+        raw, data = await _audio_request(request)
+        if not raw:
+            return JSONResponse({"error": "No audio"}, status_code=400)
+        fmt = data.get('format', 'ndjson')
+        if fmt not in STREAM_MIMETYPES:
+            return JSONResponse({"error": f"Unknown format: {fmt}"}, status_code=400)
+        if data.get('codec', 'wav') not in CODECS:
+            return JSONResponse({"error": "Unknown codec"}, status_code=400)
+        turn = await state.stt.run(transcribe_turn, raw)
+        # Intent di executor chat, bukan threadpool Starlette yang mengiterasi stream.
+        result = await state.chat.run(chat_turn, state.bot_agent, turn, data)
+    except STTOverloadedError as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+    return StreamingResponse(
+        turn_events(state.bot_agent, turn, data, fmt=fmt, result=result),
+        media_type=STREAM_MIMETYPES[fmt],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def stt_stream_open_endpoint(request):
+    try:
+        return JSONResponse(stt_stream_open(await _json_body(request)))
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+
+async def stt_stream_push_endpoint(request):
+    try:
+        result = await state.stt.run(stt_stream_push, request.path_params['stream_id'], await request.body())
+        if result is None:
+            return JSONResponse({"error": "Unknown stream"}, status_code=404)
+        return JSONResponse(result)
+    except STTOverloadedError as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def stt_stream_end_endpoint(request):
+    try:
+        result = await state.stt.run(stt_stream_finish, state.bot_agent, request.path_params['stream_id'])
+        if result is None:
+            return JSONResponse({"error": "Unknown stream"}, status_code=404)
+        return JSONResponse(result)
+    except STTOverloadedError as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def stt_websocket(websocket):
+    # Protokol: pesan teks JSON = konfigurasi {sample_rate, chat, session_id} atau {"event": "end"},
+    # pesan biner = frame PCM16 mono. Server mengirim event partial / final / done (+ chat).
+    await websocket.accept()
+    config = {}
+    stream_id = None
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                if stream_id is None:
+                    stream_id = stt_stream_open(config)["stream_id"]
+                result = await state.stt.run(stt_stream_push, stream_id, message["bytes"])
+                for event in (result or {}).get("events", []):
+                    await websocket.send_json(event)
+                continue
+            data = json.loads(message.get("text") or "{}")
+            if data.get("event") != "end":
+                config = data
+                await websocket.send_json({"type": "ready", "sample_rate": int(config.get("sample_rate") or 16000)})
+                continue
+            if stream_id is None:
+                await websocket.send_json({"type": "done", "text": ""})
+                continue
+            result = await state.stt.run(stt_stream_finish, state.bot_agent, stream_id)
+            stream_id = None
+            for event in result["events"]:
+                await websocket.send_json(event)
+            if "chat" in result:
+                await websocket.send_json({"type": "chat", **result["chat"]})
+    except WebSocketDisconnect:
+        pass
+    except STTOverloadedError as e:
+        await websocket.send_json({"type": "error", "error": str(e)})
+        await websocket.close(code=1013)
+    finally:
+        if stream_id is not None:
+            stt_streams.close(stream_id)
+
+async def warmup_endpoint(request):
+    start_voice_warmup()
+    return JSONResponse(voice_warmup_status())
+
+async def healthz_endpoint(request):
+    return JSONResponse({"status": "ok", "pid": os.getpid()})
+
+async def readyz_endpoint(request):
+    try:
+        probe = state.bot_agent.classifier.encode(["jadwal krs"])
+        await state.chat.run(state.bot_agent.predict_intent, probe)
+    except Exception as e:
+        return JSONResponse({"ready": False, "pid": os.getpid(), "error": str(e)}, status_code=503)
+    return JSONResponse({"ready": True, "pid": os.getpid(), "intent_backend": state.bot_agent.classifier.backend, "model_version": state.bot_agent.bundle.version, "voice": voice_warmup_status()})
+
+async def stats_endpoint(request):
+    return JSONResponse(agent_stats(state.bot_agent))
+
+async def metrics_endpoint(request):
+    return Response(REGISTRY.render_prometheus(), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+def _admin_authorized(request):
+    return check_admin_token(request.headers.get('Authorization'), request.headers.get('X-Admin-Token'))
+
+async def admin_models_endpoint(request):
+    if not _admin_authorized(request): return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    return JSONResponse(get_model_reloader(state.bot_agent).status())
+
+async def _admin_model_action(request, action):
+    if not _admin_authorized(request): return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    # Loading + validasi berjalan di thread reloader; dengan `wait` yang ditunggu di pool io, bukan di event loop.
+    status, payload = await state.io.run(admin_model_action, state.bot_agent, action, await _json_body(request))
+    return JSONResponse(payload, status_code=status)
+
+async def admin_models_reload_endpoint(request):
+    return await _admin_model_action(request, "reload")
+
+async def admin_models_rollback_endpoint(request):
+    return await _admin_model_action(request, "rollback")
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
+
+app = Starlette(
+    routes=[
+        Route('/chat', chat_endpoint, methods=['POST']),
+        Route('/tts', tts_endpoint, methods=['POST']),
+        Route('/tts/stream', tts_stream_endpoint, methods=['POST']),
+        Route('/stt', stt_endpoint, methods=['POST']),
+        Route('/turn', turn_endpoint, methods=['POST']),
+        Route('/stt/stream', stt_stream_open_endpoint, methods=['POST']),
+        Route('/stt/stream/{stream_id}', stt_stream_push_endpoint, methods=['POST']),
+        Route('/stt/stream/{stream_id}/end', stt_stream_end_endpoint, methods=['POST']),
+        WebSocketRoute('/stt/ws', stt_websocket),
+        Route('/warmup', warmup_endpoint, methods=['GET', 'POST']),
+        Route('/healthz', healthz_endpoint, methods=['GET']),
+        Route('/readyz', readyz_endpoint, methods=['GET']),
+        Route('/stats', stats_endpoint, methods=['GET']),
+        Route('/metrics', metrics_endpoint, methods=['GET']),
+        Route('/admin/models', admin_models_endpoint, methods=['GET']),
+        Route('/admin/models/reload', admin_models_reload_endpoint, methods=['POST']),
+        Route('/admin/models/rollback', admin_models_rollback_endpoint, methods=['POST']),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"], expose_headers=["Server-Timing"]),
+        Middleware(MetricsMiddleware),
+    ],
+    lifespan=lifespan,
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host=os.environ.get("HOST", "127.0.0.1"), port=int(os.environ.get("PORT", "8080")), log_level="warning")
@@ -0,0 +1,142 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from utils.text_preprocessing import text_normalize, normalize_many
+
+DATA_PATH = os.path.join(SERVER_DIR, 'data', 'intents.json')
+FALLBACK_QUERIES = [
+    "Jadwal KRS kapan ya?", "ukt berapa", "Bagaimana cara bayarnya lewat mobile banking?",
+    "syrat skrpsi apa aja kak", "dmn lokasi perpus", "lupa pasword siakad gmn",
+    "Kapan wisudanya gelombang 1?", "brp biaya legalisir ijasah", "sempro kapan dibuka",
+]
+
+# Salinan beku kamus baseline (sebelum normalizer terkompilasi): referensi tidak ikut berubah
+# saat kamus di utils/text_preprocessing.py diedit.
+LEGACY_WORD_DICT = {
+    "sim": "sim", "siakad": "sim", "sikd": "sim", "siakd": "sim","siakad": "siakad", "sikd": "siakad", "portal": "siakad", "sim": "siakad", 
+    "sita": "sita", "elma": "elma", "lptik": "lptik", "unipma": "unipma", 
+    "unima": "unipma", "kampus": "kampus", "universitas": "kampus",
+    "graha": "graha", "cendekia": "cendekia", "ulul": "ulul", "albab": "albab", 
+    "rektorat": "rektorat",
+
+    "krs": "krs", "krsan": "krs", "sks": "sks", "matkul": "mata kuliah", 
+    "mk": "mata kuliah", "mtkul": "mata kuliah", "mtul": "mata kuliah",
+    "kuliah": "kuliah", "kuliya": "kuliah", "kuliyah": "kuliah", "kulaih": "kuliah", 
+    "prkuliahan": "kuliah", "jadwal": "jadwal", "jdwl": "jadwal", "jadual": "jadwal", 
+    "jdwal": "jadwal", "jawal": "jadwal", "ujian": "ujian", "ujina": "ujian", 
+    "uijan": "ujian", "ujisn": "ujian", "ujin": "ujian", "tes": "ujian",
+    "uts": "uts", "uas": "uas", "semester": "semester", "smt": "semester", 
+    "smster": "semester", "smester": "semester", "smstr": "semester",
+    "ganjil": "ganjil", "genap": "genap", "maba": "mahasiswa baru", 
+    "kating": "kakak tingkat",
+
+    "skripsi": "skripsi", "skrpsi": "skripsi", "skrispi": "skripsi", 
+    "ta": "skripsi", "judul": "judul", "jdul": "judul", "outline": "outline", 
+    "outlene": "outline", "outlen": "outline", "dospem": "dosen pembimbing", 
+    "pembimbing": "dosen pembimbing", "dosbing": "dosen pembimbing", "dsen": "dosen",
+    "sempro": "seminar proposal", "sidang": "sidang", "pendadaran": "sidang",
+    "wisuda": "wisuda", "yudisium": "wisuda", "yidisium": "wisuda", "toga": "toga",
+    "ijazah": "ijazah", "ijasah": "ijazah", "legalisir": "legalisir", 
+    "lgalisir": "legalisir", "kp": "kerja praktik", "magang": "kerja praktik", 
+    "pkl": "kerja praktik", "praktek": "kerja praktik", "toefl": "toefl", 
+    "elpt": "toefl", "tofel": "toefl", "skor": "skor", "scor": "skor",
+
+    "bayar": "bayar", "byar": "bayar", "pembayaran": "bayar", "pmbyaran": "bayar", 
+    "tf": "bayar", "transfer": "bayar", "biaya": "biaya", "biya": "biaya", 
+    "tarif": "biaya", "harga": "biaya", "nominal": "biaya", "ukt": "ukt", 
+    "spp": "ukt", "tagihan": "tagihan", "tgihan": "tagihan", "tunggakan": "tunggakan", 
+    "nunggak": "tunggakan", "lunas": "lunas", "lnas": "lunas", "dispensasi": "dispensasi", 
+    "dispen": "dispensasi", "keringanan": "dispensasi", "beasiswa": "beasiswa", 
+    "besiswa": "beasiswa", "kipk": "kip-k", "kip-k": "kip-k", "pndaftaran": "daftar",
+    "potongan": "potongan", "ptongan": "potongan", "diskon": "potongan", 
+    "cashback": "potongan",
+
+    "surat": "surat", "srat": "surat", "aktif": "aktif", "akrif": "aktif",
+    "cuti": "cuti", "cti": "cuti", "off": "cuti", "berhenti": "cuti", 
+    "brenti": "cuti", "stop": "cuti", "pindah": "pindah", "pndah": "pindah", 
+    "mutasi": "pindah", "ganti": "ganti", "revisi": "ganti", "ubah": "ganti",
+    "prodi": "prodi", "jurusan": "prodi", "prdi": "prodi", "fakultas": "fakultas",
+    "baak": "baa", "baa": "baa", "tu": "tu", "tata usaha": "tu",
+    "wifi": "wifi", "wfi": "wifi", "internet": "wifi", "hotspot": "hotspot", 
+    "hospot": "hotspot", "password": "password", "pasword": "password", 
+    "pw": "password", "sandi": "password", "reset": "reset",
+    "perpus": "perpustakaan", "perpstakaan": "perpustakaan", "pustaka": "perpustakaan", 
+    "buku": "buku", "masjid": "masjid", "msjid": "masjid", "mushola": "mushola", 
+    "mshola": "mushola", "sholat": "sholat", "kantin": "kantin", "makan": "makan", 
+    "laper": "makan", "foodcourt": "kantin",
+
+    "kapan": "kapan", "kpn": "kapan", "kpan": "kapan", "tgl": "tanggal", 
+    "tanggal": "tanggal", "mana": "mana", "dmn": "dimana", "dimana": "dimana", 
+    "dmna": "dimana", "bagaimana": "bagaimana", "gmn": "bagaimana", 
+    "gmna": "bagaimana", "gimana": "bagaimana", "apa": "apa", "ap": "apa", 
+    "apakah": "apa", "apkh": "apa", "berapa": "berapa", "brp": "berapa", 
+    "brpa": "berapa", "brapa": "berapa", "siapa": "siapa", "sapa": "siapa", 
+    "syapa": "siapa", "syarat": "syarat", "syrat": "syarat", "sarat": "syarat", 
+    "persyaratan": "syarat", "dokumen": "dokumen", "berkas": "dokumen", 
+    "dkumen": "dokumen", "file": "dokumen", "info": "info", "inpo": "info", 
+    "informasi": "info", "spill": "info", "eror": "error", "error": "error", 
+    "down": "error", "lemot": "error", "bug": "error", "bantu": "tolong", 
+    "tolong": "tolong", "tlong": "tolong", "help": "tolong"
+}
+
+def legacy_text_normalize(text):
+    text = text.lower()
+    text = re.sub(r'[^a-z0-9\s]', ' ', text)
+    text = re.sub(r'(ku|mu|nya|lah|kah|pun)\b', '', text)
+    words = text.split()
+    normalized_words = []
+    for word in words:
+        if word in LEGACY_WORD_DICT:
+            normalized_words.append(LEGACY_WORD_DICT[word])
+        else:
+            normalized_words.append(word)
+    result = " ".join(normalized_words)
+    return re.sub(r'\s+', ' ', result).strip()
+
+def load_corpus(path):
+    if not os.path.exists(path):
+        return list(FALLBACK_QUERIES)
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return [p for intent in data['intents'] for p in intent['patterns']]
+
+def time_per_call(fn, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(texts))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text_normalize lama vs normalizer terkompilasi.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.data)
+    mismatches = [t for t in corpus if legacy_text_normalize(t) != text_normalize(t)]
+    if mismatches:
+        print(f"❌ {len(mismatches)} kalimat berbeda, contoh: {mismatches[:5]}")
+        sys.exit(1)
+    print(f"✅ Output identik untuk {len(corpus)} kalimat korpus.")
+
+    legacy = time_per_call(legacy_text_normalize, corpus, args.repeat)
+    compiled = time_per_call(text_normalize, corpus, args.repeat)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        normalize_many(corpus)
+    bulk = (time.perf_counter() - start) / (args.repeat * len(corpus))
+
+    print(f"legacy text_normalize : {legacy * 1e6:8.2f} µs/call")
+    print(f"compiled text_normalize: {compiled * 1e6:8.2f} µs/call  ({legacy / compiled:.1f}x)")
+    print(f"normalize_many (bulk)  : {bulk * 1e6:8.2f} µs/call  ({legacy / bulk:.1f}x)")
+
+if __name__ == "__main__":
+    main()
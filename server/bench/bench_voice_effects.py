@@ -0,0 +1,137 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from scipy import signal
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from utils.voice_effects import SPEAK_STAGES, VoiceEffectsChain, _band, _cutoff
+
+# Referensi lama mengikuti voice.py awal: tiap tahap dibungkus try/except dan mengembalikan input bila gagal.
+# Frekuensi potong di-clamp seperti design_filters agar paritas di 16/22.05 kHz tetap terukur (di 44.1 kHz tidak berubah).
+
+def legacy_pitch(audio, sr):
+    audio = np.asarray(audio, dtype=np.float32)
+    try:
+        shifted = signal.resample(audio, int(len(audio) / 1.30))
+        return signal.resample(shifted, len(audio))
+    except Exception:
+        return audio
+
+def legacy_formant(audio, sr):
+    audio = np.asarray(audio, dtype=np.float32)
+    try:
+        high = signal.sosfilt(signal.butter(2, _cutoff(sr, 3500), 'high', fs=sr, output='sos'), audio)
+        mid = signal.sosfilt(signal.butter(2, _band(sr, 800, 3500), btype='band', fs=sr, output='sos'), audio)
+        low = signal.sosfilt(signal.butter(2, _cutoff(sr, 400), 'low', fs=sr, output='sos'), audio)
+        mixed = low * 0.5 + mid * 0.65 + high * 1.2
+        return mixed / (np.max(np.abs(mixed)) + 1e-8) * 0.95
+    except Exception:
+        return audio
+
+def legacy_breathiness(audio, sr):
+    audio = np.asarray(audio, dtype=np.float32)
+    try:
+        noise = np.random.normal(0, 0.008, len(audio)).astype(np.float32)
+        breath = signal.sosfilt(signal.butter(4, _band(sr, 2000, 8000), btype='band', fs=sr, output='sos'), noise)
+        return audio * 0.92 + breath * 0.08
+    except Exception:
+        return audio
+
+def legacy_warmth(audio, sr):
+    audio = np.asarray(audio, dtype=np.float32)
+    try:
+        high = signal.sosfilt(signal.butter(2, _cutoff(sr, 200), 'high', fs=sr, output='sos'), audio)
+        warm = signal.sosfilt(signal.butter(1, _band(sr, 300, 5000), btype='band', fs=sr, output='sos'), high)
+        return np.tanh((high * 0.7 + warm * 0.3) * 1.02) * 0.94
+    except Exception:
+        return audio
+
+def legacy_smooth(audio, sr):
+    audio = np.asarray(audio, dtype=np.float32)
+    try:
+        audio = signal.sosfilt(signal.butter(3, _cutoff(sr, 8000), 'low', fs=sr, output='sos'), audio)
+    except Exception:
+        pass
+    n = int(sr * 0.012)
+    if n > 0 and len(audio) > n * 2:
+        audio[:n] *= np.linspace(0, 1, n) ** 1.5
+        audio[-n:] *= np.linspace(1, 0, n) ** 1.5
+    return audio
+
+def legacy_humble(audio, sr):
+    audio = np.asarray(audio, dtype=np.float32) * 0.88
+    try:
+        b, a = signal.butter(2, _band(sr, 250, 4500), btype='band', fs=sr)
+        return signal.filtfilt(b, a, audio)
+    except Exception:
+        return audio
+
+def legacy_breath(audio, sr):
+    audio = np.asarray(audio, dtype=np.float32)
+    n = int(sr * 0.12)
+    breath = np.random.normal(0, 0.002, n).astype(np.float32) * np.hanning(n) * 0.15
+    return np.concatenate([breath, audio, breath])
+
+LEGACY_STAGES = {
+    "smooth": legacy_smooth,
+    "humble": legacy_humble,
+    "pitch": legacy_pitch,
+    "formant": legacy_formant,
+    "breathiness": legacy_breathiness,
+    "warmth": legacy_warmth,
+    "breath": legacy_breath,
+}
+
+def synthetic_voice(seconds, sr, seed=0):
+    # Sinyal mirip suara: nada dasar bervariasi + harmonik + noise, dengan amplop suku kata.
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    f0 = 220 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    audio = sum(np.sin(k * phase) / k for k in range(1, 12))
+    audio *= 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 3 * t))
+    audio += rng.normal(0, 0.01, len(t))
+    return (audio / np.max(np.abs(audio)) * 0.8).astype(np.float32)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RTF per tahap efek suara: versi lama vs VoiceEffectsChain.")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--sr", type=int, default=44100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    audio = synthetic_voice(args.seconds, args.sr)
+    chain = VoiceEffectsChain(args.sr)
+    chain.run(audio, SPEAK_STAGES)
+
+    print(f"Klip {args.seconds:.0f}s @ {args.sr} Hz, RTF = waktu proses / durasi audio (lebih kecil lebih baik)")
+    print(f"{'tahap':<12} {'RTF lama':>10} {'RTF baru':>10} {'speedup':>8} {'korelasi':>9}")
+    total_legacy = total_new = 0.0
+    for stage in SPEAK_STAGES:
+        legacy_fn = LEGACY_STAGES[stage]
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            ref = legacy_fn(audio.copy(), args.sr)
+        legacy = (time.perf_counter() - start) / args.repeat
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            out = chain.apply(stage, audio)
+        new = (time.perf_counter() - start) / args.repeat
+        total_legacy += legacy
+        total_new += new
+        corr = np.corrcoef(np.asarray(ref, dtype=np.float64), np.asarray(out, dtype=np.float64))[0, 1]
+        print(f"{stage:<12} {legacy / args.seconds:>10.5f} {new / args.seconds:>10.5f} {legacy / new:>7.1f}x {corr:>9.4f}")
+
+    timings = {}
+    for _ in range(args.repeat):
+        chain.run(audio, SPEAK_STAGES, timings=timings)
+    fused = sum(timings.values()) / args.repeat
+    print(f"{'total':<12} {total_legacy / args.seconds:>10.5f} {total_new / args.seconds:>10.5f} {total_legacy / total_new:>7.1f}x")
+    print(f"{'chain.run':<12} {'':>10} {fused / args.seconds:>10.5f} {total_legacy / fused:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
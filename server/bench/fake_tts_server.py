@@ -0,0 +1,111 @@
+import io
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import soundfile as sf
+
+SAMPLE_RATE = 44100
+
+def render_wav(text, seconds_per_char=0.06):
+    # Nada sinus yang durasinya sebanding dengan panjang teks, cukup untuk menguji pipeline DSP.
+    seconds = min(20.0, max(0.3, len(text) * seconds_per_char))
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    audio = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    buf = io.BytesIO()
+    sf.write(buf, audio, SAMPLE_RATE, format="WAV", subtype="PCM_16")
+    return buf.getvalue()
+
+class FakeTTSHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _reply(self, status, body=b"", content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _synthesize(self, params):
+        cfg = self.server.config
+        with self.server.lock:
+            self.server.stats["requests"] += 1
+            self.server.stats["in_flight"] += 1
+            self.server.stats["max_in_flight"] = max(self.server.stats["max_in_flight"], self.server.stats["in_flight"])
+        try:
+            if cfg.latency_ms:
+                time.sleep(cfg.latency_ms / 1000.0 * random.uniform(0.8, 1.2))
+            if random.random() < cfg.fail_rate:
+                self._reply(500, b'{"detail": "synthesis failed"}')
+                return
+            text = params.get("text", "")
+            if not text:
+                self._reply(422, b'{"detail": "text is required"}')
+                return
+            self._reply(200, render_wav(text), "audio/wav")
+        finally:
+            with self.server.lock:
+                self.server.stats["in_flight"] -= 1
+
+    def do_GET(self):
+        parts = urllib.parse.urlsplit(self.path)
+        if parts.path == "/voice":
+            self._synthesize(dict(urllib.parse.parse_qsl(parts.query)))
+        elif parts.path in ("/", "/models/info", "/status"):
+            with self.server.lock:
+                payload = dict(self.server.stats)
+            self._reply(200, json.dumps(payload).encode("utf-8"))
+        else:
+            self._reply(404, b'{"detail": "not found"}')
+
+    def do_POST(self):
+        parts = urllib.parse.urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        if parts.path != "/voice":
+            self._reply(404, b'{"detail": "not found"}')
+            return
+        if self.server.config.get_only:
+            self._reply(405, b'{"detail": "method not allowed"}')
+            return
+        params = dict(urllib.parse.parse_qsl(parts.query))
+        if body:
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                params.update(json.loads(body))
+            else:
+                params.update(urllib.parse.parse_qsl(body))
+        self._synthesize(params)
+
+def make_server(host="127.0.0.1", port=5001, latency_ms=0.0, fail_rate=0.0, get_only=False):
+    server = ThreadingHTTPServer((host, port), FakeTTSHandler)
+    server.daemon_threads = True
+    server.config = argparse.Namespace(latency_ms=latency_ms, fail_rate=fail_rate, get_only=get_only)
+    server.lock = threading.Lock()
+    server.stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0}
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Server Style-Bert-VITS2 tiruan (/voice) untuk tes dan benchmark tanpa GPU.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latensi sintesis buatan per request.")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Peluang balasan 500 (0..1).")
+    parser.add_argument("--get-only", action="store_true", help="Tolak POST dengan 405, seperti server lama.")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency_ms, args.fail_rate, args.get_only)
+    print(f"✅ Fake TTS aktif di http://{args.host}:{args.port}/voice")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import subprocess
+import urllib.request
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from utils.metrics import Histogram
+
+QUERIES = [
+    "jadwal krs kapan", "ukt berapa", "syarat skripsi apa saja", "lokasi perpus dimana",
+    "cara bayar ukt lewat bni", "lupa password siakad", "kapan wisuda", "halo",
+    "saya prodi informatika semester 5, jadwal kuliah?", "terima kasih",
+]
+
+def _post_json(url, payload, timeout=30.0):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        resp.read()
+        return resp.status
+
+def wait_ready(base_url, timeout=300.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/readyz", timeout=5) as resp:
+                if resp.status == 200:
+                    return True
+        except Exception:
+            time.sleep(1.0)
+    return False
+
+def run_load(base_url, concurrency, duration, sessions=200):
+    latency = Histogram()
+    counts = {"ok": 0, "error": 0}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker(idx):
+        rng = random.Random(idx)
+        while time.perf_counter() < stop_at:
+            payload = {"message": rng.choice(QUERIES), "session_id": f"load_{rng.randrange(sessions)}"}
+            started = time.perf_counter()
+            try:
+                ok = _post_json(f"{base_url}/chat", payload) == 200
+            except Exception:
+                ok = False
+            latency.observe((time.perf_counter() - started) * 1000.0)
+            with lock:
+                counts["ok" if ok else "error"] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    snap = latency.snapshot()
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": counts["ok"] + counts["error"],
+        "errors": counts["error"],
+        "rps": round(counts["ok"] / elapsed, 1),
+        "p50_ms": snap["p50"],
+        "p99_ms": snap["p99"],
+    }
+
+def run_with_workers(workers, args):
+    port = args.port
+    env = dict(os.environ, VOICE_WARMUP="0")
+    cmd = [sys.executable, os.path.join(SERVER_DIR, "serve.py"), "--workers", str(workers), "--port", str(port), "--host", "127.0.0.1"]
+    proc = subprocess.Popen(cmd, cwd=SERVER_DIR, env=env)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        if not wait_ready(base_url):
+            raise RuntimeError(f"Server dengan {workers} worker tidak siap")
+        run_load(base_url, args.concurrency, min(2.0, args.duration))
+        result = run_load(base_url, args.concurrency, args.duration)
+        result["workers"] = workers
+        return result
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /chat: requests/sec dari 1 sampai N worker.")
+    parser.add_argument("--url", default=None, help="Uji server yang sudah berjalan (tanpa spawn serve.py).")
+    parser.add_argument("--workers", default="1,2,4", help="Daftar jumlah worker, mis. 1,2,4,8")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--output", default=None, help="Simpan hasil sebagai JSON.")
+    args = parser.parse_args()
+
+    if args.url:
+        results = [run_load(args.url.rstrip("/"), args.concurrency, args.duration)]
+    else:
+        results = [run_with_workers(int(w), args) for w in args.workers.split(",") if w.strip()]
+
+    base_rps = results[0]["rps"] or 1.0
+    print(f"{'workers':>8} {'rps':>8} {'speedup':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for r in results:
+        print(f"{r.get('workers', '-'):>8} {r['rps']:>8} {r['rps'] / base_rps:>7.2f}x {r['p50_ms']:>8} {r['p99_ms']:>8} {r['errors']:>7}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
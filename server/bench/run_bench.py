@@ -0,0 +1,352 @@
+import io
+import os
+import gc
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import tracemalloc
+import multiprocessing
+from datetime import datetime, timezone
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+DATA_PATH = os.path.join(SERVER_DIR, 'data', 'intents.json')
+RESULTS_DIR = os.path.join(SERVER_DIR, 'bench', 'results')
+SAMPLE_AUDIO = os.path.join(SERVER_DIR, 'rvc_test_in.wav')
+FALLBACK_PATTERNS = [
+    "Jadwal KRS kapan ya?", "ukt berapa", "Bagaimana cara bayarnya lewat mobile banking?",
+    "syarat skripsi apa aja kak", "dimana lokasi perpus", "lupa password siakad gimana",
+    "Kapan wisudanya gelombang 1?", "saya prodi informatika semester 5, jadwal kuliah?",
+    "NIM saya 2105101010, cek nilai dong", "terima kasih banyak",
+]
+FALLBACK_RESPONSES = [
+    "Pengisian KRS dibuka sesuai kalender akademik, silakan cek menu KRS di Siakad.",
+    "Besaran UKT dapat dilihat pada menu Keuangan di Siakad Anda.",
+    "Syarat skripsi meliputi minimal 120 SKS dan lulus mata kuliah metodologi penelitian.",
+    "Perpustakaan berada di Gedung Utama lantai 2, buka pukul 08.00 sampai 16.00.",
+]
+ENV_KNOBS = ("INTENT_BACKEND", "INFERENCE_BATCHING", "STT_MODEL_SIZE", "STT_COMPUTE_TYPE", "STT_WORKERS", "STT_BEAM_SIZE")
+
+class BenchmarkSkipped(Exception):
+    pass
+
+def load_intents(path):
+    if not os.path.exists(path):
+        return list(FALLBACK_PATTERNS), list(FALLBACK_RESPONSES)
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    patterns = [p for intent in data['intents'] for p in intent['patterns']]
+    responses = [r for intent in data['intents'] for r in intent['responses']]
+    return patterns or list(FALLBACK_PATTERNS), responses or list(FALLBACK_RESPONSES)
+
+def misspell(text, rng, rate=0.2):
+    # Gaya ketik chat: huruf hilang, tertukar, dobel, atau vokal dibuang.
+    words = []
+    for word in text.split():
+        if len(word) > 3 and rng.random() < rate:
+            i = rng.randrange(1, len(word) - 1)
+            op = rng.randrange(4)
+            if op == 0:
+                word = word[:i] + word[i + 1:]
+            elif op == 1:
+                word = word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+            elif op == 2:
+                word = word[:i] + word[i] + word[i:]
+            else:
+                word = word[0] + "".join(c for c in word[1:] if c.lower() not in "aeiou")
+        words.append(word)
+    return " ".join(words)
+
+def long_replies(responses, rng, count=40, min_chars=600):
+    replies = []
+    for _ in range(count):
+        parts = []
+        while sum(len(p) for p in parts) < min_chars:
+            parts.append(rng.choice(responses))
+        # Markup yang memang harus dibuang _sanitize_reply_for_tts.
+        parts.insert(1, "[AKSES DATABASE] Detail di https://siakad.unipma.ac.id/krs atau file `panduan.pdf`.")
+        replies.append(" ".join(parts))
+    return replies
+
+def build_workloads(path, seed=0, variants=500):
+    rng = random.Random(seed)
+    patterns, responses = load_intents(path)
+    return {
+        "patterns": patterns,
+        "misspelled": [misspell(rng.choice(patterns), rng) for _ in range(variants)],
+        "long_replies": long_replies(responses, rng),
+    }
+
+def _queries(workloads):
+    return workloads["patterns"] + workloads["misspelled"]
+
+def setup_normalize(workloads):
+    from utils.text_preprocessing import text_normalize
+    return text_normalize, _queries(workloads)
+
+def setup_extract_entities(workloads):
+    from utils.session_manager import SessionManager
+    session = SessionManager()
+    return session.extract_entities, _queries(workloads)
+
+def setup_sanitize(workloads):
+    try:
+        # bootstrap memuat data/response_templates.json saat import.
+        from bootstrap import _sanitize_reply_for_tts
+    except (OSError, ImportError) as e:
+        raise BenchmarkSkipped(f"bootstrap tidak bisa di-import: {e}")
+    return _sanitize_reply_for_tts, workloads["long_replies"]
+
+def setup_process_query(workloads):
+    try:
+        from bootstrap import build_agent
+        agent = build_agent()
+    except (OSError, ImportError) as e:
+        raise BenchmarkSkipped(f"model/aset intent tidak tersedia: {e}")
+    queries = _queries(workloads)
+    sessions = [f"bench_{i % 64}" for i in range(len(queries))]
+    inputs = list(zip(queries, sessions))
+    return lambda item: agent.process_query(*item), inputs
+
+def _voice_assistant():
+    # Stand-in lokal: translator offline, server Style-Bert tiruan, tanpa cache audio.
+    from bench.fake_tts_server import make_server
+    server = make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    os.environ["STYLE_BERT_API_URL"] = f"http://{host}:{port}/voice"
+    os.environ.pop("STYLE_BERT_API_URLS", None)
+    os.environ["TTS_HEALTH_INTERVAL_S"] = "0"
+    os.environ["TTS_CACHE"] = "0"
+    os.environ["TRANSLATION_BACKEND"] = "offline"
+    os.environ["TRANSLATION_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_"), "translations.sqlite3")
+    from voice import AnimeVoiceAssistant
+    return AnimeVoiceAssistant()
+
+def setup_dsp(workloads):
+    from bench.fake_tts_server import render_wav
+    va = _voice_assistant()
+    inputs = [render_wav(text) for text in workloads["long_replies"][:8]]
+    return va.render_tts_audio, inputs
+
+def setup_synthesize(workloads):
+    va = _voice_assistant()
+    return lambda text: va.synthesize_bytes(text), workloads["long_replies"]
+
+def setup_transcribe(workloads):
+    va = _voice_assistant()
+    try:
+        va.stt.load()
+    except Exception as e:
+        raise BenchmarkSkipped(f"model Whisper tidak bisa dimuat: {e}")
+    if os.path.exists(SAMPLE_AUDIO):
+        with open(SAMPLE_AUDIO, "rb") as f:
+            audio = f.read()
+    else:
+        from bench.fake_tts_server import render_wav
+        audio = render_wav(workloads["long_replies"][0])
+    return lambda data: va.transcribe_file(io.BytesIO(data)), [audio]
+
+BENCHMARKS = {
+    "normalize": setup_normalize,
+    "extract_entities": setup_extract_entities,
+    "sanitize": setup_sanitize,
+    "process_query": setup_process_query,
+    "dsp": setup_dsp,
+    "synthesize": setup_synthesize,
+    "transcribe": setup_transcribe,
+}
+
+def measure(fn, inputs, iterations, max_seconds, warmup):
+    n = len(inputs)
+    for i in range(min(warmup, iterations)):
+        fn(inputs[i % n])
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < iterations:
+        item = inputs[len(latencies) % n]
+        t = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - t)
+        if len(latencies) >= 3 and time.perf_counter() - started > max_seconds:
+            break
+    elapsed = time.perf_counter() - started
+    ms = np.array(latencies) * 1000.0
+    return {
+        "calls": len(latencies),
+        "ops_per_sec": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(float(ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "max_ms": round(float(ms.max()), 4),
+    }
+
+def measure_allocations(fn, inputs, calls):
+    # Pass terpisah: tracemalloc memperlambat eksekusi sehingga tidak boleh mencampuri latensi.
+    n = len(inputs)
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    peaks = []
+    for i in range(calls):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn(inputs[i % n])
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "alloc_peak_kb_per_call": round(sum(peaks) / len(peaks) / 1024.0, 2),
+        "retained_bytes_per_call": round((end - base) / calls, 1),
+    }
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux melaporkan KiB, macOS byte.
+    return round(peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0, 1)
+
+def run_benchmark(name, workloads, options):
+    started = time.perf_counter()
+    try:
+        fn, inputs = BENCHMARKS[name](workloads)
+    except (BenchmarkSkipped, ImportError, OSError) as e:
+        return {"skipped": str(e)}
+    result = {"setup_s": round(time.perf_counter() - started, 3), "inputs": len(inputs)}
+    result.update(measure(fn, inputs, options["iterations"], options["max_seconds"], options["warmup"]))
+    alloc_calls = min(options["alloc_calls"], result["calls"])
+    if alloc_calls:
+        result.update(measure_allocations(fn, inputs, alloc_calls))
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+def run_isolated(name, workloads, options):
+    # Proses baru per benchmark: peak RSS tidak tercampur model/buffer benchmark lain.
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(run_benchmark, (name, workloads, options))
+
+def git_revision():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, stderr=subprocess.DEVNULL, text=True).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], cwd=SERVER_DIR, stderr=subprocess.DEVNULL, text=True).strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+def run_meta(args, workloads):
+    commit, dirty = git_revision()
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "dirty": dirty,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "seed": args.seed,
+        "workloads": {k: len(v) for k, v in workloads.items()},
+        "env": {k: os.environ[k] for k in ENV_KNOBS if k in os.environ},
+    }
+
+def print_results(results):
+    print(f"{'benchmark':<18} {'ops/s':>11} {'p50 ms':>10} {'p99 ms':>10} {'RSS MB':>8} {'alloc KB':>10} {'retained B':>11}")
+    for name, r in results.items():
+        if "skipped" in r:
+            print(f"{name:<18} ⏭️  dilewati: {r['skipped']}")
+            continue
+        print(f"{name:<18} {r['ops_per_sec']:>11.1f} {r['p50_ms']:>10.3f} {r['p99_ms']:>10.3f} "
+              f"{r['peak_rss_mb'] if r['peak_rss_mb'] is not None else '-':>8} "
+              f"{r.get('alloc_peak_kb_per_call', '-'):>10} {r.get('retained_bytes_per_call', '-'):>11}")
+
+def compare(base, new, threshold):
+    # Regresi: throughput turun atau p99 naik lebih dari `threshold` persen.
+    print(f"📊 {base['meta'].get('commit')} → {new['meta'].get('commit')}")
+    print(f"{'benchmark':<18} {'ops/s':>22} {'Δ':>8} {'p99 ms':>22} {'Δ':>8}")
+    regressions = []
+    for name in sorted(set(base["results"]) | set(new["results"])):
+        a = base["results"].get(name, {})
+        b = new["results"].get(name, {})
+        if "ops_per_sec" not in a or "ops_per_sec" not in b:
+            print(f"{name:<18} (tidak ada di salah satu hasil)")
+            continue
+        ops = (b["ops_per_sec"] - a["ops_per_sec"]) / a["ops_per_sec"] * 100.0
+        p99 = (b["p99_ms"] - a["p99_ms"]) / a["p99_ms"] * 100.0 if a["p99_ms"] else 0.0
+        mark = ""
+        if ops < -threshold or p99 > threshold:
+            mark = "❌"
+            regressions.append(name)
+        elif ops > threshold:
+            mark = "✅"
+        print(f"{name:<18} {a['ops_per_sec']:>10.1f} → {b['ops_per_sec']:>9.1f} {ops:>+7.1f}% "
+              f"{a['p99_ms']:>10.3f} → {b['p99_ms']:>9.3f} {p99:>+7.1f}% {mark}")
+    return regressions
+
+def load_result(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark throughput/latensi pipeline server (offline, tanpa HTTP).")
+    parser.add_argument("--only", default=None, help=f"Daftar benchmark dipisah koma: {','.join(BENCHMARKS)}")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--variants", type=int, default=500, help="Jumlah variasi salah ketik yang dibangkitkan.")
+    parser.add_argument("--iterations", type=int, default=2000, help="Maksimum panggilan per benchmark.")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="Batas waktu pengukuran per benchmark.")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--alloc-calls", type=int, default=50, help="Panggilan untuk pass tracemalloc (0 = lewati).")
+    parser.add_argument("--no-isolate", action="store_true", help="Jalankan semua benchmark di proses ini (peak RSS jadi kumulatif).")
+    parser.add_argument("--output", default=None, help="File JSON hasil (default bench/results/<timestamp>-<commit>.json).")
+    parser.add_argument("--baseline", default=None, help="Bandingkan hasil run ini dengan JSON sebelumnya.")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Bandingkan dua file hasil tanpa menjalankan benchmark.")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Ambang regresi dalam persen.")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(load_result(args.compare[0]), load_result(args.compare[1]), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"benchmark tidak dikenal: {', '.join(unknown)}")
+
+    workloads = build_workloads(args.data, args.seed, args.variants)
+    options = {"iterations": args.iterations, "max_seconds": args.max_seconds, "warmup": args.warmup, "alloc_calls": args.alloc_calls}
+    report = {"meta": run_meta(args, workloads), "results": {}}
+    for name in names:
+        print(f"🔍 {name} ...", flush=True)
+        runner = run_benchmark if args.no_isolate else run_isolated
+        report["results"][name] = runner(name, workloads, options)
+
+    print_results(report["results"])
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{report['meta']['commit'] or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"✅ Hasil disimpan: {output}")
+
+    if args.baseline:
+        regressions = compare(load_result(args.baseline), report, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+# server/bootstrap.py
+import os
+import json
+import re
+import time
+import threading
+import logging
+import base64
+import hmac
+from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
+from agent_core import AgentOrchestrator
+from utils.audio_codec import encode_audio
+from utils.batch_inference import BatchInferenceEngine
+from utils.intent_classifier import load_classifier
+from utils.metrics import REGISTRY
+from utils.model_registry import LEGACY_VERSION, IntentBundle, ModelRegistry, ModelReloader, validation_samples
+from utils.preprocessing_cache import CachedPreprocessor
+from utils.session_store import create_session_store
+from utils.stt_stream import StreamingTranscriber, StreamRegistry
+from voice import AnimeVoiceAssistant
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INTENT_BACKEND = os.environ.get("INTENT_BACKEND", "keras")
+STT_PRELOAD = os.environ.get("STT_PRELOAD", "1") != "0"
+STT_STREAM_PARTIAL_S = float(os.environ.get("STT_STREAM_PARTIAL_S", "1.0"))
+STT_STREAM_END_SILENCE_MS = int(os.environ.get("STT_STREAM_END_SILENCE_MS", "700"))
+STT_STREAM_IDLE_TTL = float(os.environ.get("STT_STREAM_IDLE_TTL", "60"))
+STT_STREAM_MAX = int(os.environ.get("STT_STREAM_MAX", "256"))
+METRICS_TIMING_HEADERS = os.environ.get("METRICS_TIMING_HEADERS", "0") != "0"
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'intents.json')
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+MODEL_WATCH_S = float(os.environ.get("MODEL_WATCH_S", "0"))
+MODEL_RELOAD_MIN_ACCURACY = float(os.environ.get("MODEL_RELOAD_MIN_ACCURACY", "0.8"))
+MODEL_RELOAD_MIN_AGREEMENT = float(os.environ.get("MODEL_RELOAD_MIN_AGREEMENT", "0"))
+MODEL_RELOAD_SAMPLES = int(os.environ.get("MODEL_RELOAD_SAMPLES_PER_INTENT", "5"))
+MODEL_RELOAD_DRAIN_S = float(os.environ.get("MODEL_RELOAD_DRAIN_S", "30"))
+
+model_registry = ModelRegistry(MODELS_DIR)
+
+def _sanitize_reply_for_tts(text):
+    s = (text or "")
+    s = re.sub(r"```[\s\S]*?```", " ", s)
+    s = re.sub(r"`[^`]*`", " ", s)
+    s = re.sub(r"^\s*\[[A-Z_]{2,}\][^\n]*$", " ", s, flags=re.MULTILINE)
+    s = re.sub(r"\[[^\]]+\]", " ", s)
+    s = re.sub(r"https?://\S+", " ", s, flags=re.IGNORECASE)
+    s = re.sub(r"\bwww\.\S+", " ", s, flags=re.IGNORECASE)
+    s = re.sub(r"[A-Za-z]:\\[^\s]+", " ", s)
+    s = re.sub(r"\b\w+\.(?:py|js|ts|tsx|jsx|svelte|html|css|json|md|txt)\b", " ", s, flags=re.IGNORECASE)
+    s = re.sub(r"\s+", " ", s).strip()
+    if not s: return ""
+    if s[-1] not in ".!?": s += "."
+    return s
+
+def _new_inference_engine(classifier):
+    if os.environ.get("INFERENCE_BATCHING", "1") == "0":
+        return None
+    return BatchInferenceEngine(
+        classifier.predict_proba,
+        max_batch_size=int(os.environ.get("INFERENCE_MAX_BATCH", "32")),
+        max_wait_ms=float(os.environ.get("INFERENCE_MAX_WAIT_MS", "2")),
+    ).start()
+
+def _load_intent_data(version):
+    with open(model_registry.data_path(version, DATA_PATH), encoding='utf-8') as file:
+        return json.load(file)
+
+def load_intent_bundle(version=LEGACY_VERSION):
+    classifier = load_classifier(
+        model_registry.version_dir(version),
+        backend=INTENT_BACKEND,
+        max_len=30,
+        mmap_mode="r" if os.environ.get("INTENT_MMAP", "1") != "0" else None,
+    )
+    intent_map = {i['tag']: i['responses'] for i in _load_intent_data(version)['intents']}
+    return IntentBundle(classifier, intent_map, _new_inference_engine(classifier), version=version)
+
+def build_agent(logger=None):
+    logger = logger or logging.getLogger(__name__)
+    version = model_registry.active()
+    bundle = load_intent_bundle(version)
+    logger.info("Intent backend: %s, model %s", bundle.classifier.backend, version)
+
+    data = _load_intent_data(version)
+    factory = StemmerFactory()
+    stemmer = factory.create_stemmer()
+    preprocessor = CachedPreprocessor(
+        stemmer,
+        token_cache_size=int(os.environ.get("PREPROCESS_TOKEN_CACHE", "8192")),
+        utterance_cache_size=int(os.environ.get("PREPROCESS_UTTERANCE_CACHE", "2048")),
+    )
+    if os.environ.get("PREPROCESS_WARM_START", "1") != "0":
+        warmed = preprocessor.warm_start(p for i in data['intents'] for p in i['patterns'])
+        logger.info("Preprocessing cache warm-start: %d utterance", warmed)
+
+    session_store = create_session_store(
+        backend=os.environ.get("SESSION_BACKEND", "memory"),
+        path=os.environ.get("SESSION_DB_PATH", os.path.join(BASE_DIR, "data", "sessions.sqlite3")),
+        max_sessions=int(os.environ.get("SESSION_MAX", "10000")),
+        idle_ttl=float(os.environ.get("SESSION_TTL_S", "3600")),
+        max_bytes=int(os.environ.get("SESSION_MAX_BYTES", str(64 * 1024 * 1024))),
+    )
+
+    bot_agent = AgentOrchestrator(
+        stemmer=stemmer,
+        max_len=30,
+        preprocessor=preprocessor,
+        session_store=session_store,
+        bundle=bundle
+    )
+    return bot_agent
+
+model_reloader = None
+model_reloader_lock = threading.Lock()
+
+def get_model_reloader(bot_agent):
+    global model_reloader
+    if model_reloader is not None: return model_reloader
+    with model_reloader_lock:
+        if model_reloader is None:
+            preprocessor = bot_agent.preprocessor
+            # stem() langsung (bukan process()) agar validasi tidak mengotori cache kalimat dan metrik tahap.
+            preprocess = lambda text: preprocessor.stem(preprocessor.normalize_fn(text))
+            model_reloader = ModelReloader(
+                bot_agent,
+                model_registry,
+                load_intent_bundle,
+                lambda version: validation_samples(_load_intent_data(version), preprocess, per_intent=MODEL_RELOAD_SAMPLES),
+                logging.getLogger("model_reload"),
+                min_accuracy=MODEL_RELOAD_MIN_ACCURACY,
+                min_agreement=MODEL_RELOAD_MIN_AGREEMENT,
+                drain_s=MODEL_RELOAD_DRAIN_S,
+            )
+        return model_reloader
+
+def start_model_watch(bot_agent):
+    get_model_reloader(bot_agent).watch(MODEL_WATCH_S)
+
+def check_admin_token(authorization=None, token=None):
+    if not ADMIN_TOKEN: return False
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    return hmac.compare_digest((token or "").encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
+
+def admin_model_action(bot_agent, action, data):
+    reloader = get_model_reloader(bot_agent)
+    wait = bool(data.get('wait'))
+    try:
+        if action == "rollback":
+            started, status = reloader.rollback(wait=wait)
+        else:
+            started, status = reloader.reload(data.get('version'), wait=wait)
+    except KeyError:
+        return 404, {"error": f"Versi model tidak ada: {data.get('version')}"}
+    except LookupError as e:
+        return 409, {"error": str(e)}
+    if not started:
+        return 409, {"error": "Reload lain sedang berjalan", **status}
+    if not wait:
+        return 202, status
+    return (200 if (status["last_result"] or {}).get("ok") else 422), status
+
+def handle_chat(bot_agent, data):
+    user_input = data.get('message', '')
+    session_id = data.get('session_id', 'default_user')
+    if "reset" in user_input.lower().strip():
+        bot_agent.reset_session(session_id)
+        return {"reply": "Sesi direset.", "emotion": "neutral"}
+    if not user_input.strip():
+        return {"reply": "...", "emotion": "neutral"}
+    result = bot_agent.process_query(user_input, session_id)
+    if isinstance(result, dict) and "reply" in result:
+        result["reply_tts"] = _sanitize_reply_for_tts(result.get("reply"))
+    return result
+
+STREAM_MIMETYPES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+
+def format_stream_event(event, payload, fmt="sse"):
+    if fmt == "ndjson":
+        return json.dumps({"event": event, **payload}, ensure_ascii=False) + "\n"
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+def _audio_event(index, sentence, audio_bytes, mime, fmt, codec="wav"):
+    if codec != "wav":
+        audio_bytes, mime = encode_audio(audio_bytes, codec)
+    return format_stream_event("audio", {
+        "index": index,
+        "text": sentence,
+        "audio_base64": base64.b64encode(audio_bytes).decode("ascii"),
+        "mime": mime,
+    }, fmt)
+
+def tts_stream_events(va, text, emotion=None, fmt="sse", codec="wav"):
+    count = 0
+    for index, sentence, audio_bytes, mime in va.synthesize_stream(text, emotion=emotion):
+        count += 1
+        yield _audio_event(index, sentence, audio_bytes, mime, fmt, codec)
+    yield format_stream_event("done", {"chunks": count}, fmt)
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000.0, 1)
+
+def transcribe_turn(raw):
+    # STT dijalankan sebelum respon streaming dimulai agar antrean penuh masih bisa dijawab 503.
+    started = time.perf_counter()
+    text = get_voice().transcribe_audio(raw)
+    return {"text": text, "started": started, "timings_ms": {"stt": _elapsed_ms(started)}}
+
+def chat_turn(bot_agent, turn, data):
+    # Terpisah dari turn_events agar ASGI bisa menjalankannya di executor chat sebelum stream dimulai.
+    if not turn["text"].strip():
+        return None
+    stage = time.perf_counter()
+    result = handle_chat(bot_agent, {"message": turn["text"], "session_id": data.get('session_id', 'default_user')})
+    turn["timings_ms"]["chat"] = _elapsed_ms(stage)
+    return result
+
+def turn_events(bot_agent, turn, data, fmt="ndjson", result=None):
+    timings = turn["timings_ms"]
+    yield format_stream_event("transcript", {"text": turn["text"]}, fmt)
+    count = 0
+    try:
+        if result is None:
+            result = chat_turn(bot_agent, turn, data)
+        if result is not None:
+            reply_tts = result.get("reply_tts", "")
+            stage = time.perf_counter()
+            # Terjemahan + sintesis sudah berjalan di pool stream selagi event reply dikirim ke klien.
+            chunks = get_voice().synthesize_stream(reply_tts, emotion=data.get('emotion') or result.get("emotion"))
+            yield format_stream_event("reply", result, fmt)
+            for index, sentence, audio_bytes, mime in chunks:
+                if not count:
+                    timings["tts_first_chunk"] = _elapsed_ms(stage)
+                count += 1
+                yield _audio_event(index, sentence, audio_bytes, mime, fmt, data.get('codec', 'wav'))
+            timings["tts"] = _elapsed_ms(stage)
+    except Exception as e:
+        # Header 200 sudah terkirim: laporkan lewat event, stream tetap ditutup dengan done.
+        logging.getLogger(__name__).error("Turn gagal: %s", e)
+        yield format_stream_event("error", {"error": str(e)}, fmt)
+    timings["total"] = _elapsed_ms(turn["started"])
+    yield format_stream_event("done", {"chunks": count, "timings_ms": timings}, fmt)
+
+def record_http_request(method, route, status, elapsed_ms):
+    REGISTRY.counter("http_requests_total", "Jumlah request HTTP", method=method, route=route, status=str(status)).inc()
+    REGISTRY.histogram("http_request_duration_ms", "Latensi request HTTP sampai header respon (ms)", route=route).observe(elapsed_ms)
+
+def agent_stats(bot_agent):
+    payload = {
+        "preprocessing": bot_agent.preprocessor.stats(),
+        "sessions": bot_agent.sessions.stats(),
+        "stages": REGISTRY.stage_snapshot(),
+        "model": {"version": bot_agent.bundle.version, "loaded_at": bot_agent.bundle.loaded_at},
+    }
+    if bot_agent.inference_engine is not None:
+        payload["inference"] = bot_agent.inference_engine.stats()
+    if voice_assistant is not None and voice_assistant.audio_cache is not None:
+        payload["tts_cache"] = voice_assistant.audio_cache.stats()
+    if voice_assistant is not None:
+        payload["translation"] = voice_assistant.translator.stats()
+        payload["tts_backend"] = voice_assistant.tts_client.stats()
+        payload["stt"] = voice_assistant.stt.stats()
+        payload["stt_streams"] = stt_streams.stats()
+    return payload
+
+def _new_stt_stream(sample_rate=16000):
+    return StreamingTranscriber(
+        get_voice().stt,
+        sample_rate=sample_rate,
+        partial_interval_s=STT_STREAM_PARTIAL_S,
+        end_silence_ms=STT_STREAM_END_SILENCE_MS,
+    )
+
+stt_streams = StreamRegistry(_new_stt_stream, idle_ttl=STT_STREAM_IDLE_TTL, max_streams=STT_STREAM_MAX)
+
+def stt_stream_open(data):
+    sample_rate = int(data.get('sample_rate') or 16000)
+    meta = {"chat": bool(data.get('chat')), "session_id": data.get('session_id', 'default_user')}
+    stream_id = stt_streams.create(meta, sample_rate=sample_rate)
+    return {"stream_id": stream_id, "sample_rate": sample_rate, "format": "pcm_s16le"}
+
+def stt_stream_push(stream_id, chunk):
+    entry = stt_streams.get(stream_id)
+    if entry is None:
+        return None
+    stream, lock, _ = entry
+    with lock:
+        return {"events": stream.push(chunk)}
+
+def stt_stream_finish(bot_agent, stream_id):
+    entry = stt_streams.close(stream_id)
+    if entry is None:
+        return None
+    stream, lock, meta = entry
+    with lock:
+        events = stream.finish()
+    result = {"events": events, "text": events[-1]["text"]}
+    if meta["chat"] and result["text"]:
+        result["chat"] = handle_chat(bot_agent, {"message": result["text"], "session_id": meta["session_id"]})
+    return result
+
+voice_assistant = None
+voice_assistant_lock = threading.Lock()
+voice_warmup_lock = threading.Lock()
+voice_warmup_state = {"started": False, "done": False, "ok": False, "error": None}
+
+def get_voice():
+    global voice_assistant
+    if voice_assistant is not None: return voice_assistant
+    with voice_assistant_lock:
+        if voice_assistant is None:
+            voice_assistant = AnimeVoiceAssistant()
+        return voice_assistant
+
+def _voice_warmup_worker():
+    global voice_warmup_state
+    try:
+        va = get_voice()
+        if STT_PRELOAD:
+            va.stt.warmup()
+        ok = bool(va.warmup_rvc())
+        with voice_warmup_lock:
+            voice_warmup_state = {"started": True, "done": True, "ok": ok, "error": None}
+    except Exception as e:
+        with voice_warmup_lock:
+            voice_warmup_state = {"started": True, "done": True, "ok": False, "error": str(e)}
+
+def start_voice_warmup():
+    with voice_warmup_lock:
+        if voice_warmup_state["started"]: return
+        voice_warmup_state["started"] = True
+    t = threading.Thread(target=_voice_warmup_worker, daemon=True)
+    t.start()
+
+def voice_warmup_status():
+    with voice_warmup_lock:
+        return dict(voice_warmup_state)
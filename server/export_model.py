@@ -0,0 +1,66 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from utils.intent_classifier import RUNTIME_DIRNAME, NumpyIntentClassifier, load_keras_classifier, export_runtime_bundle, model_file_digest
+from utils.training_data import MANIFEST_NAME, load_manifest, preprocess_patterns
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'intents.json')
+
+def load_patterns(data_path):
+    with open(data_path, encoding='utf-8') as file:
+        data = json.load(file)
+    patterns = [p for intent in data['intents'] for p in intent['patterns']]
+    return preprocess_patterns(patterns)
+
+def parity_check(reference, candidate, texts, atol=1e-4, batch_size=256):
+    max_diff = 0.0
+    mismatches = []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        padded = reference.encode(chunk)
+        if not np.array_equal(padded, candidate.encode(chunk)):
+            raise ValueError("Tokenisasi runtime berbeda dengan tokenizer Keras")
+        ref = np.asarray(reference.predict_proba(padded))
+        out = np.asarray(candidate.predict_proba(padded))
+        max_diff = max(max_diff, float(np.max(np.abs(ref - out))))
+        for i in np.nonzero(ref.argmax(axis=1) != out.argmax(axis=1))[0]:
+            mismatches.append(chunk[i])
+    return {
+        "samples": len(texts),
+        "max_abs_diff": max_diff,
+        "argmax_mismatches": mismatches,
+        "ok": not mismatches and max_diff <= atol,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Export model intent ke runtime NumPy tanpa TensorFlow.")
+    parser.add_argument("--models-dir", default=MODELS_DIR)
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--output", default=None, help=f"Default: <models-dir>/{RUNTIME_DIRNAME}")
+    parser.add_argument("--atol", type=float, default=1e-4)
+    parser.add_argument("--check-only", action="store_true")
+    args = parser.parse_args()
+
+    runtime_dir = args.output or os.path.join(args.models_dir, RUNTIME_DIRNAME)
+    keras_classifier = load_keras_classifier(args.models_dir)
+    if not args.check_only:
+        manifest = load_manifest(os.path.join(args.models_dir, MANIFEST_NAME)) or {}
+        model_digest = model_file_digest(os.path.join(args.models_dir, 'chatbot_model.h5'))
+        export_runtime_bundle(keras_classifier, runtime_dir, model_digest=model_digest, fingerprint=manifest.get("fingerprint"))
+        print(f"📦 Runtime intent ditulis ke {runtime_dir}")
+
+    report = parity_check(keras_classifier, NumpyIntentClassifier.load(runtime_dir), load_patterns(args.data), atol=args.atol)
+    print(f"🔍 Parity: {report['samples']} pola, max |Δp| = {report['max_abs_diff']:.2e}, argmax beda = {len(report['argmax_mismatches'])}")
+    if not report["ok"]:
+        print("❌ Runtime NumPy TIDAK identik dengan model Keras.")
+        for text in report["argmax_mismatches"][:10]:
+            print(f"   - {text}")
+        sys.exit(1)
+    print("✅ Runtime NumPy identik dengan model Keras.")
+
+if __name__ == "__main__":
+    main()
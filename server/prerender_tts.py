@@ -0,0 +1,98 @@
+# server/prerender_tts.py
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+from bootstrap import _sanitize_reply_for_tts
+from utils.clarification_data import CLARIFICATION_MAP
+from voice import AnimeVoiceAssistant
+
+FIXED_REPLIES = [
+    ("Sesi direset.", "neutral"),
+    ("Maaf, saya belum memahami maksud Anda. Bisa gunakan kata kunci lain seperti 'Jadwal', 'Nilai', atau 'UKT'?", "confused"),
+]
+
+def _intent_emotion(tag):
+    if tag in ('sapaan', 'terimakasih'):
+        return "happy"
+    return "neutral"
+
+def collect_lines(intents_path):
+    with open(intents_path, encoding='utf-8') as f:
+        data = json.load(f)
+    lines = []
+    for intent in data['intents']:
+        for response in intent.get('responses', []):
+            lines.append((response, _intent_emotion(intent['tag'])))
+    for text in CLARIFICATION_MAP.values():
+        lines.append((text, "confused"))
+    lines.extend(FIXED_REPLIES)
+
+    seen = set()
+    unique = []
+    for text, emotion in lines:
+        tts_text = _sanitize_reply_for_tts(text)
+        if tts_text and (tts_text, emotion) not in seen:
+            seen.add((tts_text, emotion))
+            unique.append((tts_text, emotion))
+    return unique
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render audio TTS untuk semua respons statis & klarifikasi ke cache.")
+    parser.add_argument("--data", default=os.path.join(BASE_DIR, "data", "intents.json"))
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--force", action="store_true", help="Render ulang walaupun sudah ada di cache.")
+    parser.add_argument("--dry-run", action="store_true", help="Hanya tampilkan jumlah kalimat yang akan dirender.")
+    parser.add_argument("--translations-only", action="store_true", help="Hanya isi cache terjemahan (tanpa TTS).")
+    args = parser.parse_args()
+
+    va = AnimeVoiceAssistant()
+    lines = collect_lines(args.data)
+
+    # Terjemahan di-batch dulu; render TTS di bawah lalu hanya membaca cache terjemahan.
+    started = time.perf_counter()
+    stats = va.translator.seed([text for text, _ in lines])
+    print(f"🔍 Terjemahan: {stats['segments_translated']} segmen baru, {stats['segments_cached']} dari cache ({time.perf_counter() - started:.1f}s)")
+    if args.translations_only:
+        return
+
+    if va.audio_cache is None:
+        print("❌ Cache TTS nonaktif (TTS_CACHE=0).")
+        sys.exit(1)
+
+    if args.force:
+        for text, emotion in lines:
+            va.audio_cache.discard(va.tts_cache_key(text, emotion))
+    pending = [(t, e) for t, e in lines if va.tts_cache_key(t, e) not in va.audio_cache]
+    print(f"📦 {len(lines)} kalimat unik, {len(pending)} belum ada di cache.")
+    if args.dry_run or not pending:
+        return
+
+    def render(item):
+        text, emotion = item
+        key, cached = va.cached_tts_audio(text, emotion)
+        if cached is not None:
+            return True
+        va.synthesize_bytes(text, emotion=emotion)
+        return va.audio_cache.get(key) is not None
+
+    started = time.perf_counter()
+    ok = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(render, item): item for item in pending}
+        for future in as_completed(futures):
+            if future.result():
+                ok += 1
+            else:
+                print(f"❌ Gagal render: {futures[future][0][:60]}")
+    elapsed = time.perf_counter() - started
+    print(f"✅ {ok}/{len(pending)} kalimat dirender dalam {elapsed:.1f}s ke {va.audio_cache.disk.directory}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import os
+import sys
+import argparse
+from utils.model_registry import ModelRegistry
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'intents.json')
+
+def main():
+    parser = argparse.ArgumentParser(description="Salin artefak model hasil training ke registry versi (models/registry/<versi>).")
+    parser.add_argument("--models-dir", default=MODELS_DIR, help="Sumber artefak (chatbot_model.h5, tokenizer, label encoder, intent_runtime).")
+    parser.add_argument("--data", default=DATA_PATH, help="intents.json yang dipakai training; disimpan sebagai snapshot versi.")
+    parser.add_argument("--version", default=None, help="Default: timestamp.")
+    parser.add_argument("--activate", action="store_true", help="Tulis ACTIVE.json; server dengan MODEL_WATCH_S > 0 ikut berpindah.")
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(MODELS_DIR)
+    if args.list:
+        active = registry.active()
+        for version in registry.versions():
+            print(f"{'*' if version == active else ' '} {version}")
+        return
+
+    try:
+        version = registry.publish(args.models_dir, args.data, version=args.version)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"📦 Versi {version} ditulis ke {registry.version_dir(version)}")
+    if args.activate:
+        registry.activate(version)
+        print(f"✅ {version} aktif")
+    else:
+        print(f"⏭️ Belum aktif: POST /admin/models/reload {{\"version\": \"{version}\"}}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# server/serve.py
+import os
+import sys
+import argparse
+import multiprocessing
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _post_fork(server, worker):
+    import app as server_app
+    if os.environ.get("VOICE_WARMUP", "1") != "0":
+        server_app.start_voice_warmup()
+    server_app.start_model_watch(server_app.bot_agent)
+
+def build_options(args):
+    return {
+        "bind": f"{args.host}:{args.port}",
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": "gthread",
+        "preload_app": args.preload,
+        "timeout": args.timeout,
+        "graceful_timeout": 30,
+        "keepalive": 5,
+        "max_requests": args.max_requests,
+        "max_requests_jitter": max(1, args.max_requests // 10) if args.max_requests else 0,
+        "accesslog": None,
+        "errorlog": "-",
+        "loglevel": "warning",
+        "post_fork": _post_fork,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Server produksi pre-fork (gunicorn) untuk API chat/tts/stt.")
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8080")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WEB_WORKERS", multiprocessing.cpu_count())))
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("WEB_THREADS", "4")))
+    parser.add_argument("--timeout", type=int, default=int(os.environ.get("WEB_TIMEOUT", "120")))
+    parser.add_argument("--max-requests", type=int, default=int(os.environ.get("WEB_MAX_REQUESTS", "0")))
+    parser.add_argument("--preload", choices=("auto", "yes", "no"), default=os.environ.get("WEB_PRELOAD", "auto"))
+    args = parser.parse_args()
+
+    # Model NumPy aman di-load sekali sebelum fork (halaman bobot dibagi copy-on-write / mmap).
+    # Runtime TensorFlow tidak aman di-fork, jadi backend keras di-load ulang per worker.
+    if args.preload == "auto":
+        args.preload = os.environ.get("INTENT_BACKEND", "keras") == "numpy"
+    else:
+        args.preload = args.preload == "yes"
+
+    if args.workers > 1:
+        os.environ.setdefault("SESSION_BACKEND", "sqlite")
+        # Reload lewat admin endpoint hanya mengenai satu worker; worker lain mengikuti ACTIVE.json.
+        os.environ.setdefault("MODEL_WATCH_S", "5")
+
+    sys.path.insert(0, BASE_DIR)
+    from gunicorn.app.base import BaseApplication
+
+    class ServerApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            from app import app
+            return app
+
+    ServerApplication(build_options(args)).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul server di-import sebagai `utils.*` / `bootstrap` relatif ke server/.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,20 @@
+from utils.audio_codec import negotiate_audio_format
+
+def test_explicit_format_wins_over_accept():
+    assert negotiate_audio_format("opus", "audio/wav") == "ogg"
+    assert negotiate_audio_format("base64", "audio/ogg") == "json"
+
+def test_unknown_explicit_format_is_rejected():
+    assert negotiate_audio_format("mp3") is None
+
+def test_accept_is_ordered_by_q():
+    assert negotiate_audio_format(accept="audio/wav;q=0.5, audio/ogg") == "ogg"
+    assert negotiate_audio_format(accept="audio/ogg;q=0.2, audio/x-wav;q=0.9") == "wav"
+
+def test_accept_skips_unsupported_and_zero_q():
+    assert negotiate_audio_format(accept="audio/mpeg, audio/ogg;q=0, audio/*;q=0.1") == "wav"
+
+def test_default_without_preference():
+    assert negotiate_audio_format() == "json"
+    assert negotiate_audio_format(accept="*/*") == "json"
+    assert negotiate_audio_format(accept="text/html", default="wav") == "wav"
@@ -0,0 +1,125 @@
+import threading
+import time
+import numpy as np
+import pytest
+from utils.batch_inference import BatchInferenceEngine
+
+class RecordingModel:
+    # predict_fn tiruan: baris keluaran = baris masukan * 10, mencatat ukuran tiap batch.
+    def __init__(self, delay_s=0.0):
+        self.delay_s = delay_s
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, batch):
+        self.release.wait()
+        self.batches.append(len(batch))
+        time.sleep(self.delay_s)
+        return np.asarray(batch, dtype=np.float32) * 10
+
+def batcher_threads():
+    return [t for t in threading.enumerate() if t.name == "intent-batcher" and t.is_alive()]
+
+def run_concurrently(engine, requests):
+    results = [None] * len(requests)
+    def call(i):
+        results[i] = engine.predict(requests[i])
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(requests))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results
+
+@pytest.fixture
+def engine_factory():
+    engines = []
+    def make(model, **kwargs):
+        engine = BatchInferenceEngine(model, **kwargs)
+        engines.append(engine)
+        return engine
+    yield make
+    for engine in engines:
+        engine.stop()
+
+def test_concurrent_calls_are_batched(engine_factory):
+    model = RecordingModel()
+    engine = engine_factory(model, max_batch_size=64, max_wait_ms=200).start()
+    # Worker ditahan di batch pertama agar request lain menumpuk di antrean.
+    model.release.clear()
+    first = threading.Thread(target=engine.predict, args=([[1, 1]],))
+    first.start()
+    time.sleep(0.05)
+    pending = threading.Thread(target=lambda: run_concurrently(engine, [[[i, i]] for i in range(8)]))
+    pending.start()
+    time.sleep(0.1)
+    model.release.set()
+    first.join(5)
+    pending.join(5)
+    assert sum(model.batches) == 9
+    assert len(model.batches) < 9
+    assert engine.stats()["requests"] == 9
+
+def test_rows_are_routed_back_in_order(engine_factory):
+    model = RecordingModel(delay_s=0.01)
+    engine = engine_factory(model, max_batch_size=16, max_wait_ms=20).start()
+    requests = [np.arange(n * 3, dtype=np.int32).reshape(n, 3) + 100 * i for i, n in enumerate([1, 3, 2, 1, 4, 1])]
+    results = run_concurrently(engine, requests)
+    for request, result in zip(requests, results):
+        assert result.shape == (len(request), 3)
+        np.testing.assert_array_equal(result, request * 10)
+
+def test_predict_times_out_when_worker_is_stuck(engine_factory):
+    model = RecordingModel()
+    model.release.clear()
+    engine = engine_factory(model, max_wait_ms=0).start()
+    with pytest.raises(TimeoutError):
+        engine.predict([[1, 2]], timeout=0.05)
+    model.release.set()
+
+def test_errors_are_propagated_to_every_request_in_batch(engine_factory):
+    def broken(batch):
+        raise ValueError("model rusak")
+    engine = engine_factory(broken, max_wait_ms=0).start()
+    with pytest.raises(ValueError):
+        engine.predict([[1, 2]])
+    assert engine.stats()["errors"] == 1
+
+def test_lazy_start_on_first_predict(engine_factory):
+    engine = engine_factory(RecordingModel())
+    assert engine._thread is None
+    np.testing.assert_array_equal(engine.predict([[1, 2]]), [[10, 20]])
+    assert engine._thread is not None and engine._thread.is_alive()
+
+def test_stop_does_not_resurrect_worker(engine_factory):
+    before = len(batcher_threads())
+    model = RecordingModel()
+    engine = engine_factory(model).start()
+    engine.predict([[1, 2]])
+    engine.stop()
+    assert len(batcher_threads()) == before
+    # Request yang masih memegang engine lama tetap dijawab, langsung lewat predict_fn.
+    np.testing.assert_array_equal(engine.predict([[3, 4]]), [[30, 40]])
+    assert engine._thread is None
+    assert len(batcher_threads()) == before
+    with pytest.raises(RuntimeError):
+        engine.start()
+
+def test_stop_answers_requests_already_queued(engine_factory):
+    model = RecordingModel()
+    model.release.clear()
+    engine = engine_factory(model, max_batch_size=1, max_wait_ms=0).start()
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(engine.predict([[i, i]]))) for i in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    stopper = threading.Thread(target=engine.stop)
+    stopper.start()
+    time.sleep(0.05)
+    model.release.set()
+    for t in threads + [stopper]:
+        t.join(5)
+    assert len(results) == 3
+    assert sum(model.batches) == 3
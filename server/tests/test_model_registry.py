@@ -0,0 +1,182 @@
+import os
+import json
+import logging
+import numpy as np
+import pytest
+from utils.intent_classifier import model_file_digest
+from utils.model_registry import LEGACY_VERSION, IntentBundle, ModelRegistry, ModelReloader
+from utils.training_data import MANIFEST_FORMAT_VERSION
+
+LABELS = ["krs", "ukt"]
+
+def write_artifacts(models_dir, labels=LABELS, fingerprint="fp1", runtime_digest=None, runtime_fingerprint=None):
+    os.makedirs(os.path.join(models_dir, "intent_runtime"), exist_ok=True)
+    model_path = os.path.join(models_dir, "chatbot_model.h5")
+    with open(model_path, "wb") as f:
+        f.write(b"h5-" + fingerprint.encode())
+    with open(os.path.join(models_dir, "training_manifest.json"), "w") as f:
+        json.dump({"format_version": MANIFEST_FORMAT_VERSION, "fingerprint": fingerprint, "classes": list(labels)}, f)
+    meta = {
+        "labels": list(labels),
+        "model_digest": runtime_digest or model_file_digest(model_path),
+        "fingerprint": runtime_fingerprint or fingerprint,
+    }
+    with open(os.path.join(models_dir, "intent_runtime", "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+@pytest.fixture
+def registry(tmp_path):
+    models_dir = str(tmp_path / "models")
+    registry = ModelRegistry(models_dir)
+    for version in ("v1", "v2"):
+        os.makedirs(os.path.join(registry.root, version))
+    return registry
+
+def read_active(registry):
+    with open(os.path.join(registry.root, "ACTIVE.json")) as f:
+        return json.load(f)
+
+def test_without_active_file_legacy_is_active(registry):
+    assert registry.active() == LEGACY_VERSION
+    assert registry.history() == []
+    assert registry.version_dir(LEGACY_VERSION) == registry.models_dir
+
+def test_activate_records_history_including_legacy(registry):
+    registry.activate("v1")
+    assert registry.active() == "v1"
+    assert registry.history() == [LEGACY_VERSION]
+    registry.activate("v2")
+    assert registry.history() == ["v1", LEGACY_VERSION]
+
+def test_rollback_pops_history(registry):
+    registry.activate("v1")
+    registry.activate("v2")
+    registry.activate("v1", rollback=True)
+    assert registry.active() == "v1"
+    assert registry.history() == [LEGACY_VERSION]
+    registry.activate(LEGACY_VERSION, rollback=True)
+    assert registry.active() == LEGACY_VERSION
+    assert registry.history() == []
+
+def test_activate_legacy_is_persisted_as_null(registry):
+    registry.activate("v1")
+    registry.activate(LEGACY_VERSION)
+    assert read_active(registry)["version"] is None
+    assert registry.active() == LEGACY_VERSION
+    assert registry.history() == ["v1"]
+
+def test_history_drops_deleted_versions(registry):
+    registry.activate("v1")
+    registry.activate("v2")
+    os.rmdir(os.path.join(registry.root, "v1"))
+    assert registry.history() == [LEGACY_VERSION]
+    with pytest.raises(KeyError):
+        registry.version_dir("v1")
+
+def test_publish_copies_artifacts(tmp_path, registry):
+    src = str(tmp_path / "train")
+    write_artifacts(src)
+    data = tmp_path / "intents.json"
+    data.write_text('{"intents": []}')
+    version = registry.publish(src, str(data), version="v3")
+    target = registry.version_dir(version)
+    assert sorted(os.listdir(target)) == ["chatbot_model.h5", "intent_runtime", "intents.json", "training_manifest.json"]
+    assert registry.versions() == ["v1", "v2", "v3"]
+    with pytest.raises(FileExistsError):
+        registry.publish(src, str(data), version="v3")
+
+@pytest.mark.parametrize("kwargs", [
+    {"runtime_digest": "stale"},
+    {"runtime_fingerprint": "fp0"},
+])
+def test_publish_refuses_stale_runtime(tmp_path, registry, kwargs):
+    src = str(tmp_path / "train")
+    write_artifacts(src, **kwargs)
+    data = tmp_path / "intents.json"
+    data.write_text('{"intents": []}')
+    with pytest.raises(ValueError):
+        registry.publish(src, str(data), version="v3")
+    assert registry.versions() == ["v1", "v2"]
+    assert not [n for n in os.listdir(registry.root) if n.startswith(".")]
+
+def test_publish_refuses_runtime_with_other_labels(tmp_path, registry):
+    src = str(tmp_path / "train")
+    write_artifacts(src)
+    with open(os.path.join(src, "training_manifest.json"), "w") as f:
+        json.dump({"format_version": MANIFEST_FORMAT_VERSION, "fingerprint": "fp1", "classes": LABELS + ["wisuda"]}, f)
+    data = tmp_path / "intents.json"
+    data.write_text('{"intents": []}')
+    with pytest.raises(ValueError):
+        registry.publish(src, str(data), version="v3")
+
+class FakeClassifier:
+    # Satu token = satu label; cukup untuk validate_bundle tanpa TensorFlow.
+    def __init__(self, labels):
+        self.labels = list(labels)
+
+    def encode(self, texts):
+        return np.array([[self.labels.index(t) if t in self.labels else 0] for t in texts])
+
+    def predict_proba(self, padded):
+        probs = np.zeros((len(padded), len(self.labels)))
+        probs[np.arange(len(padded)), padded[:, 0]] = 1.0
+        return probs
+
+    def decode(self, index):
+        return self.labels[index]
+
+class FakeAgent:
+    def __init__(self, bundle):
+        self.bundle = bundle
+
+    def swap_bundle(self, bundle):
+        previous, self.bundle = self.bundle, bundle
+        return previous
+
+def make_reloader(registry, broken=()):
+    def load_bundle(version):
+        if version in broken:
+            raise OSError(f"artefak {version} rusak")
+        return IntentBundle(FakeClassifier(LABELS), {}, version=version)
+    agent = FakeAgent(load_bundle(registry.active()))
+    reloader = ModelReloader(agent, registry, load_bundle, lambda version: (list(LABELS), list(LABELS)), logging.getLogger("test"), drain_s=0)
+    return agent, reloader
+
+def test_reload_and_rollback_through_legacy(registry):
+    agent, reloader = make_reloader(registry)
+    reloader.reload("v1", wait=True)
+    assert agent.bundle.version == "v1"
+    assert registry.active() == "v1"
+    reloader.reload(LEGACY_VERSION, wait=True)
+    assert agent.bundle.version == LEGACY_VERSION
+    assert registry.active() == LEGACY_VERSION
+    assert reloader.last_result["ok"]
+    reloader.rollback(wait=True)
+    assert agent.bundle.version == "v1"
+    assert registry.active() == "v1"
+    # Rollback mengambil dari riwayat, tidak menambah: riwayat habis setelah kembali ke v1.
+    assert registry.history() == []
+    with pytest.raises(LookupError):
+        reloader.rollback()
+
+def test_rollback_to_legacy_after_first_activation(registry):
+    agent, reloader = make_reloader(registry)
+    reloader.reload("v1", wait=True)
+    reloader.rollback(wait=True)
+    assert reloader.last_result["ok"]
+    assert agent.bundle.version == LEGACY_VERSION
+    assert registry.active() == LEGACY_VERSION
+
+def test_failed_reload_keeps_active_version(registry):
+    agent, reloader = make_reloader(registry, broken=("v2",))
+    reloader.reload("v1", wait=True)
+    reloader.reload("v2", wait=True)
+    assert agent.bundle.version == "v1"
+    assert registry.active() == "v1"
+    assert not reloader.last_result["ok"]
+    assert "rusak" in reloader.last_result["error"]
+
+def test_reload_unknown_version(registry):
+    _, reloader = make_reloader(registry)
+    with pytest.raises(KeyError):
+        reloader.reload("v9")
@@ -0,0 +1,42 @@
+from utils.metrics import REGISTRY
+from utils.preprocessing_cache import CachedPreprocessor, LRUCache
+
+class UpperStemmer:
+    def __init__(self):
+        self.calls = 0
+
+    def stem(self, word):
+        self.calls += 1
+        return word.upper()
+
+def count(stage):
+    return REGISTRY.stage(stage).snapshot()["count"]
+
+def test_lru_cache_evicts_oldest():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["hits"] == 2
+
+def test_process_caches_words_and_utterances():
+    stemmer = UpperStemmer()
+    pre = CachedPreprocessor(stemmer, normalize_fn=str.lower)
+    assert pre.process("Jadwal Kuliah") == "JADWAL KULIAH"
+    assert pre.process("jadwal kuliah") == "JADWAL KULIAH"
+    assert pre.process("jadwal ujian") == "JADWAL UJIAN"
+    assert stemmer.calls == 3
+
+def test_warm_start_keeps_request_histograms():
+    pre = CachedPreprocessor(UpperStemmer(), normalize_fn=str.lower)
+    pre.process("halo")
+    before = count("normalize"), count("stem"), count("preprocess_warmup")
+    assert before[0] >= 1
+    assert pre.warm_start(["jadwal kuliah", "biaya ukt"]) == 3
+    assert (count("normalize"), count("stem")) == before[:2]
+    assert count("preprocess_warmup") == before[2] + 1
+    # Statistik LRU instance ini direset; warmup tidak terhitung sebagai hit/miss.
+    assert pre.stats()["utterances"]["misses"] == 0
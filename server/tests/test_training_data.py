@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+from utils.training_data import diff_corpus, extend_label_encoder, pattern_digest
+
+def make_corpus(pairs):
+    sentences = [s for s, _ in pairs]
+    tags = [t for _, t in pairs]
+    return SimpleNamespace(sentences=sentences, tags=tags, intent_tags=list(dict.fromkeys(tags)))
+
+def make_manifest(pairs):
+    patterns = {}
+    for sentence, tag in pairs:
+        patterns.setdefault(tag, []).append(pattern_digest(sentence))
+    return {"classes": list(dict.fromkeys(t for _, t in pairs)), "patterns": patterns}
+
+def test_diff_corpus_detects_new_patterns_and_tags():
+    old = [("jadwal krs", "krs"), ("kapan krs", "krs"), ("biaya ukt", "ukt")]
+    new = old + [("krs online", "krs"), ("lokasi perpus", "perpus")]
+    diff = diff_corpus(make_manifest(old), make_corpus(new))
+    assert diff["kept"] == [0, 1, 2]
+    assert diff["new"] == [3, 4]
+    assert diff["new_tags"] == ["perpus"]
+    assert diff["removed_tags"] == []
+    assert diff["removed_patterns"] == 0
+
+def test_diff_corpus_counts_removed_and_moved_patterns():
+    old = [("jadwal krs", "krs"), ("kapan krs", "krs"), ("biaya ukt", "ukt")]
+    # "kapan krs" pindah intent: dianggap pola baru di intent tujuan dan hilang dari intent lama.
+    new = [("jadwal krs", "krs"), ("kapan krs", "jadwal")]
+    diff = diff_corpus(make_manifest(old), make_corpus(new))
+    assert diff["kept"] == [0]
+    assert diff["new"] == [1]
+    assert diff["removed_tags"] == ["ukt"]
+    assert diff["removed_patterns"] == 2
+
+def test_extend_label_encoder_appends_without_shifting():
+    encoder = LabelEncoder().fit(["krs", "ukt", "wisuda"])
+    before = encoder.transform(["krs", "ukt", "wisuda"]).tolist()
+    added = extend_label_encoder(encoder, ["ukt", "beasiswa", "krs", "beasiswa", "akademik"])
+    assert added == ["beasiswa", "akademik"]
+    assert encoder.classes_.dtype == object
+    assert encoder.transform(["krs", "ukt", "wisuda"]).tolist() == before
+    assert encoder.transform(["beasiswa", "akademik"]).tolist() == [3, 4]
+    assert encoder.inverse_transform(np.array([4])).tolist() == ["akademik"]
+
+def test_extend_label_encoder_is_idempotent():
+    encoder = LabelEncoder().fit(["krs", "ukt"])
+    extend_label_encoder(encoder, ["baru"])
+    assert extend_label_encoder(encoder, ["krs", "baru"]) == []
+    assert encoder.classes_.tolist() == ["krs", "ukt", "baru"]
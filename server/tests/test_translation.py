@@ -0,0 +1,40 @@
+from utils.translation import CachedTranslator, OfflineTranslationBackend, TranslationCache
+
+class JapaneseBackend(OfflineTranslationBackend):
+    separator = ""
+
+class FailingBackend(JapaneseBackend):
+    def translate_many(self, texts):
+        self.calls += 1
+        raise RuntimeError("backend mati")
+
+class ShortBackend(JapaneseBackend):
+    def translate_many(self, texts):
+        self.calls += 1
+        return texts[:-1]
+
+def test_failure_returns_original_text_and_caches_nothing(tmp_path):
+    cache = TranslationCache(str(tmp_path / "tr.sqlite3"))
+    translator = CachedTranslator(FailingBackend(), cache=cache, prefilter=str.upper)
+    text = "Halo semua. Apa kabar?"
+    assert translator.translate(text) == text
+    assert translator.translate_many([text, "Satu. Dua."]) == [text, "Satu. Dua."]
+    assert translator.failures == 2
+    assert translator.segments_translated == 0
+    assert len(cache) == 0
+
+def test_partial_translation_keeps_original_text():
+    backend = ShortBackend(mapping={"Satu.": "一。"})
+    translator = CachedTranslator(backend)
+    assert translator.translate("Satu. Dua.") == "Satu. Dua."
+    assert translator.failures == 1
+
+def test_recovers_after_backend_comes_back(tmp_path):
+    cache = TranslationCache(str(tmp_path / "tr.sqlite3"))
+    translator = CachedTranslator(FailingBackend(), cache=cache)
+    assert translator.translate("Halo.") == "Halo."
+    translator.backend = JapaneseBackend(mapping={"Halo.": "こんにちは。"})
+    assert translator.translate("Halo. Halo.") == "こんにちは。こんにちは。"
+    assert translator.segments_translated == 1
+    assert translator.translate("Halo.") == "こんにちは。"
+    assert translator.segments_cached == 1
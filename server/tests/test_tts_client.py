@@ -0,0 +1,175 @@
+import asyncio
+import threading
+import pytest
+from bench.fake_tts_server import make_server
+from utils.tts_client import CircuitBreaker, StyleBertClient, TTSDispatcher, TTSReplica, TTSRequestError, create_tts_dispatcher
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FakeClient:
+    # Pengganti StyleBertClient: urutan hasil per panggilan (bytes, None = gagal, atau exception).
+    def __init__(self, outcomes, breaker=None):
+        self.outcomes = list(outcomes)
+        self.breaker = breaker or CircuitBreaker()
+        self.calls = []
+
+    def _next(self, params):
+        self.calls.append(params)
+        outcome = self.outcomes.pop(0) if self.outcomes else None
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def synthesize(self, params):
+        return self._next(params)
+
+    async def asynthesize(self, params):
+        return self._next(params)
+
+    def stats(self):
+        return {}
+
+def make_dispatcher(*clients, model_ids=None):
+    model_ids = model_ids or [None] * len(clients)
+    replicas = [TTSReplica(c, model_id=m) for c, m in zip(clients, model_ids)]
+    return TTSDispatcher(replicas, acquire_timeout=0.2, health_interval=0)
+
+def test_breaker_opens_after_threshold_and_half_opens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    # Setengah terbuka: hanya satu probe.
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.trips == 1
+
+def test_breaker_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 5
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.trips == 2
+    assert not breaker.allow()
+
+def test_dispatcher_fails_over_to_next_replica():
+    bad, good = FakeClient([None]), FakeClient([b"wav"])
+    dispatcher = make_dispatcher(bad, good)
+    # Replika pertama dibuat penuh dulu agar urutan pilihan deterministik.
+    dispatcher.replicas[1].in_flight = 1
+    assert dispatcher.synthesize({"text": "halo"}) == b"wav"
+    assert dispatcher.failovers == 1
+    assert len(bad.calls) == len(good.calls) == 1
+    assert dispatcher.replicas[0].in_flight == 0
+    assert dispatcher.replicas[1].served == 1
+
+def test_dispatcher_returns_none_when_all_replicas_fail():
+    dispatcher = make_dispatcher(FakeClient([None]), FakeClient([None]))
+    assert dispatcher.synthesize({"text": "halo"}) is None
+    assert dispatcher.failovers == 2
+    assert all(r.in_flight == 0 for r in dispatcher.replicas)
+
+def test_dispatcher_does_not_fail_over_on_client_error():
+    first, second = FakeClient([TTSRequestError(422)]), FakeClient([b"wav"])
+    dispatcher = make_dispatcher(first, second)
+    dispatcher.replicas[1].in_flight = 1
+    assert dispatcher.synthesize({"text": ""}) is None
+    assert second.calls == []
+    assert dispatcher.failovers == 0
+    assert dispatcher.client_errors == 1
+    assert dispatcher.replicas[0].in_flight == 0
+
+def test_dispatcher_skips_open_breaker_and_passes_model_id():
+    clock = FakeClock()
+    tripped = CircuitBreaker(failure_threshold=1, reset_timeout=60, clock=clock)
+    tripped.record_failure()
+    down, up = FakeClient([b"x"], breaker=tripped), FakeClient([b"wav"])
+    dispatcher = make_dispatcher(down, up, model_ids=[None, 3])
+    assert dispatcher.synthesize({"text": "halo"}) == b"wav"
+    assert down.calls == []
+    assert up.calls == [{"text": "halo", "model_id": 3}]
+
+def test_async_dispatcher_fails_over():
+    bad, good = FakeClient([None]), FakeClient([b"wav"])
+    dispatcher = make_dispatcher(bad, good)
+    dispatcher.replicas[1].in_flight = 1
+    assert asyncio.run(dispatcher.asynthesize({"text": "halo"})) == b"wav"
+    assert dispatcher.failovers == 1
+
+def test_factory_applies_default_model_id():
+    dispatcher = create_tts_dispatcher("http://a/voice,http://b/voice|0", model_id=0, health_interval=0)
+    assert [r.model_id for r in dispatcher.replicas] == [0, 0]
+    assert dispatcher.model_id == 0
+    dispatcher = create_tts_dispatcher("http://a/voice|2,http://b/voice|2", model_id=0, health_interval=0)
+    assert dispatcher.model_id == 2
+
+def test_factory_rejects_mixed_model_ids():
+    with pytest.raises(ValueError):
+        create_tts_dispatcher("http://a/voice,http://b/voice|1", model_id=0, health_interval=0)
+    with pytest.raises(ValueError):
+        create_tts_dispatcher("http://a/voice|1,http://b/voice|2", health_interval=0)
+
+def test_dispatcher_requires_replicas():
+    with pytest.raises(ValueError):
+        TTSDispatcher([], health_interval=0)
+
+@pytest.fixture
+def fake_tts():
+    servers = []
+    def start(**kwargs):
+        server = make_server(port=0, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        host, port = server.server_address
+        return f"http://{host}:{port}/voice"
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def test_client_error_does_not_switch_method(fake_tts):
+    client = StyleBertClient(fake_tts(), retries=1)
+    with pytest.raises(TTSRequestError) as e:
+        client.synthesize({"text": ""})
+    assert e.value.status_code == 422
+    assert client.method == "auto"
+    assert client.counts["retried"] == 0
+    assert client.synthesize({"text": "halo"})[:4] == b"RIFF"
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+def test_client_falls_back_to_get_on_405(fake_tts):
+    client = StyleBertClient(fake_tts(get_only=True), retries=0)
+    assert client.synthesize({"text": "halo"})[:4] == b"RIFF"
+    assert client.method == "get"
+
+def test_async_client_matches_sync_behaviour(fake_tts):
+    url = fake_tts(get_only=True)
+    async def run():
+        client = StyleBertClient(url, retries=0)
+        try:
+            audio = await client.asynthesize({"text": "halo"})
+            with pytest.raises(TTSRequestError):
+                await client.asynthesize({"text": ""})
+            return audio, client.method, dict(client.counts)
+        finally:
+            await client.aclose()
+    audio, method, counts = asyncio.run(run())
+    assert audio[:4] == b"RIFF"
+    assert method == "get"
+    assert counts["ok"] == 1 and counts["client_error"] == 1
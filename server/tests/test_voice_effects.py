@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from utils.voice_effects import SPEAK_STAGES, TTS_STAGES, VoiceEffectsChain
+
+def tone(n, sr=22050):
+    t = np.arange(n) / sr
+    return (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+@pytest.mark.parametrize("sr", [16000, 22050, 44100])
+def test_filters_valid_at_common_sample_rates(sr):
+    out = VoiceEffectsChain(sr).run(tone(sr // 2, sr), SPEAK_STAGES)
+    assert out.dtype == np.float32
+    assert np.all(np.isfinite(out))
+
+@pytest.mark.parametrize("n", [0, 1, 5, 20])
+def test_very_short_audio_keeps_all_stages(n):
+    timings = {}
+    out = VoiceEffectsChain(22050).run(tone(n), TTS_STAGES, timings=timings)
+    assert len(out) == n
+    assert set(timings) == set(TTS_STAGES)
+
+def test_humble_short_audio_gets_gain_only():
+    audio = tone(10)
+    out = VoiceEffectsChain(22050).apply("humble", audio)
+    assert np.allclose(out, audio * 0.88)
+
+def test_failing_stage_is_skipped():
+    chain = VoiceEffectsChain(22050)
+    reference = chain.run(tone(4000), ("formant", "warmth"))
+    chain._stages["formant"] = lambda audio: 1 / 0
+    out = chain.run(tone(4000), ("formant", "warmth"))
+    assert len(out) == 4000
+    assert np.allclose(out, VoiceEffectsChain(22050).run(tone(4000), ("warmth",)))
+    assert not np.allclose(out, reference)
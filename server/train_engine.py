@@ -1,118 +1,428 @@
+import os
+import csv
 import json
+import math
+import time
+import shutil
+import random
+import argparse
 import numpy as np
 import pickle
 import tensorflow as tf
-import matplotlib.pyplot as plt
 from tensorflow.keras.models import Model
 from tensorflow.keras.layers import Input, Dense, Embedding, LSTM, SpatialDropout1D, Bidirectional, Dropout, GlobalMaxPooling1D, GlobalAveragePooling1D, concatenate
-from tensorflow.keras.preprocessing.text import Tokenizer
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
-from tensorflow.keras.regularizers import l2
-from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split 
-from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
-from utils.text_preprocessing import text_normalize
+from tensorflow.keras.callbacks import BackupAndRestore, Callback, CSVLogger, EarlyStopping, ReduceLROnPlateau
+from tensorflow.keras.optimizers import Adam
+from tensorflow.keras.optimizers.schedules import CosineDecay
+from sklearn.model_selection import train_test_split
+from utils.intent_classifier import load_keras_classifier
+from utils.training_data import (
+    MANIFEST_NAME, build_manifest, diff_corpus, encode_sentences, extend_label_encoder, extend_tokenizer,
+    load_manifest, load_training_corpus, write_manifest
+)
 
 VOCAB_SIZE = 8000
 EMBEDDING_DIM = 128
 MAX_LEN = 30
-EPOCHS = 300     
+EPOCHS = 300
 BATCH_SIZE = 32
+BASE_LR = 1e-3
+WARMUP_EPOCHS = 2
+SEED = 42
+INCREMENTAL_EPOCHS = 8
+INCREMENTAL_LR = 5e-4
+REPLAY_PER_INTENT = 32
+VALIDATION_SPLIT = 0.2
 
-with open('data/intents.json') as file:
-    data = json.load(file)
-
-factory = StemmerFactory()
-stemmer = factory.create_stemmer()
-
-training_sentences = []
-training_labels = []
-labels = []
-
-for intent in data['intents']:
-    for pattern in intent['patterns']:
-        clean_pattern = text_normalize(pattern)
-        clean_pattern = stemmer.stem(clean_pattern)
-        training_sentences.append(clean_pattern)
-        training_labels.append(intent['tag'])
-    if intent['tag'] not in labels:
-        labels.append(intent['tag'])
-
-lbl_encoder = LabelEncoder()
-lbl_encoder.fit(training_labels)
-training_labels_encoded = lbl_encoder.transform(training_labels)
-
-tokenizer = Tokenizer(num_words=VOCAB_SIZE, oov_token="<OOV>")
-tokenizer.fit_on_texts(training_sentences)
-sequences = tokenizer.texts_to_sequences(training_sentences)
-padded_sequences = pad_sequences(sequences, truncating='post', maxlen=MAX_LEN)
-
-input_train, input_val, label_train, label_val = train_test_split(
-    padded_sequences, 
-    training_labels_encoded, 
-    test_size=0.2, 
-    random_state=42, 
-    stratify=training_labels_encoded 
-)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'intents.json')
+MODEL_DIR = os.path.join(BASE_DIR, 'models')
+CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'training')
+CHECKPOINT_DIR = os.path.join(BASE_DIR, 'cache', 'checkpoints')
+METRICS_DIR = os.path.join(BASE_DIR, 'logs', 'training')
 
-input_layer = Input(shape=(MAX_LEN,))
-x = Embedding(VOCAB_SIZE, EMBEDDING_DIM)(input_layer)
-x = SpatialDropout1D(0.4)(x)
-x = Bidirectional(LSTM(64, return_sequences=True))(x)
+class EpochTimer(Callback):
+    def on_epoch_begin(self, epoch, logs=None):
+        self._started = time.perf_counter()
 
-avg_pool = GlobalAveragePooling1D()(x)
-max_pool = GlobalMaxPooling1D()(x)
-merged = concatenate([avg_pool, max_pool])
+    def on_epoch_end(self, epoch, logs=None):
+        if logs is not None:
+            logs['epoch_time'] = time.perf_counter() - self._started
 
-x = Dense(128, activation='relu')(merged)
-x = Dropout(0.5)(x)
-output_layer = Dense(len(labels), activation='softmax')(x)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Latih model intent dari intents.json.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="Proses untuk normalisasi + stemming (default: jumlah CPU).")
+    parser.add_argument("--no-cache", action="store_true", help="Abaikan cache korpus hasil preprocessing.")
+    parser.add_argument("--epochs", type=int, default=None, help=f"Default: {EPOCHS} (penuh) / {INCREMENTAL_EPOCHS} (--incremental).")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--lr", type=float, default=None, help="Learning rate puncak (default: 1e-3 diskalakan akar rasio batch / 32).")
+    parser.add_argument("--lr-schedule", choices=("plateau", "cosine"), default="plateau", help="plateau = ReduceLROnPlateau (perilaku lama); cosine = warmup + cosine decay.")
+    parser.add_argument("--jit", action="store_true", help="Kompilasi langkah latih dengan XLA (jit_compile).")
+    parser.add_argument("--steps-per-execution", type=int, default=1, help="Jumlah batch per pemanggilan fungsi latih (mengurangi overhead Python).")
+    parser.add_argument("--patience", type=int, default=15, help="Early stopping pada val_loss.")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR, help="Checkpoint per epoch; run yang terputus dilanjutkan otomatis.")
+    parser.add_argument("--no-checkpoint", action="store_true")
+    parser.add_argument("--fresh", action="store_true", help="Buang checkpoint lama dan mulai dari epoch 0.")
+    parser.add_argument("--metrics-dir", default=METRICS_DIR)
+    parser.add_argument("--plot", action="store_true", help="Simpan grafik akurasi/loss ke PNG (tanpa jendela).")
+    parser.add_argument("--output-dir", default=MODEL_DIR)
+    parser.add_argument("--incremental", action="store_true", help="Fine-tune model di --output-dir hanya dengan pola baru + sampel replay.")
+    parser.add_argument("--replay-per-intent", type=int, default=REPLAY_PER_INTENT, help="Pola lama per intent yang ikut diputar ulang saat --incremental.")
+    return parser.parse_args(argv)
 
-model = Model(inputs=input_layer, outputs=output_layer)
-model.compile(loss='sparse_categorical_crossentropy', optimizer='adam', metrics=['accuracy'])
+def make_dataset(inputs, labels, batch_size, training=False, seed=SEED):
+    ds = tf.data.Dataset.from_tensor_slices((inputs, labels)).cache()
+    if training:
+        ds = ds.shuffle(len(inputs), seed=seed, reshuffle_each_iteration=True)
+    return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
 
-early_stop = EarlyStopping(monitor='val_loss', patience=15, restore_best_weights=True, verbose=1)
-reduce_lr = ReduceLROnPlateau(monitor='val_loss', factor=0.2, patience=5, min_lr=1e-6, verbose=1)
+def build_model(num_classes):
+    input_layer = Input(shape=(MAX_LEN,))
+    x = Embedding(VOCAB_SIZE, EMBEDDING_DIM)(input_layer)
+    x = SpatialDropout1D(0.4)(x)
+    x = Bidirectional(LSTM(64, return_sequences=True))(x)
 
-history = model.fit(
-    input_train, label_train, 
-    epochs=EPOCHS, 
-    batch_size=BATCH_SIZE,
-    validation_data=(input_val, label_val), 
-    callbacks=[early_stop, reduce_lr],
-    verbose=1
-)
+    avg_pool = GlobalAveragePooling1D()(x)
+    max_pool = GlobalMaxPooling1D()(x)
+    merged = concatenate([avg_pool, max_pool])
+
+    x = Dense(128, activation='relu')(merged)
+    x = Dropout(0.5)(x)
+    output_layer = Dense(num_classes, activation='softmax')(x)
+    return Model(inputs=input_layer, outputs=output_layer)
+
+def build_optimizer(args, steps_per_epoch):
+    # Batch besar -> LR dinaikkan (akar rasio batch); cosine butuh warmup agar awal latih stabil.
+    peak_lr = args.lr or BASE_LR * math.sqrt(args.batch_size / BATCH_SIZE)
+    if args.lr_schedule == "plateau":
+        return Adam(learning_rate=peak_lr), peak_lr
+    warmup_steps = min(WARMUP_EPOCHS, max(args.epochs - 1, 0)) * steps_per_epoch
+    schedule = CosineDecay(
+        initial_learning_rate=peak_lr * 0.1,
+        decay_steps=max(args.epochs * steps_per_epoch - warmup_steps, 1),
+        alpha=0.01,
+        warmup_target=peak_lr,
+        warmup_steps=warmup_steps,
+    )
+    return Adam(learning_rate=schedule), peak_lr
+
+def build_callbacks(args, fingerprint):
+    callbacks = [EpochTimer()]
+    resumed = False
+    if not args.no_checkpoint:
+        # Checkpoint dipisah per fingerprint korpus: vocab/label beda -> bentuk model beda.
+        backup_dir = os.path.join(args.checkpoint_dir, fingerprint)
+        if args.fresh:
+            shutil.rmtree(backup_dir, ignore_errors=True)
+        resumed = os.path.isdir(backup_dir) and bool(os.listdir(backup_dir))
+        callbacks.append(BackupAndRestore(backup_dir))
+    callbacks.append(EarlyStopping(monitor='val_loss', patience=args.patience, restore_best_weights=True, verbose=1))
+    if args.lr_schedule == "plateau":
+        callbacks.append(ReduceLROnPlateau(monitor='val_loss', factor=0.2, patience=5, min_lr=1e-6, verbose=1))
+    os.makedirs(args.metrics_dir, exist_ok=True)
+    callbacks.append(CSVLogger(os.path.join(args.metrics_dir, 'history.csv'), append=resumed))
+    return callbacks, resumed
+
+def read_history_csv(path):
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    history = {}
+    for row in rows:
+        for key, value in row.items():
+            if key != 'epoch':
+                history.setdefault(key, []).append(float(value))
+    return history
+
+def write_summary(args, corpus, history, train_size, val_size, peak_lr, train_seconds, resumed, extra=None):
+    val_loss = history.get('val_loss') or [float('nan')]
+    best = int(np.nanargmin(val_loss))
+    epoch_times = history.get('epoch_time', [])
+    summary = {
+        "data": os.path.abspath(args.data),
+        "fingerprint": corpus.fingerprint,
+        "classes": len(corpus.intent_tags),
+        "train_samples": train_size,
+        "val_samples": val_size,
+        "config": {
+            "mode": "incremental" if args.incremental else "full",
+            "epochs": args.epochs,
+            "batch_size": args.batch_size,
+            "lr_schedule": args.lr_schedule,
+            "peak_lr": peak_lr,
+            "jit_compile": args.jit,
+            "steps_per_execution": args.steps_per_execution,
+            "seed": args.seed,
+        },
+        "resumed": resumed,
+        "epochs_run": len(val_loss),
+        "best_epoch": best + 1,
+        "best_val_loss": val_loss[best],
+        "best_val_accuracy": history.get('val_accuracy', [None] * len(val_loss))[best],
+        "train_seconds": round(train_seconds, 3),
+        "mean_epoch_seconds": round(float(np.mean(epoch_times)), 4) if epoch_times else None,
+        "train_samples_per_sec": round(train_size / float(np.median(epoch_times)), 1) if epoch_times else None,
+        **(extra or {}),
+    }
+    path = os.path.join(args.metrics_dir, 'summary.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    return summary, path
+
+def plot_history(history, path):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    epochs_range = range(len(history['accuracy']))
+    plt.figure(figsize=(12, 5))
+    plt.subplot(1, 2, 1)
+    plt.plot(epochs_range, history['accuracy'], label='Training Accuracy')
+    plt.plot(epochs_range, history['val_accuracy'], label='Validation Accuracy')
+    plt.legend(loc='lower right')
+    plt.title('Training and Validation Accuracy')
+    plt.xlabel('Epochs')
+    plt.ylabel('Accuracy')
+
+    plt.subplot(1, 2, 2)
+    plt.plot(epochs_range, history['loss'], label='Training Loss')
+    plt.plot(epochs_range, history['val_loss'], label='Validation Loss')
+    plt.legend(loc='upper right')
+    plt.title('Training and Validation Loss')
+    plt.xlabel('Epochs')
+    plt.ylabel('Loss')
+
+    plt.tight_layout()
+    plt.savefig(path)
+    plt.close()
+
+def save_artifacts(output_dir, model, tokenizer, lbl_encoder, manifest):
+    os.makedirs(output_dir, exist_ok=True)
+    model.save(os.path.join(output_dir, 'chatbot_model.h5'))
+    with open(os.path.join(output_dir, 'tokenizer.pickle'), 'wb') as handle:
+        pickle.dump(tokenizer, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(os.path.join(output_dir, 'label_encoder.pickle'), 'wb') as ecn_file:
+        pickle.dump(lbl_encoder, ecn_file, protocol=pickle.HIGHEST_PROTOCOL)
+    write_manifest(os.path.join(output_dir, MANIFEST_NAME), manifest)
+
+def grow_output_layer(old_model, num_classes):
+    model = build_model(num_classes)
+    old_layers = [l for l in old_model.layers if l.weights]
+    new_layers = [l for l in model.layers if l.weights]
+    if len(old_layers) != len(new_layers):
+        raise ValueError("Arsitektur model lama berbeda dengan build_model()")
+    for old, new in zip(old_layers[:-1], new_layers[:-1]):
+        new.set_weights(old.get_weights())
+    # Kolom kelas lama disalin apa adanya; kelas baru memakai inisialisasi segar dan bias rata-rata.
+    kernel, bias = old_layers[-1].get_weights()
+    new_kernel, new_bias = new_layers[-1].get_weights()
+    new_kernel[:, :kernel.shape[1]] = kernel
+    new_bias[:bias.shape[0]] = bias
+    new_bias[bias.shape[0]:] = bias.mean()
+    new_layers[-1].set_weights([new_kernel, new_bias])
+    return model
+
+def accuracy_on(model, padded, labels, indices, batch_size=256):
+    if not len(indices):
+        return None
+    probs = model.predict(padded[indices], batch_size=batch_size, verbose=0)
+    return round(float(np.mean(probs.argmax(axis=1) == labels[indices])), 4)
+
+def holdout_split(diff, tags, fraction=VALIDATION_SPLIT, seed=SEED):
+    # Sebagian pola baru dan pola lama (kandidat replay) per intent disisihkan sebagai validasi
+    # dan tidak ikut fine-tune; intent dengan satu pola baru tetap dilatih dengan pola itu.
+    rng = random.Random(seed)
+    split = {}
+    for key in ("new", "kept"):
+        by_tag = {}
+        for i in diff[key]:
+            by_tag.setdefault(tags[i], []).append(i)
+        train, val = [], []
+        for group in by_tag.values():
+            group = list(group)
+            rng.shuffle(group)
+            n_val = max(1, int(len(group) * fraction)) if len(group) > 1 else 0
+            val.extend(group[:n_val])
+            train.extend(group[n_val:])
+        split[key] = (sorted(train), np.asarray(sorted(val), dtype=np.int64))
+    train_diff = {**diff, "new": split["new"][0], "kept": split["kept"][0]}
+    return train_diff, split["new"][1], split["kept"][1]
+
+def replay_indices(diff, tags, per_intent, seed=SEED):
+    # Pola baru diulang sampai setara kuota replay per intent agar intent baru tidak tenggelam.
+    rng = random.Random(seed)
+    by_tag = {}
+    for i in diff["kept"]:
+        by_tag.setdefault(tags[i], []).append(i)
+    replay = [i for group in by_tag.values() for i in rng.sample(group, min(per_intent, len(group)))]
+    new_by_tag = {}
+    for i in diff["new"]:
+        new_by_tag.setdefault(tags[i], []).append(i)
+    fresh = [i for group in new_by_tag.values() for i in group * max(1, math.ceil(per_intent / len(group)))]
+    return np.asarray(replay + fresh, dtype=np.int64)
+
+def train_full(args, corpus):
+    labels = corpus.intent_tags
+    lbl_encoder = corpus.lbl_encoder
+    tokenizer = corpus.tokenizer
+    training_labels_encoded = corpus.labels
+    padded_sequences = corpus.padded
+
+    input_train, input_val, label_train, label_val = train_test_split(
+        padded_sequences,
+        training_labels_encoded,
+        test_size=0.2,
+        random_state=args.seed,
+        stratify=training_labels_encoded
+    )
+    train_ds = make_dataset(input_train, label_train, args.batch_size, training=True, seed=args.seed)
+    val_ds = make_dataset(input_val, label_val, args.batch_size)
+    steps_per_epoch = math.ceil(len(input_train) / args.batch_size)
+
+    model = build_model(len(labels))
+    optimizer, peak_lr = build_optimizer(args, steps_per_epoch)
+    model.compile(
+        loss='sparse_categorical_crossentropy',
+        optimizer=optimizer,
+        metrics=['accuracy'],
+        jit_compile=args.jit,
+        steps_per_execution=args.steps_per_execution,
+    )
+    callbacks, resumed = build_callbacks(args, corpus.fingerprint)
+    if resumed:
+        print(f"🔁 Melanjutkan dari checkpoint {corpus.fingerprint}")
+    print(f"📦 Latih {len(input_train)} / validasi {len(input_val)}, batch {args.batch_size}, LR {peak_lr:.2e} ({args.lr_schedule}), XLA {'on' if args.jit else 'off'}")
+
+    fit_started = time.perf_counter()
+    history = model.fit(
+        train_ds,
+        epochs=args.epochs,
+        validation_data=val_ds,
+        callbacks=callbacks,
+        verbose=1 if os.isatty(1) else 2
+    )
+    train_seconds = time.perf_counter() - fit_started
+
+    manifest = build_manifest(corpus, lbl_encoder.classes_, tokenizer, "full", MAX_LEN, VOCAB_SIZE)
+    save_artifacts(args.output_dir, model, tokenizer, lbl_encoder, manifest)
+
+    # CSV memuat seluruh epoch (termasuk sebelum resume); history Keras hanya sesi ini.
+    full_history = read_history_csv(os.path.join(args.metrics_dir, 'history.csv')) or history.history
+    return full_history, len(input_train), len(input_val), peak_lr, train_seconds, resumed, None
+
+def train_incremental(args, corpus, manifest):
+    diff = diff_corpus(manifest, corpus)
+    print(f"🔍 Diff vs manifest {manifest['fingerprint']}: {len(diff['new'])} pola baru, {len(diff['new_tags'])} intent baru, {diff['removed_patterns']} pola dihapus")
+    if not diff["new"]:
+        write_manifest(os.path.join(args.output_dir, MANIFEST_NAME), {**manifest, "fingerprint": corpus.fingerprint})
+        print("⏭️ Tidak ada pola baru; model tidak dilatih ulang.")
+        return None
+
+    previous = load_keras_classifier(args.output_dir, max_len=MAX_LEN)
+    tokenizer, lbl_encoder = previous.tokenizer, previous.lbl_encoder
+    lbl_encoder.classes_ = np.asarray(lbl_encoder.classes_, dtype=object)
+    added_words = extend_tokenizer(tokenizer, [corpus.sentences[i] for i in diff["new"]])
+    added_tags = extend_label_encoder(lbl_encoder, corpus.tags)
+    beyond_vocab = sum(1 for w in added_words if tokenizer.word_index[w] >= VOCAB_SIZE)
+    if beyond_vocab:
+        print(f"⚠️ {beyond_vocab} kata baru melewati VOCAB_SIZE={VOCAB_SIZE} dan dipetakan ke <OOV>; latih penuh untuk memasukkannya.")
+
+    padded = encode_sentences(tokenizer, corpus.sentences, MAX_LEN)
+    labels = lbl_encoder.transform(corpus.tags)
+    train_diff, val_new, val_kept = holdout_split(diff, corpus.tags, seed=args.seed)
+    val_idx = np.concatenate([val_new, val_kept])
+    before_kept = accuracy_on(previous.model, padded, labels, val_kept)
+
+    model = grow_output_layer(previous.model, len(lbl_encoder.classes_))
+    train_idx = replay_indices(train_diff, corpus.tags, args.replay_per_intent, seed=args.seed)
+    train_ds = make_dataset(padded[train_idx], labels[train_idx], args.batch_size, training=True, seed=args.seed)
+    val_ds = make_dataset(padded[val_idx], labels[val_idx], args.batch_size)
+    peak_lr = args.lr or INCREMENTAL_LR
+    model.compile(
+        loss='sparse_categorical_crossentropy',
+        optimizer=Adam(learning_rate=peak_lr),
+        metrics=['accuracy'],
+        jit_compile=args.jit,
+        steps_per_execution=args.steps_per_execution,
+    )
+    os.makedirs(args.metrics_dir, exist_ok=True)
+    callbacks = [
+        EpochTimer(),
+        EarlyStopping(monitor='val_loss', patience=min(args.patience, 3), restore_best_weights=True, verbose=1),
+        CSVLogger(os.path.join(args.metrics_dir, 'history.csv')),
+    ]
+    print(f"📦 Fine-tune {len(train_idx)} sampel ({len(train_diff['new'])} baru + replay) / validasi {len(val_idx)} ({len(val_new)} baru + {len(val_kept)} lama), +{len(added_words)} kata, +{len(added_tags)} intent, LR {peak_lr:.2e}")
+
+    fit_started = time.perf_counter()
+    history = model.fit(
+        train_ds,
+        epochs=args.epochs,
+        validation_data=val_ds,
+        callbacks=callbacks,
+        verbose=1 if os.isatty(1) else 2
+    )
+    train_seconds = time.perf_counter() - fit_started
+
+    after_kept = accuracy_on(model, padded, labels, val_kept)
+    after_new = accuracy_on(model, padded, labels, val_new)
+    print(f"📊 Akurasi validasi (tidak ikut fine-tune): pola lama {before_kept} -> {after_kept}, pola baru {after_new}")
+    manifest = build_manifest(corpus, lbl_encoder.classes_, tokenizer, "incremental", MAX_LEN, VOCAB_SIZE, parent=manifest["fingerprint"])
+    save_artifacts(args.output_dir, model, tokenizer, lbl_encoder, manifest)
+    extra = {
+        "incremental": {
+            "parent": manifest["parent"],
+            "new_patterns": len(diff["new"]),
+            "val_new_patterns": len(val_new),
+            "val_kept_patterns": len(val_kept),
+            "removed_patterns": diff["removed_patterns"],
+            "added_intents": added_tags,
+            "added_words": len(added_words),
+            "words_beyond_vocab": beyond_vocab,
+            "kept_accuracy_before": before_kept,
+            "kept_accuracy_after": after_kept,
+            "new_accuracy_after": after_new,
+        }
+    }
+    return history.history, len(train_idx), len(val_idx), peak_lr, train_seconds, False, extra
+
+def main(argv=None):
+    args = parse_args(argv)
+    tf.keras.utils.set_random_seed(args.seed)
+
+    started = time.perf_counter()
+    corpus = load_training_corpus(
+        args.data,
+        cache_dir=None if args.no_cache else CACHE_DIR,
+        max_len=MAX_LEN,
+        vocab_size=VOCAB_SIZE,
+        workers=args.workers,
+    )
+    source = "cache" if corpus.from_cache else "preprocessing"
+    print(f"✅ Korpus siap dari {source}: {len(corpus.sentences)} pola, {time.perf_counter() - started:.1f}s")
+
+    result = None
+    if args.incremental:
+        manifest = load_manifest(os.path.join(args.output_dir, MANIFEST_NAME))
+        if manifest is None or (manifest["max_len"], manifest["vocab_size"]) != (MAX_LEN, VOCAB_SIZE):
+            print("⚠️ Manifest training tidak ada / tidak cocok; beralih ke training penuh.")
+        elif set(manifest["classes"]) - set(corpus.intent_tags):
+            print(f"⚠️ Intent dihapus ({', '.join(sorted(set(manifest['classes']) - set(corpus.intent_tags)))}); output layer tidak bisa menyusut, beralih ke training penuh.")
+        else:
+            args.epochs = args.epochs or INCREMENTAL_EPOCHS
+            result = train_incremental(args, corpus, manifest)
+            if result is None:
+                return
+    if result is None:
+        args.incremental = False
+        args.epochs = args.epochs or EPOCHS
+        result = train_full(args, corpus)
+
+    history, train_size, val_size, peak_lr, train_seconds, resumed, extra = result
+    summary, summary_path = write_summary(args, corpus, history, train_size, val_size, peak_lr, train_seconds, resumed, extra)
+    print(f"📊 {summary['epochs_run']} epoch, val_loss terbaik {summary['best_val_loss']:.4f} (epoch {summary['best_epoch']}), {train_seconds:.1f}s -> {summary_path}")
+    if args.plot:
+        plot_history(history, os.path.join(args.metrics_dir, 'grafik_evaluasi_model.png'))
 
-model.save("models/chatbot_model.h5")
-with open('models/tokenizer.pickle', 'wb') as handle:
-    pickle.dump(tokenizer, handle, protocol=pickle.HIGHEST_PROTOCOL)
-with open('models/label_encoder.pickle', 'wb') as ecn_file:
-    pickle.dump(lbl_encoder, ecn_file, protocol=pickle.HIGHEST_PROTOCOL)
-
-acc = history.history['accuracy']
-val_acc = history.history['val_accuracy']
-loss = history.history['loss']
-val_loss = history.history['val_loss']
-epochs_range = range(len(acc))
-
-plt.figure(figsize=(12, 5))
-plt.subplot(1, 2, 1)
-plt.plot(epochs_range, acc, label='Training Accuracy')
-plt.plot(epochs_range, val_acc, label='Validation Accuracy')
-plt.legend(loc='lower right')
-plt.title('Training and Validation Accuracy')
-plt.xlabel('Epochs')
-plt.ylabel('Accuracy')
-
-plt.subplot(1, 2, 2)
-plt.plot(epochs_range, loss, label='Training Loss')
-plt.plot(epochs_range, val_loss, label='Validation Loss')
-plt.legend(loc='upper right')
-plt.title('Training and Validation Loss')
-plt.xlabel('Epochs')
-plt.ylabel('Loss')
-
-plt.tight_layout()
-plt.savefig('grafik_evaluasi_model.png')
-plt.show()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+AUDIO_CACHE_VERSION = 1
+
+def audio_cache_key(text, style, voice_params=None, dsp_flags=None):
+    # Kunci konten: teks yang sudah disanitasi + gaya + parameter suara + set efek DSP.
+    # Perubahan salah satunya (mis. efek dimatikan) otomatis menghasilkan entri baru.
+    payload = {
+        "v": AUDIO_CACHE_VERSION,
+        "text": " ".join((text or "").split()),
+        "style": style,
+        "voice": voice_params or {},
+        "dsp": dsp_flags or {},
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class MemoryAudioTier:
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_items=512):
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_items = max(0, int(max_items))
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        size = len(value)
+        if size > self.max_bytes or self.max_items == 0:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._data[key] = value
+            self._bytes += size
+            while self._data and (self._bytes > self.max_bytes or len(self._data) > self.max_items):
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def discard(self, key):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        return {"items": len(self._data), "bytes": self._bytes, "max_bytes": self.max_bytes, "max_items": self.max_items}
+
+class DiskAudioTier:
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024, suffix=".wav"):
+        self.directory = directory
+        self.max_bytes = max(0, int(max_bytes))
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._bytes = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(self.suffix):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _total_bytes(self):
+        if self._bytes is None:
+            self._bytes = sum(size for _, size, _ in self._entries())
+        return self._bytes
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            # mtime dipakai sebagai waktu akses terakhir untuk eviksi LRU.
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            try:
+                previous = os.path.getsize(path)
+            except OSError:
+                previous = 0
+            # os.replace atomik: worker lain tidak pernah membaca file setengah tertulis.
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._bytes = self._total_bytes() + len(value) - previous
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Ukuran dihitung ulang dari disk karena beberapa proses bisa berbagi direktori yang sama.
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        self._bytes = total
+
+    def discard(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            return
+        with self._lock:
+            self._bytes = None
+
+    def clear(self):
+        for path, _, _ in list(self._entries()):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self._total_bytes()
+        return {"directory": self.directory, "bytes": total, "max_bytes": self.max_bytes}
+
+class AudioCache:
+    def __init__(self, directory=None, memory_bytes=64 * 1024 * 1024, memory_items=512, disk_bytes=1024 * 1024 * 1024):
+        self.memory = MemoryAudioTier(memory_bytes, memory_items)
+        self.disk = DiskAudioTier(directory, disk_bytes) if directory else None
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            with self._lock:
+                self.hits_memory += 1
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+                with self._lock:
+                    self.hits_disk += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        if not value:
+            return
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def __contains__(self, key):
+        if self.memory.get(key) is not None:
+            return True
+        return self.disk is not None and os.path.exists(self.disk._path(key))
+
+    def discard(self, key):
+        self.memory.discard(key)
+        if self.disk is not None:
+            self.disk.discard(key)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        payload = {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_memory + self.hits_disk) / lookups, 4) if lookups else 0.0,
+            "memory": self.memory.stats(),
+        }
+        if self.disk is not None:
+            payload["disk"] = self.disk.stats()
+        return payload
+
+def create_audio_cache(directory, memory_mb=64, disk_mb=1024, memory_items=512):
+    return AudioCache(
+        directory=directory,
+        memory_bytes=int(float(memory_mb) * 1024 * 1024),
+        memory_items=memory_items,
+        disk_bytes=int(float(disk_mb) * 1024 * 1024),
+    )
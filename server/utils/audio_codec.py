@@ -0,0 +1,59 @@
+import io
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+OPUS_SAMPLE_RATE = 48000
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+AUDIO_MIMETYPES = {"wav": "audio/wav", "ogg": "audio/ogg"}
+CODECS = ("wav", "ogg", "opus")
+FORMAT_ALIASES = {"json": "json", "base64": "json", "wav": "wav", "ogg": "ogg", "opus": "ogg"}
+ACCEPT_FORMATS = {
+    "application/json": "json",
+    "audio/wav": "wav",
+    "audio/x-wav": "wav",
+    "audio/wave": "wav",
+    "audio/ogg": "ogg",
+    "audio/opus": "ogg",
+    "audio/*": "wav",
+}
+
+def _parse_accept(header):
+    ranges = []
+    for i, part in enumerate((header or "").split(",")):
+        media, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media:
+            ranges.append((-q, i, media.lower()))
+    return [media for q, _, media in sorted(ranges) if q < 0]
+
+def negotiate_audio_format(requested=None, accept=None, default="json"):
+    # `format` eksplisit menang; Accept dibaca menurut q. Tanpa preferensi (mis. */*) -> JSON lama.
+    if requested:
+        return FORMAT_ALIASES.get(str(requested).lower())
+    for media in _parse_accept(accept):
+        if media in ACCEPT_FORMATS:
+            return ACCEPT_FORMATS[media]
+    return default
+
+def encode_opus(wav_bytes):
+    audio, sample_rate = sf.read(io.BytesIO(wav_bytes), dtype="float32")
+    if sample_rate not in OPUS_RATES:
+        # Opus hanya menerima 8/12/16/24/48 kHz; keluaran DSP 44.1 kHz dinaikkan ke 48 kHz.
+        g = np.gcd(sample_rate, OPUS_SAMPLE_RATE)
+        audio = resample_poly(audio, OPUS_SAMPLE_RATE // g, sample_rate // g, axis=0).astype(np.float32)
+        sample_rate = OPUS_SAMPLE_RATE
+    buf = io.BytesIO()
+    sf.write(buf, audio, sample_rate, format="OGG", subtype="OPUS")
+    return buf.getvalue()
+
+def encode_audio(wav_bytes, codec="wav"):
+    if codec in ("ogg", "opus"):
+        return encode_opus(wav_bytes), AUDIO_MIMETYPES["ogg"]
+    return wav_bytes, AUDIO_MIMETYPES["wav"]
@@ -0,0 +1,168 @@
+import os
+import queue
+import threading
+import time
+import weakref
+import numpy as np
+from utils.metrics import Histogram, LATENCY_BUCKETS_MS, SIZE_BUCKETS
+
+def make_keras_predict_fn(model, max_len=30):
+    import tensorflow as tf
+
+    @tf.function(input_signature=[tf.TensorSpec(shape=(None, max_len), dtype=tf.int32)], reduce_retracing=True)
+    def forward(x):
+        return model(x, training=False)
+
+    def predict(batch):
+        return forward(tf.convert_to_tensor(batch, dtype=tf.int32)).numpy()
+
+    return predict
+
+class _PendingRequest:
+    __slots__ = ("inputs", "enqueued_at", "done", "result", "error")
+
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class BatchInferenceEngine:
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=2.0, name="intent-batcher"):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self.batch_size_hist = Histogram(SIZE_BUCKETS)
+        self.queue_wait_hist = Histogram(LATENCY_BUCKETS_MS)
+        self.forward_hist = Histogram(LATENCY_BUCKETS_MS)
+        self.total_requests = 0
+        self.total_batches = 0
+        self.total_errors = 0
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stopped = False
+        self._start_lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            ref = weakref.WeakMethod(self._after_fork)
+            os.register_at_fork(after_in_child=lambda: ref() and ref()())
+
+    def _after_fork(self):
+        # Thread worker tidak ikut ter-fork; worker baru dibuat saat predict pertama di proses anak.
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    def _ensure_worker(self):
+        # Dipanggil dengan _start_lock terkunci.
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+        self._thread.start()
+
+    def start(self):
+        with self._start_lock:
+            if self._stopped:
+                raise RuntimeError("Inference batcher sudah dihentikan")
+            self._ensure_worker()
+        return self
+
+    def stop(self, timeout=5.0):
+        # Sentinel masuk antrean setelah request yang sudah diterima: semuanya tetap dijawab sebelum worker keluar.
+        with self._start_lock:
+            self._stopped = True
+            self._queue.put(None)
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            self._thread = None
+
+    def predict(self, inputs, timeout=30.0):
+        req = _PendingRequest(np.asarray(inputs, dtype=np.int32))
+        with self._start_lock:
+            stopped = self._stopped
+            if not stopped:
+                # Start lazy hanya untuk engine yang belum pernah dihentikan (mis. proses anak setelah fork).
+                self._ensure_worker()
+                self._queue.put(req)
+        if stopped:
+            # Bundle lama yang sudah di-retire masih dipegang request: hitung langsung, jangan hidupkan worker baru.
+            return np.asarray(self.predict_fn(req.inputs))
+        if not req.done.wait(timeout):
+            raise TimeoutError("Inference batcher tidak merespon dalam %.1fs" % timeout)
+        if req.error is not None:
+            raise req.error
+        return req.result
+
+    def _collect(self, first):
+        batch = [first]
+        rows = len(first.inputs)
+        deadline = first.enqueued_at + self.max_wait_s
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._stop.set()
+                break
+            batch.append(item)
+            rows += len(item.inputs)
+        return batch
+
+    def _worker(self):
+        while not self._stop.is_set():
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = self._collect(first)
+            started = time.perf_counter()
+            for req in batch:
+                self.queue_wait_hist.observe((started - req.enqueued_at) * 1000.0)
+            try:
+                stacked = np.concatenate([req.inputs for req in batch], axis=0)
+                outputs = np.asarray(self.predict_fn(stacked))
+                offset = 0
+                for req in batch:
+                    n = len(req.inputs)
+                    req.result = outputs[offset:offset + n]
+                    offset += n
+            except Exception as e:
+                self.total_errors += len(batch)
+                for req in batch:
+                    req.error = e
+            self.forward_hist.observe((time.perf_counter() - started) * 1000.0)
+            self.batch_size_hist.observe(len(batch))
+            self.total_requests += len(batch)
+            self.total_batches += 1
+            for req in batch:
+                req.done.set()
+        self._fail_pending(RuntimeError("Inference batcher dihentikan"))
+
+    def _fail_pending(self, error):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item.error = error
+                item.done.set()
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "queue_depth": self._queue.qsize(),
+            "requests": self.total_requests,
+            "batches": self.total_batches,
+            "errors": self.total_errors,
+            "batch_size": self.batch_size_hist.snapshot(),
+            "queue_wait_ms": self.queue_wait_hist.snapshot(),
+            "forward_ms": self.forward_hist.snapshot(),
+        }
@@ -0,0 +1,116 @@
+import re
+from collections import namedtuple
+from types import MappingProxyType
+
+EntityMatch = namedtuple("EntityMatch", ["label", "value", "text", "start", "end", "confidence"])
+
+PRODI_MAPPING = MappingProxyType({
+    "teknik": (
+        "teknik", "informatika", "sistem informasi", "teknik industri",
+        "teknik kimia", "teknik elektro", "ti", "si", "ft"
+    ),
+    "ekonomi": (
+        "ekonomi", "akuntansi", "manajemen", "feb", "bisnis"
+    ),
+    "pendidikan": (
+        "pendidikan", "keguruan", "fkip", "pgsd", "bimbingan konseling", "bk",
+        "paud", "pgpaud", "pendidikan matematika", "pendidikan biologi",
+        "pendidikan fisika", "pendidikan sejarah", "ppkn", "pkn",
+        "pendidikan bahasa inggris", "pendidikan bahasa indonesia",
+        "ipa", "ips", "guru"
+    ),
+    "hukum": (
+        "hukum", "ilmu hukum", "fh"
+    ),
+    "kesehatan": (
+        "farmasi", "ilmu keolahragaan", "fiks", "olahraga"
+    )
+})
+
+GEDUNG_MAPPING = MappingProxyType({
+    "Graha Cendekia": ("graha cendekia", "graha"),
+    "Lab Terpadu": ("lab terpadu", "laboratorium terpadu"),
+    "Gedung Perpustakaan": ("gedung perpustakaan", "perpustakaan", "perpus"),
+    "Masjid Ulul Albab": ("masjid ulul albab", "ulul albab"),
+    "Rektorat": ("rektorat", "gedung rektorat"),
+    "Ruang TU": ("ruang tu", "tata usaha"),
+    "Poliklinik": ("poliklinik", "klinik"),
+    "Student Center": ("student center",),
+    "Gedung A": ("gedung a",),
+    "Gedung B": ("gedung b",),
+    "Gedung C": ("gedung c",),
+})
+
+KATEGORI_MAPPING = MappingProxyType({
+    "akademik": ("krs", "khs", "jadwal", "nilai", "ujian", "uts", "uas", "cuti", "kalender"),
+    "tugas_akhir": ("skripsi", "sempro", "sidang", "wisuda", "yudisium", "toefl", "kkn", "magang"),
+    "keuangan": ("ukt", "spp", "bayar", "biaya", "denda", "tagihan", "dispensasi", "beasiswa"),
+    "layanan": ("wifi", "password", "siakad", "legalisir", "surat", "kantin", "masjid"),
+})
+
+SEMESTER_PATTERN = r"(?:semester|smt|sem)\s*(?P<semester_value>\d+|ganjil|genap)"
+NIM_PATTERN = r"\b\d{9,12}\b"
+SLOT_LABELS = ("prodi", "semester", "nim", "gedung", "kategori")
+
+def _keyword_confidence(keyword, value):
+    if keyword == str(value).lower():
+        return 1.0
+    if " " in keyword:
+        return 0.9
+    if len(keyword) <= 2:
+        return 0.6
+    return 0.8
+
+class EntityExtractor:
+    def __init__(self, prodi_mapping=PRODI_MAPPING, gedung_mapping=GEDUNG_MAPPING, kategori_mapping=KATEGORI_MAPPING):
+        self._keywords = {}
+        for label, mapping in (("prodi", prodi_mapping), ("gedung", gedung_mapping), ("kategori", kategori_mapping)):
+            for priority, (value, keywords) in enumerate(mapping.items()):
+                for keyword in keywords:
+                    self._keywords.setdefault(keyword.lower(), []).append(
+                        (label, value, priority, _keyword_confidence(keyword.lower(), value))
+                    )
+        alternation = "|".join(re.escape(k) for k in sorted(self._keywords, key=len, reverse=True))
+        self._pattern = re.compile(
+            rf"(?P<semester>{SEMESTER_PATTERN})|(?P<nim>{NIM_PATTERN})|\b(?P<keyword>{alternation})\b"
+        )
+
+    def scan(self, text):
+        matches = []
+        for m in self._pattern.finditer(text.lower()):
+            kind = m.lastgroup
+            if kind == "semester":
+                value = m.group("semester_value")
+                matches.append(EntityMatch("semester", value, m.group(0), m.start(), m.end(), 1.0 if value.isdigit() else 0.9))
+            elif kind == "nim":
+                matches.append(EntityMatch("nim", m.group(0), m.group(0), m.start(), m.end(), 0.9))
+            else:
+                keyword = m.group("keyword")
+                for label, value, _, confidence in self._keywords[keyword]:
+                    matches.append(EntityMatch(label, value, keyword, m.start(), m.end(), confidence))
+        return matches
+
+    def resolve(self, matches):
+        best = {}
+        for match in matches:
+            rank = self._rank(match)
+            if match.label not in best or rank < best[match.label][0]:
+                best[match.label] = (rank, match)
+        return {label: match for label, (_, match) in best.items()}
+
+    def _rank(self, match):
+        if match.label == "prodi":
+            return (self._priority(match), match.start)
+        return (match.start,)
+
+    def _priority(self, match):
+        for label, value, priority, _ in self._keywords.get(match.text, ()):
+            if label == match.label and value == match.value:
+                return priority
+        return len(self._keywords)
+
+    def extract(self, text):
+        matches = self.scan(text)
+        return {label: match.value for label, match in self.resolve(matches).items()}, matches
+
+ENTITY_EXTRACTOR = EntityExtractor()
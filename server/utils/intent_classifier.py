@@ -0,0 +1,266 @@
+import os
+import json
+import pickle
+import hashlib
+import numpy as np
+
+RUNTIME_DIRNAME = "intent_runtime"
+RUNTIME_FORMAT_VERSION = 1
+KERAS_TOKENIZER_FILTERS = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n'
+
+def pad_sequences(sequences, maxlen, truncating='post'):
+    padded = np.zeros((len(sequences), maxlen), dtype=np.int32)
+    for i, seq in enumerate(sequences):
+        if not len(seq):
+            continue
+        trunc = seq[:maxlen] if truncating == 'post' else seq[-maxlen:]
+        padded[i, -len(trunc):] = trunc
+    return padded
+
+class SafeKerasUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if module in ("keras.src.preprocessing.text", "keras.src.legacy.preprocessing.text", "keras.preprocessing.text"):
+            module = "tensorflow.keras.preprocessing.text"
+        elif module.startswith("keras.src.legacy"):
+            module = "tensorflow.keras"
+        elif module.startswith("keras.") and not module.startswith("keras.src"):
+            module = module.replace("keras.", "tensorflow.keras.", 1)
+        return super().find_class(module, name)
+
+class CompatUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        if module.startswith("numpy._core"):
+            module = module.replace("numpy._core", "numpy.core", 1)
+        return super().find_class(module, name)
+
+class RuntimeTokenizer:
+    def __init__(self, word_index, num_words=None, oov_token=None, filters=KERAS_TOKENIZER_FILTERS, lower=True, split=' '):
+        self.word_index = word_index
+        self.num_words = num_words
+        self.oov_token = oov_token
+        self.filters = filters
+        self.lower = lower
+        self.split = split
+        self._translate = str.maketrans({c: split for c in filters})
+        self._oov_index = word_index.get(oov_token) if oov_token is not None else None
+
+    def texts_to_sequences(self, texts):
+        sequences = []
+        for text in texts:
+            if self.lower:
+                text = text.lower()
+            seq = []
+            for w in text.translate(self._translate).split(self.split):
+                if not w:
+                    continue
+                i = self.word_index.get(w)
+                if i is not None and self.num_words and i >= self.num_words:
+                    i = self._oov_index
+                elif i is None:
+                    i = self._oov_index
+                if i is not None:
+                    seq.append(i)
+            sequences.append(seq)
+        return sequences
+
+class KerasIntentClassifier:
+    backend = "keras"
+
+    def __init__(self, model, tokenizer, lbl_encoder, max_len=30):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.lbl_encoder = lbl_encoder
+        self.max_len = max_len
+        self.labels = [str(c) for c in getattr(lbl_encoder, "classes_", [])]
+        self._forward = None
+
+    def encode(self, texts):
+        return pad_sequences(self.tokenizer.texts_to_sequences(texts), maxlen=self.max_len, truncating='post')
+
+    def predict_proba(self, padded):
+        if self._forward is None:
+            from utils.batch_inference import make_keras_predict_fn
+            self._forward = make_keras_predict_fn(self.model, max_len=self.max_len)
+        return self._forward(padded)
+
+    def decode(self, index):
+        return self.lbl_encoder.inverse_transform([index])[0]
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+def _run_lstm(x_proj, recurrent_kernel, reverse=False):
+    batch, steps, _ = x_proj.shape
+    units = recurrent_kernel.shape[0]
+    h = np.zeros((batch, units), dtype=np.float32)
+    c = np.zeros((batch, units), dtype=np.float32)
+    outputs = np.empty((batch, steps, units), dtype=np.float32)
+    order = range(steps - 1, -1, -1) if reverse else range(steps)
+    for t in order:
+        z = x_proj[:, t, :] + h @ recurrent_kernel
+        i = _sigmoid(z[:, :units])
+        f = _sigmoid(z[:, units:2 * units])
+        g = np.tanh(z[:, 2 * units:3 * units])
+        o = _sigmoid(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        outputs[:, t, :] = h
+    return outputs
+
+def _softmax(x):
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+class NumpyIntentClassifier:
+    backend = "numpy"
+    WEIGHT_NAMES = (
+        "embedding",
+        "lstm_fw_kernel", "lstm_fw_recurrent_kernel", "lstm_fw_bias",
+        "lstm_bw_kernel", "lstm_bw_recurrent_kernel", "lstm_bw_bias",
+        "dense_kernel", "dense_bias",
+        "output_kernel", "output_bias",
+    )
+
+    def __init__(self, weights, tokenizer, labels, max_len=30):
+        self.weights = weights
+        self.tokenizer = tokenizer
+        self.labels = list(labels)
+        self.max_len = max_len
+
+    @classmethod
+    def load(cls, runtime_dir, mmap_mode=None):
+        with open(os.path.join(runtime_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != RUNTIME_FORMAT_VERSION:
+            raise ValueError(f"Versi format runtime tidak didukung: {meta.get('format_version')}")
+        weights = {name: np.load(os.path.join(runtime_dir, f"{name}.npy"), mmap_mode=mmap_mode) for name in cls.WEIGHT_NAMES}
+        tok = meta["tokenizer"]
+        tokenizer = RuntimeTokenizer(
+            tok["word_index"],
+            num_words=tok.get("num_words"),
+            oov_token=tok.get("oov_token"),
+            filters=tok.get("filters", KERAS_TOKENIZER_FILTERS),
+            lower=tok.get("lower", True),
+            split=tok.get("split", " "),
+        )
+        return cls(weights, tokenizer, meta["labels"], max_len=meta["max_len"])
+
+    def encode(self, texts):
+        return pad_sequences(self.tokenizer.texts_to_sequences(texts), maxlen=self.max_len, truncating='post')
+
+    def predict_proba(self, padded):
+        w = self.weights
+        x = w["embedding"][np.asarray(padded, dtype=np.int64)]
+        fw = _run_lstm(x @ w["lstm_fw_kernel"] + w["lstm_fw_bias"], w["lstm_fw_recurrent_kernel"])
+        bw = _run_lstm(x @ w["lstm_bw_kernel"] + w["lstm_bw_bias"], w["lstm_bw_recurrent_kernel"], reverse=True)
+        seq = np.concatenate([fw, bw], axis=-1)
+        merged = np.concatenate([seq.mean(axis=1), seq.max(axis=1)], axis=-1)
+        hidden = np.maximum(merged @ w["dense_kernel"] + w["dense_bias"], 0.0)
+        return _softmax(hidden @ w["output_kernel"] + w["output_bias"])
+
+    def decode(self, index):
+        return self.labels[int(index)]
+
+def _load_keras_model(model_path, vocab_size, num_labels, max_len):
+    import tensorflow as tf
+    from tensorflow.keras.models import load_model
+    tf.get_logger().setLevel("ERROR")
+    try:
+        return load_model(model_path, compile=False)
+    except Exception:
+        input_layer = tf.keras.layers.Input(shape=(max_len,), name="input_layer")
+        x = tf.keras.layers.Embedding(vocab_size, 128, name="embedding")(input_layer)
+        x = tf.keras.layers.SpatialDropout1D(0.4, name="spatial_dropout1d")(x)
+        x = tf.keras.layers.Bidirectional(tf.keras.layers.LSTM(64, return_sequences=True, name="lstm"), name="bidirectional")(x)
+        avg_pool = tf.keras.layers.GlobalAveragePooling1D(name="global_average_pooling1d")(x)
+        max_pool = tf.keras.layers.GlobalMaxPooling1D(name="global_max_pooling1d")(x)
+        merged = tf.keras.layers.Concatenate(name="concatenate")([avg_pool, max_pool])
+        x = tf.keras.layers.Dense(128, activation="relu", name="dense")(merged)
+        x = tf.keras.layers.Dropout(0.5, name="dropout")(x)
+        output_layer = tf.keras.layers.Dense(num_labels, activation="softmax", name="dense_1")(x)
+        model = tf.keras.models.Model(inputs=input_layer, outputs=output_layer)
+        model.load_weights(model_path)
+        return model
+
+def load_keras_classifier(models_dir, max_len=30):
+    model_path = os.path.join(models_dir, 'chatbot_model.h5')
+    token_path = os.path.join(models_dir, 'tokenizer.pickle')
+    label_path = os.path.join(models_dir, 'label_encoder.pickle')
+
+    with open(token_path, 'rb') as handle:
+        tokenizer = SafeKerasUnpickler(handle).load()
+    with open(label_path, 'rb') as ecn_file:
+        lbl_encoder = CompatUnpickler(ecn_file).load()
+
+    vocab_size = getattr(tokenizer, "num_words", None) or (len(getattr(tokenizer, "word_index", {})) + 1)
+    num_labels = len(getattr(lbl_encoder, "classes_", []))
+    model = _load_keras_model(model_path, vocab_size, num_labels, max_len)
+    return KerasIntentClassifier(model, tokenizer, lbl_encoder, max_len=max_len)
+
+def load_classifier(models_dir, backend="keras", max_len=30, mmap_mode=None):
+    if backend == "numpy":
+        return NumpyIntentClassifier.load(os.path.join(models_dir, RUNTIME_DIRNAME), mmap_mode=mmap_mode)
+    if backend == "keras":
+        return load_keras_classifier(models_dir, max_len=max_len)
+    raise ValueError(f"Backend intent tidak dikenal: {backend}")
+
+def model_file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:20]
+
+def export_runtime_bundle(keras_classifier, runtime_dir, model_digest=None, fingerprint=None):
+    from tensorflow.keras import layers
+    model = keras_classifier.model
+    embedding = [l for l in model.layers if isinstance(l, layers.Embedding)]
+    bidirectional = [l for l in model.layers if isinstance(l, layers.Bidirectional)]
+    dense = [l for l in model.layers if isinstance(l, layers.Dense)]
+    if len(embedding) != 1 or len(bidirectional) != 1 or len(dense) != 2:
+        raise ValueError("Arsitektur model tidak sesuai Embedding -> BiLSTM -> Pool -> Dense -> Dense")
+    bilstm = bidirectional[0]
+    for lstm in (bilstm.forward_layer, bilstm.backward_layer):
+        if lstm.activation.__name__ != "tanh" or lstm.recurrent_activation.__name__ != "sigmoid":
+            raise ValueError("Runtime NumPy hanya mendukung LSTM tanh/sigmoid")
+    if getattr(embedding[0], "mask_zero", False):
+        raise ValueError("Runtime NumPy tidak mendukung Embedding dengan mask_zero")
+
+    fw_kernel, fw_recurrent, fw_bias = bilstm.forward_layer.get_weights()
+    bw_kernel, bw_recurrent, bw_bias = bilstm.backward_layer.get_weights()
+    dense_kernel, dense_bias = dense[0].get_weights()
+    output_kernel, output_bias = dense[1].get_weights()
+    arrays = {
+        "embedding": embedding[0].get_weights()[0],
+        "lstm_fw_kernel": fw_kernel, "lstm_fw_recurrent_kernel": fw_recurrent, "lstm_fw_bias": fw_bias,
+        "lstm_bw_kernel": bw_kernel, "lstm_bw_recurrent_kernel": bw_recurrent, "lstm_bw_bias": bw_bias,
+        "dense_kernel": dense_kernel, "dense_bias": dense_bias,
+        "output_kernel": output_kernel, "output_bias": output_bias,
+    }
+
+    tokenizer = keras_classifier.tokenizer
+    meta = {
+        "format_version": RUNTIME_FORMAT_VERSION,
+        "max_len": keras_classifier.max_len,
+        "labels": keras_classifier.labels,
+        "tokenizer": {
+            "word_index": dict(tokenizer.word_index),
+            "num_words": getattr(tokenizer, "num_words", None),
+            "oov_token": getattr(tokenizer, "oov_token", None),
+            "filters": getattr(tokenizer, "filters", KERAS_TOKENIZER_FILTERS),
+            "lower": getattr(tokenizer, "lower", True),
+            "split": getattr(tokenizer, "split", " "),
+        },
+    }
+    # Asal runtime: dicek saat publish agar runtime basi tidak ikut dengan h5 baru.
+    if model_digest is not None:
+        meta["model_digest"] = model_digest
+    if fingerprint is not None:
+        meta["fingerprint"] = fingerprint
+
+    os.makedirs(runtime_dir, exist_ok=True)
+    for name in NumpyIntentClassifier.WEIGHT_NAMES:
+        np.save(os.path.join(runtime_dir, f"{name}.npy"), np.ascontiguousarray(arrays[name], dtype=np.float32))
+    with open(os.path.join(runtime_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return runtime_dir
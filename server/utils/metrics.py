@@ -0,0 +1,215 @@
+import time
+import bisect
+import threading
+from contextvars import ContextVar
+
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+STAGE_BUCKETS_MS = (0.05, 0.1, 0.25) + LATENCY_BUCKETS_MS
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._count = 0
+            self._sum = 0.0
+            self._max = 0.0
+
+    def observe(self, value):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    def percentile(self, q):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            vmax = self._max
+        return self._percentile_from(counts, total, vmax, q)
+
+    def _percentile_from(self, counts, total, vmax, q):
+        if total == 0:
+            return 0.0
+        rank = q / 100.0 * total
+        seen = 0
+        for i, c in enumerate(counts):
+            if c == 0:
+                continue
+            if seen + c >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else vmax
+                upper = min(upper, vmax)
+                frac = (rank - seen) / c
+                return lower + (upper - lower) * frac
+            seen += c
+        return vmax
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            vsum = self._sum
+            vmax = self._max
+        cumulative = {}
+        running = 0
+        for bound, c in zip(self.buckets, counts):
+            running += c
+            cumulative[bound] = running
+        return {
+            "count": total,
+            "sum": round(vsum, 4),
+            "mean": round(vsum / total, 4) if total else 0.0,
+            "max": round(vmax, 4),
+            "p50": round(self._percentile_from(counts, total, vmax, 50), 4),
+            "p95": round(self._percentile_from(counts, total, vmax, 95), 4),
+            "p99": round(self._percentile_from(counts, total, vmax, 99), 4),
+            "buckets": cumulative,
+        }
+
+class Counter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricsRegistry:
+    def __init__(self, namespace="assistant"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._help = {}
+        self._stages = {}
+
+    def _get(self, kind, name, help_text, factory, labels):
+        key = (name, _label_key(labels))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(key)
+                if metric is None:
+                    metric = self._metrics[key] = factory()
+                    self._help.setdefault(name, (kind, help_text))
+        return metric
+
+    def counter(self, name, help_text="", **labels):
+        return self._get("counter", name, help_text, Counter, labels)
+
+    def histogram(self, name, help_text="", buckets=LATENCY_BUCKETS_MS, **labels):
+        return self._get("histogram", name, help_text, lambda: Histogram(buckets), labels)
+
+    def stage(self, name):
+        # Jalur panas: satu dict lookup tanpa menyusun tuple label.
+        hist = self._stages.get(name)
+        if hist is None:
+            hist = self.histogram("stage_duration_ms", "Durasi per tahap pipeline (ms)", STAGE_BUCKETS_MS, stage=name)
+            with self._lock:
+                hist = self._stages.setdefault(name, hist)
+        return hist
+
+    def stage_snapshot(self):
+        # Disalin di bawah lock: tahap baru bisa ditambahkan thread lain selagi /stats dibaca.
+        with self._lock:
+            stages = sorted(self._stages.items())
+        snapshot = {}
+        for name, hist in stages:
+            data = hist.snapshot()
+            data.pop("buckets")
+            snapshot[name] = data
+        return snapshot
+
+    def render_prometheus(self):
+        with self._lock:
+            items = sorted(self._metrics.items(), key=lambda kv: kv[0])
+            helps = dict(self._help)
+        lines = []
+        seen = set()
+        for (name, labels), metric in items:
+            full = f"{self.namespace}_{name}"
+            kind, help_text = helps[name]
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {full} {help_text}")
+                lines.append(f"# TYPE {full} {kind}")
+            if kind == "counter":
+                lines.append(f"{full}{_format_labels(labels)} {metric.value}")
+                continue
+            data = metric.snapshot()
+            for bound, count in data["buckets"].items():
+                lines.append(f"{full}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {count}")
+            lines.append(f"{full}_bucket{_format_labels(labels + (('le', '+Inf'),))} {data['count']}")
+            lines.append(f"{full}_sum{_format_labels(labels)} {_format_value(data['sum'])}")
+            lines.append(f"{full}_count{_format_labels(labels)} {data['count']}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_request_timings = ContextVar("request_timings", default=None)
+
+def begin_request():
+    return _request_timings.set({})
+
+def end_request(token):
+    timings = _request_timings.get()
+    _request_timings.reset(token)
+    return timings or {}
+
+def request_timings():
+    return _request_timings.get() or {}
+
+def record_stage(stage, elapsed_ms):
+    REGISTRY.stage(stage).observe(elapsed_ms)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + elapsed_ms
+
+def server_timing_header(timings):
+    return ", ".join(f"{stage};dur={ms:.2f}" for stage, ms in timings.items())
+
+class timed:
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_stage(self.stage, (time.perf_counter() - self.started) * 1000.0)
+        return False
+
+class StageClock:
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        record_stage(stage, (now - self.last) * 1000.0)
+        self.last = now
+
+    def total(self, stage):
+        record_stage(stage, (time.perf_counter() - self.started) * 1000.0)
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import shutil
+import threading
+import numpy as np
+from utils.intent_classifier import RUNTIME_DIRNAME, model_file_digest
+from utils.training_data import MANIFEST_NAME, load_manifest
+
+REGISTRY_DIRNAME = "registry"
+ACTIVE_NAME = "ACTIVE.json"
+LEGACY_VERSION = "legacy"
+ARTIFACTS = ("chatbot_model.h5", "tokenizer.pickle", "label_encoder.pickle", MANIFEST_NAME, RUNTIME_DIRNAME)
+HISTORY_KEEP = 10
+
+def check_runtime_bundle(models_dir):
+    # intent_runtime/ diekspor terpisah dari training (export_model.py): pastikan bukan sisa model sebelumnya.
+    try:
+        with open(os.path.join(models_dir, RUNTIME_DIRNAME, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return
+    problems = []
+    model_path = os.path.join(models_dir, "chatbot_model.h5")
+    if os.path.exists(model_path) and meta.get("model_digest") != model_file_digest(model_path):
+        problems.append("tidak diekspor dari chatbot_model.h5 ini")
+    manifest = load_manifest(os.path.join(models_dir, MANIFEST_NAME))
+    if manifest is not None:
+        if meta.get("labels") != manifest.get("classes"):
+            problems.append("label berbeda dengan manifest training")
+        if meta.get("fingerprint") != manifest.get("fingerprint"):
+            problems.append(f"fingerprint {meta.get('fingerprint')} != manifest {manifest.get('fingerprint')}")
+    if problems:
+        raise ValueError(f"{RUNTIME_DIRNAME}/ basi ({'; '.join(problems)}); jalankan ulang python export_model.py --models-dir {models_dir}")
+
+class ModelRegistry:
+    # models/registry/<versi>/ berisi artefak lengkap + snapshot intents.json; ACTIVE.json menunjuk versi aktif.
+    def __init__(self, models_dir):
+        self.models_dir = models_dir
+        self.root = os.path.join(models_dir, REGISTRY_DIRNAME)
+        self._lock = threading.Lock()
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(n for n in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, n)) and not n.startswith("."))
+
+    def _read_active(self):
+        try:
+            with open(os.path.join(self.root, ACTIVE_NAME), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"version": None, "history": []}
+
+    def active(self):
+        version = self._read_active().get("version")
+        if version in self.versions():
+            return version
+        return LEGACY_VERSION
+
+    def history(self):
+        known = set(self.versions()) | {LEGACY_VERSION}
+        return [v for v in self._read_active().get("history", []) if v in known]
+
+    def version_dir(self, version):
+        if version == LEGACY_VERSION:
+            return self.models_dir
+        if version not in self.versions():
+            raise KeyError(f"Versi model tidak ada: {version}")
+        return os.path.join(self.root, version)
+
+    def data_path(self, version, default):
+        path = os.path.join(self.version_dir(version), "intents.json")
+        return path if os.path.exists(path) else default
+
+    def publish(self, models_dir, data_path, version=None):
+        version = version or time.strftime("%Y%m%d-%H%M%S")
+        os.makedirs(self.root, exist_ok=True)
+        final = os.path.join(self.root, version)
+        if os.path.exists(final):
+            raise FileExistsError(f"Versi model sudah ada: {version}")
+        check_runtime_bundle(models_dir)
+        # Disalin ke direktori tersembunyi dulu lalu di-rename: loader tidak pernah melihat versi setengah jadi.
+        staging = os.path.join(self.root, f".{version}.{os.getpid()}.tmp")
+        os.makedirs(staging)
+        try:
+            for name in ARTIFACTS:
+                src = os.path.join(models_dir, name)
+                if os.path.isdir(src):
+                    shutil.copytree(src, os.path.join(staging, name))
+                elif os.path.exists(src):
+                    shutil.copy2(src, os.path.join(staging, name))
+            if not os.path.exists(os.path.join(staging, "chatbot_model.h5")) and not os.path.isdir(os.path.join(staging, RUNTIME_DIRNAME)):
+                raise FileNotFoundError(f"Tidak ada artefak model di {models_dir}")
+            shutil.copy2(data_path, os.path.join(staging, "intents.json"))
+            os.rename(staging, final)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return version
+
+    def activate(self, version, rollback=False):
+        # legacy ditulis sebagai version null; tetap masuk riwayat agar bisa di-rollback.
+        with self._lock:
+            state = self._read_active()
+            current = self.active()
+            history = [v for v in state.get("history", []) if v != version]
+            if rollback:
+                history = history[1:] if history and history[0] == version else history
+            elif current != version:
+                history = [current] + [v for v in history if v != current]
+            os.makedirs(self.root, exist_ok=True)
+            path = os.path.join(self.root, ACTIVE_NAME)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": None if version == LEGACY_VERSION else version, "history": history[:HISTORY_KEEP], "activated_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, f)
+            os.replace(tmp, path)
+
+class IntentBundle:
+    # Classifier + peta respon + batcher satu versi; satu request memakai satu bundle dari encode sampai decode.
+    def __init__(self, classifier, intent_map, inference_engine=None, version=LEGACY_VERSION):
+        self.classifier = classifier
+        self.intent_map = intent_map
+        self.inference_engine = inference_engine
+        self.version = version
+        self.loaded_at = time.time()
+
+    def predict(self, padded):
+        if self.inference_engine is not None:
+            return self.inference_engine.predict(padded)
+        return self.classifier.predict_proba(padded)
+
+    def retire(self, delay_s=30.0):
+        # Request yang masih memegang bundle lama diberi waktu selesai sebelum batcher-nya dihentikan.
+        if self.inference_engine is None:
+            return
+        timer = threading.Timer(delay_s, self.inference_engine.stop)
+        timer.daemon = True
+        timer.start()
+
+def validation_samples(intent_data, preprocess, per_intent=5):
+    texts, tags = [], []
+    for intent in intent_data['intents']:
+        for pattern in intent['patterns'][:per_intent]:
+            texts.append(preprocess(pattern))
+            tags.append(intent['tag'])
+    return texts, tags
+
+def validate_bundle(bundle, texts, tags, min_accuracy=0.8, reference=None):
+    classifier = bundle.classifier
+    probe = np.asarray(bundle.predict(classifier.encode(["jadwal krs"])))
+    num_labels = len(classifier.labels)
+    if probe.shape != (1, num_labels) or not np.all(np.isfinite(probe)) or abs(float(probe.sum()) - 1.0) > 1e-3:
+        raise ValueError(f"Dummy predict tidak valid: shape {probe.shape}, label {num_labels}")
+    unknown = sorted(set(tags) - set(classifier.labels))
+    if unknown:
+        raise ValueError(f"Intent tanpa label di model: {', '.join(unknown[:5])}")
+    report = {"samples": len(texts), "labels": num_labels}
+    if not texts:
+        return report
+    padded = classifier.encode(texts)
+    predicted = [classifier.decode(i) for i in np.asarray(bundle.predict(padded)).argmax(axis=1)]
+    report["accuracy"] = round(float(np.mean([p == t for p, t in zip(predicted, tags)])), 4)
+    if reference is not None:
+        # Paritas terhadap versi aktif: seberapa sering kedua versi memilih intent yang sama.
+        ref_padded = reference.classifier.encode(texts)
+        ref_predicted = [reference.classifier.decode(i) for i in np.asarray(reference.predict(ref_padded)).argmax(axis=1)]
+        report["agreement"] = round(float(np.mean([p == r for p, r in zip(predicted, ref_predicted)])), 4)
+    if report["accuracy"] < min_accuracy:
+        raise ValueError(f"Akurasi pola {report['accuracy']:.2%} di bawah ambang {min_accuracy:.0%}")
+    return report
+
+class ModelReloader:
+    def __init__(self, agent, registry, load_bundle, samples_fn, logger, min_accuracy=0.8, min_agreement=0.0, drain_s=30.0):
+        self.agent = agent
+        self.registry = registry
+        self.load_bundle = load_bundle
+        self.samples_fn = samples_fn
+        self.logger = logger
+        self.min_accuracy = min_accuracy
+        self.min_agreement = min_agreement
+        self.drain_s = drain_s
+        self._lock = threading.Lock()
+        self._thread = None
+        self._watch_thread = None
+        self.loading = None
+        self.last_result = None
+
+    def status(self):
+        return {
+            "active": self.agent.bundle.version,
+            "loaded_at": self.agent.bundle.loaded_at,
+            "loading": self.loading,
+            "versions": self.registry.versions(),
+            "history": self.registry.history(),
+            "last_result": self.last_result,
+        }
+
+    def reload(self, version=None, wait=False, rollback=False):
+        with self._lock:
+            if self.loading is not None:
+                return False, self.status()
+            versions = self.registry.versions()
+            if version is None:
+                version = versions[-1] if versions else LEGACY_VERSION
+            elif version != LEGACY_VERSION and version not in versions:
+                raise KeyError(version)
+            self.loading = version
+            self._thread = threading.Thread(target=self._run, args=(version, rollback), name="model-reload", daemon=True)
+            self._thread.start()
+        if wait:
+            self._thread.join()
+        return True, self.status()
+
+    def rollback(self, wait=False):
+        history = self.registry.history()
+        if not history:
+            raise LookupError("Tidak ada versi sebelumnya untuk rollback")
+        return self.reload(history[0], wait=wait, rollback=True)
+
+    def _run(self, version, rollback):
+        started = time.perf_counter()
+        result = {"version": version, "rollback": rollback, "ok": False}
+        candidate = None
+        try:
+            candidate = self.load_bundle(version)
+            result["load_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+            texts, tags = self.samples_fn(version)
+            report = validate_bundle(candidate, texts, tags, self.min_accuracy, reference=self.agent.bundle)
+            if report.get("agreement", 1.0) < self.min_agreement:
+                raise ValueError(f"Paritas dengan versi aktif {report['agreement']:.2%} di bawah ambang {self.min_agreement:.0%}")
+            result["validation"] = report
+            previous = self.agent.swap_bundle(candidate)
+            if rollback or self.registry.active() != version:
+                self.registry.activate(version, rollback=rollback)
+            previous.retire(self.drain_s)
+            result.update(ok=True, previous=previous.version)
+            self.logger.info("Model intent %s aktif (sebelumnya %s): %s", version, previous.version, report)
+        except Exception as e:
+            if candidate is not None and candidate.inference_engine is not None:
+                candidate.inference_engine.stop()
+            result["error"] = str(e)
+            self.logger.error("Reload model %s gagal: %s", version, e)
+        result["total_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+        with self._lock:
+            self.last_result = result
+            self.loading = None
+
+    def watch(self, interval_s):
+        # Multi-worker: admin endpoint hanya mengenai satu worker; worker lain mengikuti ACTIVE.json.
+        if interval_s <= 0 or (self._watch_thread is not None and self._watch_thread.is_alive()):
+            return
+        def loop():
+            while True:
+                time.sleep(interval_s)
+                try:
+                    active = self.registry.active()
+                    last = self.last_result or {}
+                    failed = last.get("version") == active and not last.get("ok")
+                    if active != self.agent.bundle.version and self.loading is None and not failed:
+                        self.reload(active)
+                except Exception as e:
+                    self.logger.error("Watcher model gagal: %s", e)
+        self._watch_thread = threading.Thread(target=loop, name="model-watch", daemon=True)
+        self._watch_thread.start()
@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+from Sastrawi.Stemmer.Filter import TextNormalizer
+from utils.metrics import StageClock
+from utils.text_preprocessing import text_normalize
+
+class LRUCache:
+    def __init__(self, maxsize=4096):
+        self.maxsize = max(0, int(maxsize))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+class CachedPreprocessor:
+    def __init__(self, stemmer, normalize_fn=text_normalize, token_cache_size=8192, utterance_cache_size=2048):
+        # CachedStemmer bawaan Sastrawi menyimpan setiap kata tanpa batas; pakai stemmer dasarnya saja.
+        self.stemmer = getattr(stemmer, "delegatedStemmer", stemmer)
+        self.normalize_fn = normalize_fn
+        self.tokens = LRUCache(token_cache_size)
+        self.utterances = LRUCache(utterance_cache_size)
+
+    def stem(self, text):
+        stems = []
+        for word in TextNormalizer.normalize_text(text).split(' '):
+            stem = self.tokens.get(word)
+            if stem is None:
+                stem = self.stemmer.stem(word)
+                self.tokens.put(word, stem)
+            stems.append(stem)
+        return ' '.join(stems)
+
+    def _stem_cached(self, normalized):
+        processed = self.utterances.get(normalized)
+        if processed is None:
+            processed = self.stem(normalized)
+            self.utterances.put(normalized, processed)
+        return processed
+
+    def process(self, text):
+        clock = StageClock()
+        normalized = self.normalize_fn(text)
+        clock.lap("normalize")
+        processed = self._stem_cached(normalized)
+        clock.lap("stem")
+        return processed
+
+    def warm_start(self, texts):
+        # Warmup dicatat sebagai satu tahap sendiri agar histogram normalize/stem hanya berisi request nyata.
+        clock = StageClock()
+        for text in texts:
+            self._stem_cached(self.normalize_fn(text))
+        clock.total("preprocess_warmup")
+        self.tokens.reset_stats()
+        self.utterances.reset_stats()
+        return len(self.utterances)
+
+    def stats(self):
+        return {
+            "tokens": self.tokens.stats(),
+            "utterances": self.utterances.stats(),
+        }
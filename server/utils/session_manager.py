@@ -1,29 +1,14 @@
-import re
+from utils.entity_extractor import ENTITY_EXTRACTOR, PRODI_MAPPING, SLOT_LABELS
+
+HISTORY_LIMIT = 20
 
 class SessionManager:
+    __slots__ = ("history", "current_context", "memory_slots", "version")
+    PRODI_MAPPING = PRODI_MAPPING
+
     def __init__(self):
-        self.PRODI_MAPPING = {
-            "teknik": [
-                "teknik", "informatika", "sistem informasi", "teknik industri", 
-                "teknik kimia", "teknik elektro", "ti", "si", "ft"
-            ],
-            "ekonomi": [
-                "ekonomi", "akuntansi", "manajemen", "feb", "bisnis"
-            ],
-            "pendidikan": [
-                "pendidikan", "keguruan", "fkip", "pgsd", "bimbingan konseling", "bk", 
-                "paud", "pgpaud", "pendidikan matematika", "pendidikan biologi", 
-                "pendidikan fisika", "pendidikan sejarah", "ppkn", "pkn",
-                "pendidikan bahasa inggris", "pendidikan bahasa indonesia", 
-                "ipa", "ips", "guru"
-            ],
-            "hukum": [
-                "hukum", "ilmu hukum", "fh"
-            ],
-            "kesehatan": [
-                "farmasi", "ilmu keolahragaan", "fiks", "olahraga"
-            ]
-        }
+        # Versi baris di session store saat sesi dibaca (0 = belum tersimpan); dipakai untuk compare-and-swap.
+        self.version = 0
         self.reset_session()
 
     def reset_session(self):
@@ -37,7 +22,7 @@ class SessionManager:
 
     def update_history(self, role, text):
         self.history.append({"role": role, "text": text})
-        if len(self.history) > 20:
+        if len(self.history) > HISTORY_LIMIT:
             self.history.pop(0)
 
     def set_context(self, intent):
@@ -48,25 +33,41 @@ class SessionManager:
 
     def extract_entities(self, user_input):
         text = user_input.lower()
+        slots, matches = ENTITY_EXTRACTOR.extract(text)
+        for label in SLOT_LABELS:
+            if label in slots:
+                self.memory_slots[label] = slots[label]
 
-        found_prodi = False
-        for key, keywords in self.PRODI_MAPPING.items():
-            for word in keywords:
-                if re.search(r'\b' + re.escape(word) + r'\b', text):
-                    self.memory_slots["prodi"] = key
-                    found_prodi = True
-                    break
-            if found_prodi:
-                break
-
-        semester_match = re.search(r"(?:semester|smt|sem)\s*(\d+|ganjil|genap)", text)
-        if semester_match:
-            self.memory_slots["semester"] = semester_match.group(1)
-        elif text.isdigit() and int(text) <= 14:
+        if "semester" not in slots and text.isdigit() and int(text) <= 14:
             self.memory_slots["semester"] = text
+        return matches
 
     def get_slot(self, key):
         return self.memory_slots.get(key)
     
     def debug_memory(self):
         return f"[MEMORY] Prodi: {self.memory_slots['prodi']} | Smt: {self.memory_slots['semester']} | Context: {self.current_context}"
+
+    def approx_size(self):
+        size = 256
+        for item in self.history:
+            size += 64 + len(item["text"])
+        for value in self.memory_slots.values():
+            if value is not None:
+                size += 32 + len(str(value))
+        return size
+
+    def to_dict(self):
+        return {
+            "history": list(self.history),
+            "current_context": self.current_context,
+            "memory_slots": dict(self.memory_slots),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        session = cls()
+        session.history = list(data.get("history", []))[-HISTORY_LIMIT:]
+        session.current_context = data.get("current_context")
+        session.memory_slots.update(data.get("memory_slots", {}))
+        return session
@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from utils.session_manager import SessionManager
+
+class InMemorySessionStore:
+    backend = "memory"
+
+    def __init__(self, max_sessions=10000, idle_ttl=3600.0, max_bytes=64 * 1024 * 1024, clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._sessions = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.evicted_lru = 0
+        self.evicted_ttl = 0
+
+    def get(self, session_id):
+        now = self.clock()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and self.idle_ttl and now - entry[1] > self.idle_ttl:
+                self._drop(session_id)
+                self.evicted_ttl += 1
+                entry = None
+            if entry is None:
+                session = SessionManager()
+                self._sessions[session_id] = [session, now]
+                self._account(session_id, session)
+                self._evict(now)
+                return session
+            entry[1] = now
+            self._sessions.move_to_end(session_id)
+            return entry[0]
+
+    def save(self, session_id, session):
+        # Satu proses berbagi objek sesi yang sama, jadi tidak ada konflik versi.
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                self._sessions[session_id] = [session, self.clock()]
+            else:
+                entry[0] = session
+            self._account(session_id, session)
+            self._evict(self.clock())
+        return True
+
+    def reset(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                entry[0].reset_session()
+                self._account(session_id, entry[0])
+
+    def discard(self, session_id):
+        with self._lock:
+            if session_id in self._sessions:
+                self._drop(session_id)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _account(self, session_id, session):
+        size = session.approx_size()
+        self._total_bytes += size - self._sizes.get(session_id, 0)
+        self._sizes[session_id] = size
+
+    def _drop(self, session_id):
+        self._sessions.pop(session_id, None)
+        self._total_bytes -= self._sizes.pop(session_id, 0)
+
+    def _evict(self, now):
+        while self._sessions:
+            oldest_id, (_, last_seen) = next(iter(self._sessions.items()))
+            if self.idle_ttl and now - last_seen > self.idle_ttl:
+                self._drop(oldest_id)
+                self.evicted_ttl += 1
+            elif (self.max_sessions and len(self._sessions) > self.max_sessions) or \
+                    (self.max_bytes and self._total_bytes > self.max_bytes and len(self._sessions) > 1):
+                self._drop(oldest_id)
+                self.evicted_lru += 1
+            else:
+                break
+
+    def stats(self):
+        return {
+            "backend": self.backend,
+            "sessions": len(self._sessions),
+            "approx_bytes": self._total_bytes,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "idle_ttl_s": self.idle_ttl,
+            "evicted_lru": self.evicted_lru,
+            "evicted_ttl": self.evicted_ttl,
+        }
+
+class SQLiteSessionStore:
+    backend = "sqlite"
+
+    def __init__(self, path, max_sessions=100000, idle_ttl=86400.0, sweep_interval=60.0, clock=time.time):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._local = threading.local()
+        self._last_sweep = 0.0
+        self.evicted = 0
+        self.conflicts = 0
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_connections)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions "
+            "(id TEXT PRIMARY KEY, data TEXT NOT NULL, updated REAL NOT NULL, version INTEGER NOT NULL DEFAULT 1)"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+        if "version" not in columns:
+            # DB dari versi sebelumnya belum punya kolom version; baris lama mulai dari versi 1 (0 = belum tersimpan).
+            conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated)")
+        conn.commit()
+
+    def _reset_connections(self):
+        # Koneksi SQLite tidak boleh dipakai lintas fork; setiap proses membuka koneksi sendiri.
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id):
+        now = self.clock()
+        self._maybe_sweep(now)
+        row = self._conn().execute("SELECT data, updated, version FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            return SessionManager()
+        if self.idle_ttl and now - row[1] > self.idle_ttl:
+            # Sesi kedaluwarsa diganti sesi baru, tapi versi baris tetap dipegang agar save bisa menimpanya.
+            session = SessionManager()
+        else:
+            session = SessionManager.from_dict(json.loads(row[0]))
+        session.version = row[2]
+        return session
+
+    def save(self, session_id, session):
+        # Compare-and-swap: hanya berhasil bila baris belum diubah worker lain sejak get().
+        # False = konflik; pemanggil membaca ulang sesi dan mengulang perubahannya.
+        data = json.dumps(session.to_dict(), ensure_ascii=False)
+        if session.version:
+            cursor = self._conn().execute(
+                "UPDATE sessions SET data = ?, updated = ?, version = version + 1 WHERE id = ? AND version = ?",
+                (data, self.clock(), session_id, session.version),
+            )
+        else:
+            cursor = self._conn().execute(
+                "INSERT INTO sessions (id, data, updated, version) VALUES (?, ?, ?, 1) ON CONFLICT(id) DO NOTHING",
+                (session_id, data, self.clock()),
+            )
+        if cursor.rowcount != 1:
+            self.conflicts += 1
+            return False
+        session.version += 1
+        return True
+
+    def reset(self, session_id):
+        # Reset menimpa tanpa cek versi; versi tetap dinaikkan agar save yang sedang berjalan ikut konflik.
+        self._conn().execute(
+            "UPDATE sessions SET data = ?, updated = ?, version = version + 1 WHERE id = ?",
+            (json.dumps(SessionManager().to_dict(), ensure_ascii=False), self.clock(), session_id),
+        )
+
+    def discard(self, session_id):
+        self._conn().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def __contains__(self, session_id):
+        return self._conn().execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is not None
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def _maybe_sweep(self, now):
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        conn = self._conn()
+        removed = 0
+        if self.idle_ttl:
+            removed += conn.execute("DELETE FROM sessions WHERE updated < ?", (now - self.idle_ttl,)).rowcount
+        if self.max_sessions:
+            removed += conn.execute(
+                "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            ).rowcount
+        self.evicted += max(0, removed)
+
+    def stats(self):
+        return {
+            "backend": self.backend,
+            "path": self.path,
+            "sessions": len(self),
+            "max_sessions": self.max_sessions,
+            "idle_ttl_s": self.idle_ttl,
+            "evicted": self.evicted,
+            "conflicts": self.conflicts,
+        }
+
+def create_session_store(backend="memory", path=None, max_sessions=None, idle_ttl=None, max_bytes=None):
+    if backend == "sqlite":
+        kwargs = {}
+        if max_sessions is not None: kwargs["max_sessions"] = max_sessions
+        if idle_ttl is not None: kwargs["idle_ttl"] = idle_ttl
+        return SQLiteSessionStore(path, **kwargs)
+    if backend == "memory":
+        kwargs = {}
+        if max_sessions is not None: kwargs["max_sessions"] = max_sessions
+        if idle_ttl is not None: kwargs["idle_ttl"] = idle_ttl
+        if max_bytes is not None: kwargs["max_bytes"] = max_bytes
+        return InMemorySessionStore(**kwargs)
+    raise ValueError(f"Backend sesi tidak dikenal: {backend}")
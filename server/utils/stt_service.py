@@ -0,0 +1,154 @@
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import numpy as np
+from utils.metrics import Histogram, LATENCY_BUCKETS_MS
+
+SAMPLE_RATE = 16000
+RTF_BUCKETS = (0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+QUEUE_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+class STTOverloadedError(RuntimeError):
+    pass
+
+def _build_model(config):
+    from faster_whisper import WhisperModel
+    return WhisperModel(
+        config["model_size"],
+        device=config["device"],
+        compute_type=config["compute_type"],
+        cpu_threads=config["cpu_threads"],
+        num_workers=config["num_workers"],
+    )
+
+def _run_transcribe(model, audio, options):
+    started = time.time()
+    segments, info = model.transcribe(audio, **options)
+    text = "".join(s.text for s in segments).strip()
+    return text, getattr(info, "duration", None), started, time.time() - started
+
+_process_model = None
+
+def _process_init(config):
+    global _process_model
+    _process_model = _build_model(config)
+
+def _process_transcribe(audio, options):
+    return _run_transcribe(_process_model, audio, options)
+
+class STTService:
+    def __init__(self, model_size="base", device="cpu", compute_type="int8", workers=1, cpu_threads=0,
+                 beam_size=5, vad_filter=False, vad_min_silence_ms=500, language="id", mode="thread",
+                 max_queue=32):
+        self.config = {
+            "model_size": model_size,
+            "device": device,
+            "compute_type": compute_type,
+            "cpu_threads": int(cpu_threads),
+            # Thread mode: satu model, CTranslate2 menjalankan `workers` transkripsi paralel.
+            # Process mode: tiap proses memuat model sendiri dengan satu worker.
+            "num_workers": max(1, int(workers)) if mode == "thread" else 1,
+        }
+        self.options = {"language": language, "beam_size": int(beam_size), "vad_filter": bool(vad_filter)}
+        if vad_filter:
+            self.options["vad_parameters"] = {"min_silence_duration_ms": int(vad_min_silence_ms)}
+        self.workers = max(1, int(workers))
+        self.mode = mode
+        self.max_queue = int(max_queue)
+        self.model = None
+        self._pool = None
+        self._load_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.load_seconds = None
+        self.queue_depth = Histogram(QUEUE_BUCKETS)
+        self.queue_wait_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.rtf = Histogram(RTF_BUCKETS)
+
+    @property
+    def loaded(self):
+        return self._pool is not None
+
+    def load(self):
+        if self._pool is not None:
+            return
+        with self._load_lock:
+            if self._pool is not None:
+                return
+            started = time.perf_counter()
+            if self.mode == "process":
+                ctx = multiprocessing.get_context("spawn")
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=ctx, initializer=_process_init, initargs=(self.config,))
+                # Paksa semua proses memuat model sekarang, bukan saat request pertama.
+                silence = np.zeros(SAMPLE_RATE // 2, dtype=np.float32)
+                list(self._pool.map(_process_transcribe, [silence] * self.workers, [self.options] * self.workers))
+            else:
+                self.model = _build_model(self.config)
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="stt")
+            self.load_seconds = round(time.perf_counter() - started, 3)
+
+    def warmup(self):
+        self.load()
+        self.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32))
+
+    def _on_done(self, submitted, future):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+        if future.cancelled() or future.exception() is not None:
+            return
+        _, _, started, elapsed = future.result()
+        self.queue_wait_ms.observe(max(0.0, started - submitted) * 1000.0)
+        self.latency_ms.observe(elapsed * 1000.0)
+
+    def submit(self, audio, **overrides):
+        self.load()
+        with self._lock:
+            if self.max_queue and self.pending >= self.max_queue:
+                self.rejected += 1
+                raise STTOverloadedError("Antrian STT penuh")
+            self.pending += 1
+            depth = self.pending
+        self.queue_depth.observe(depth)
+        submitted = time.time()
+        options = {**self.options, **overrides} if overrides else self.options
+        if self.mode == "process":
+            future = self._pool.submit(_process_transcribe, audio, options)
+        else:
+            future = self._pool.submit(_run_transcribe, self.model, audio, options)
+        future.add_done_callback(lambda f: self._on_done(submitted, f))
+        return future
+
+    def transcribe(self, audio, timeout=None, **overrides):
+        text, duration, _, elapsed = self.submit(audio, **overrides).result(timeout=timeout)
+        if duration is None and isinstance(audio, np.ndarray):
+            duration = len(audio) / SAMPLE_RATE
+        if duration:
+            self.rtf.observe(elapsed / duration)
+        return text
+
+    def stats(self):
+        with self._lock:
+            counters = {"pending": self.pending, "completed": self.completed, "rejected": self.rejected}
+        return {
+            "loaded": self.loaded,
+            "load_seconds": self.load_seconds,
+            "mode": self.mode,
+            "workers": self.workers,
+            "model_size": self.config["model_size"],
+            "beam_size": self.options["beam_size"],
+            "vad_filter": self.options["vad_filter"],
+            **counters,
+            "queue_depth": self.queue_depth.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+            "latency_ms": self.latency_ms.snapshot(),
+            "rtf": self.rtf.snapshot(),
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,166 @@
+import time
+import uuid
+import threading
+import numpy as np
+from scipy.signal import resample_poly
+from utils.metrics import timed
+from utils.stt_service import SAMPLE_RATE
+
+FRAME_MS = 30
+
+def pcm16_to_float(data):
+    # Frame PCM16 little-endian mono; np.frombuffer tidak menyalin buffer masukan.
+    usable = len(data) - (len(data) % 2)
+    return np.frombuffer(memoryview(data)[:usable], dtype="<i2").astype(np.float32) / 32768.0
+
+class EnergyVAD:
+    def __init__(self, threshold_db=-42.0, margin_db=12.0, frame_ms=FRAME_MS):
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.frame = SAMPLE_RATE * frame_ms // 1000
+        self.noise_db = None
+
+    def is_speech(self, frame):
+        db = 10.0 * np.log10(float(np.mean(frame * frame)) + 1e-10)
+        if self.noise_db is None:
+            self.noise_db = db
+        gate = max(self.threshold_db, self.noise_db + self.margin_db)
+        speech = db > gate
+        if not speech:
+            # Lantai noise mengikuti ruangan secara perlahan, hanya dari frame non-ucapan.
+            self.noise_db = 0.95 * self.noise_db + 0.05 * db
+        return speech
+
+class StreamingTranscriber:
+    def __init__(self, stt, sample_rate=SAMPLE_RATE, partial_interval_s=1.0, end_silence_ms=700,
+                 min_speech_ms=250, max_utterance_s=20.0, partial_beam_size=1, vad=None):
+        self.stt = stt
+        self.sample_rate = int(sample_rate)
+        self.partial_interval = int(partial_interval_s * SAMPLE_RATE)
+        self.end_silence_frames = max(1, end_silence_ms // FRAME_MS)
+        self.min_speech_frames = max(1, min_speech_ms // FRAME_MS)
+        self.partial_beam_size = partial_beam_size
+        self.vad = vad or EnergyVAD()
+        self._buffer = np.zeros(int(max_utterance_s * SAMPLE_RATE), dtype=np.float32)
+        self._length = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._last_partial_at = 0
+        self.last_partial = ""
+        self.finals = []
+        self.last_activity = time.monotonic()
+
+    def _to_model_rate(self, audio):
+        if self.sample_rate == SAMPLE_RATE:
+            return audio
+        g = np.gcd(self.sample_rate, SAMPLE_RATE)
+        return resample_poly(audio, SAMPLE_RATE // g, self.sample_rate // g).astype(np.float32)
+
+    def _append(self, frame):
+        end = self._length + len(frame)
+        if end > len(self._buffer):
+            return False
+        self._buffer[self._length:end] = frame
+        self._length = end
+        return True
+
+    def _decode(self, final):
+        # Sisakan ~200 ms hening di ekor; sisanya tidak perlu ikut didecode.
+        trailing = max(0, self._silence_frames - 200 // FRAME_MS) * self.vad.frame
+        audio = self._buffer[:self._length - trailing].copy()
+        if final:
+            with timed("stt_stream_final"):
+                return self.stt.transcribe(audio)
+        with timed("stt_stream_partial"):
+            return self.stt.transcribe(audio, beam_size=self.partial_beam_size, vad_filter=False)
+
+    def _finalize(self):
+        events = []
+        if self._speech_frames >= self.min_speech_frames:
+            text = self._decode(final=True)
+            if text:
+                self.finals.append(text)
+                events.append({"type": "final", "text": text})
+        self._length = 0
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._last_partial_at = 0
+        self.last_partial = ""
+        return events
+
+    def push(self, audio):
+        # audio: bytes PCM16 atau array float32 pada sample_rate sesi.
+        self.last_activity = time.monotonic()
+        if not isinstance(audio, np.ndarray):
+            audio = pcm16_to_float(audio)
+        samples = np.concatenate([self._pending, self._to_model_rate(audio)])
+        frame = self.vad.frame
+        usable = len(samples) - len(samples) % frame
+        self._pending = samples[usable:]
+        events = []
+        for start in range(0, usable, frame):
+            chunk = samples[start:start + frame]
+            speech = self.vad.is_speech(chunk)
+            if speech:
+                self._speech_frames += 1
+                self._silence_frames = 0
+            elif self._length:
+                self._silence_frames += 1
+            if speech or self._length:
+                if not self._append(chunk):
+                    events.extend(self._finalize())
+                    self._append(chunk)
+            if self._length and self._silence_frames >= self.end_silence_frames:
+                events.extend(self._finalize())
+        if (self._speech_frames >= self.min_speech_frames
+                and self._length - self._last_partial_at >= self.partial_interval):
+            self._last_partial_at = self._length
+            text = self._decode(final=False)
+            if text and text != self.last_partial:
+                self.last_partial = text
+                events.append({"type": "partial", "text": text})
+        return events
+
+    def finish(self):
+        self.last_activity = time.monotonic()
+        if len(self._pending):
+            self._append(self._pending)
+            self._pending = np.zeros(0, dtype=np.float32)
+        events = self._finalize() if self._length else []
+        events.append({"type": "done", "text": " ".join(self.finals).strip()})
+        return events
+
+class StreamRegistry:
+    def __init__(self, factory, idle_ttl=60.0, max_streams=256):
+        self.factory = factory
+        self.idle_ttl = idle_ttl
+        self.max_streams = max_streams
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def _sweep(self, now):
+        stale = [k for k, (s, _, _) in self._streams.items() if now - s.last_activity > self.idle_ttl]
+        for k in stale:
+            del self._streams[k]
+
+    def create(self, meta=None, **kwargs):
+        with self._lock:
+            self._sweep(time.monotonic())
+            if len(self._streams) >= self.max_streams:
+                raise RuntimeError("Terlalu banyak stream STT aktif")
+            stream_id = uuid.uuid4().hex
+            self._streams[stream_id] = (self.factory(**kwargs), threading.Lock(), dict(meta or {}))
+            return stream_id
+
+    def get(self, stream_id):
+        with self._lock:
+            return self._streams.get(stream_id)
+
+    def close(self, stream_id):
+        with self._lock:
+            return self._streams.pop(stream_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {"active": len(self._streams), "max_streams": self.max_streams}
@@ -1,82 +1,127 @@
 import re
+from types import MappingProxyType
 
-normalizad_word_dict = {
-    "sim": "sim", "siakad": "sim", "sikd": "sim", "siakd": "sim","siakad": "siakad", "sikd": "siakad", "portal": "siakad", "sim": "siakad", 
-    "sita": "sita", "elma": "elma", "lptik": "lptik", "unipma": "unipma", 
-    "unima": "unipma", "kampus": "kampus", "universitas": "kampus",
-    "graha": "graha", "cendekia": "cendekia", "ulul": "ulul", "albab": "albab", 
-    "rektorat": "rektorat",
-
-    "krs": "krs", "krsan": "krs", "sks": "sks", "matkul": "mata kuliah", 
-    "mk": "mata kuliah", "mtkul": "mata kuliah", "mtul": "mata kuliah",
-    "kuliah": "kuliah", "kuliya": "kuliah", "kuliyah": "kuliah", "kulaih": "kuliah", 
-    "prkuliahan": "kuliah", "jadwal": "jadwal", "jdwl": "jadwal", "jadual": "jadwal", 
-    "jdwal": "jadwal", "jawal": "jadwal", "ujian": "ujian", "ujina": "ujian", 
-    "uijan": "ujian", "ujisn": "ujian", "ujin": "ujian", "tes": "ujian",
-    "uts": "uts", "uas": "uas", "semester": "semester", "smt": "semester", 
-    "smster": "semester", "smester": "semester", "smstr": "semester",
-    "ganjil": "ganjil", "genap": "genap", "maba": "mahasiswa baru", 
-    "kating": "kakak tingkat",
-
-    "skripsi": "skripsi", "skrpsi": "skripsi", "skrispi": "skripsi", 
-    "ta": "skripsi", "judul": "judul", "jdul": "judul", "outline": "outline", 
-    "outlene": "outline", "outlen": "outline", "dospem": "dosen pembimbing", 
-    "pembimbing": "dosen pembimbing", "dosbing": "dosen pembimbing", "dsen": "dosen",
-    "sempro": "seminar proposal", "sidang": "sidang", "pendadaran": "sidang",
-    "wisuda": "wisuda", "yudisium": "wisuda", "yidisium": "wisuda", "toga": "toga",
-    "ijazah": "ijazah", "ijasah": "ijazah", "legalisir": "legalisir", 
-    "lgalisir": "legalisir", "kp": "kerja praktik", "magang": "kerja praktik", 
-    "pkl": "kerja praktik", "praktek": "kerja praktik", "toefl": "toefl", 
-    "elpt": "toefl", "tofel": "toefl", "skor": "skor", "scor": "skor",
-
-    "bayar": "bayar", "byar": "bayar", "pembayaran": "bayar", "pmbyaran": "bayar", 
-    "tf": "bayar", "transfer": "bayar", "biaya": "biaya", "biya": "biaya", 
-    "tarif": "biaya", "harga": "biaya", "nominal": "biaya", "ukt": "ukt", 
-    "spp": "ukt", "tagihan": "tagihan", "tgihan": "tagihan", "tunggakan": "tunggakan", 
-    "nunggak": "tunggakan", "lunas": "lunas", "lnas": "lunas", "dispensasi": "dispensasi", 
-    "dispen": "dispensasi", "keringanan": "dispensasi", "beasiswa": "beasiswa", 
-    "besiswa": "beasiswa", "kipk": "kip-k", "kip-k": "kip-k", "pndaftaran": "daftar",
-    "potongan": "potongan", "ptongan": "potongan", "diskon": "potongan", 
-    "cashback": "potongan",
-
-    "surat": "surat", "srat": "surat", "aktif": "aktif", "akrif": "aktif",
-    "cuti": "cuti", "cti": "cuti", "off": "cuti", "berhenti": "cuti", 
-    "brenti": "cuti", "stop": "cuti", "pindah": "pindah", "pndah": "pindah", 
-    "mutasi": "pindah", "ganti": "ganti", "revisi": "ganti", "ubah": "ganti",
-    "prodi": "prodi", "jurusan": "prodi", "prdi": "prodi", "fakultas": "fakultas",
-    "baak": "baa", "baa": "baa", "tu": "tu", "tata usaha": "tu",
-    "wifi": "wifi", "wfi": "wifi", "internet": "wifi", "hotspot": "hotspot", 
-    "hospot": "hotspot", "password": "password", "pasword": "password", 
-    "pw": "password", "sandi": "password", "reset": "reset",
-    "perpus": "perpustakaan", "perpstakaan": "perpustakaan", "pustaka": "perpustakaan", 
-    "buku": "buku", "masjid": "masjid", "msjid": "masjid", "mushola": "mushola", 
-    "mshola": "mushola", "sholat": "sholat", "kantin": "kantin", "makan": "makan", 
-    "laper": "makan", "foodcourt": "kantin",
-
-    "kapan": "kapan", "kpn": "kapan", "kpan": "kapan", "tgl": "tanggal", 
-    "tanggal": "tanggal", "mana": "mana", "dmn": "dimana", "dimana": "dimana", 
-    "dmna": "dimana", "bagaimana": "bagaimana", "gmn": "bagaimana", 
-    "gmna": "bagaimana", "gimana": "bagaimana", "apa": "apa", "ap": "apa", 
-    "apakah": "apa", "apkh": "apa", "berapa": "berapa", "brp": "berapa", 
-    "brpa": "berapa", "brapa": "berapa", "siapa": "siapa", "sapa": "siapa", 
-    "syapa": "siapa", "syarat": "syarat", "syrat": "syarat", "sarat": "syarat", 
-    "persyaratan": "syarat", "dokumen": "dokumen", "berkas": "dokumen", 
-    "dkumen": "dokumen", "file": "dokumen", "info": "info", "inpo": "info", 
-    "informasi": "info", "spill": "info", "eror": "error", "error": "error", 
-    "down": "error", "lemot": "error", "bug": "error", "bantu": "tolong", 
-    "tolong": "tolong", "tlong": "tolong", "help": "tolong"
-}
+NORMALIZATION_ENTRIES = (
+    ("sim", "siakad"), ("siakad", "siakad"), ("sikd", "siakad"), ("siakd", "sim"), ("portal", "siakad"),
+    ("sita", "sita"), ("elma", "elma"), ("lptik", "lptik"), ("unipma", "unipma"),
+    ("unima", "unipma"), ("kampus", "kampus"), ("universitas", "kampus"),
+    ("graha", "graha"), ("cendekia", "cendekia"), ("ulul", "ulul"), ("albab", "albab"),
+    ("rektorat", "rektorat"),
+
+    ("krs", "krs"), ("krsan", "krs"), ("sks", "sks"), ("matkul", "mata kuliah"),
+    ("mk", "mata kuliah"), ("mtkul", "mata kuliah"), ("mtul", "mata kuliah"),
+    ("kuliah", "kuliah"), ("kuliya", "kuliah"), ("kuliyah", "kuliah"), ("kulaih", "kuliah"),
+    ("prkuliahan", "kuliah"), ("jadwal", "jadwal"), ("jdwl", "jadwal"), ("jadual", "jadwal"),
+    ("jdwal", "jadwal"), ("jawal", "jadwal"), ("ujian", "ujian"), ("ujina", "ujian"),
+    ("uijan", "ujian"), ("ujisn", "ujian"), ("ujin", "ujian"), ("tes", "ujian"),
+    ("uts", "uts"), ("uas", "uas"), ("semester", "semester"), ("smt", "semester"),
+    ("smster", "semester"), ("smester", "semester"), ("smstr", "semester"),
+    ("ganjil", "ganjil"), ("genap", "genap"), ("maba", "mahasiswa baru"),
+    ("kating", "kakak tingkat"),
+
+    ("skripsi", "skripsi"), ("skrpsi", "skripsi"), ("skrispi", "skripsi"),
+    ("ta", "skripsi"), ("judul", "judul"), ("jdul", "judul"), ("outline", "outline"),
+    ("outlene", "outline"), ("outlen", "outline"), ("dospem", "dosen pembimbing"),
+    ("pembimbing", "dosen pembimbing"), ("dosbing", "dosen pembimbing"), ("dsen", "dosen"),
+    ("sempro", "seminar proposal"), ("sidang", "sidang"), ("pendadaran", "sidang"),
+    ("wisuda", "wisuda"), ("yudisium", "wisuda"), ("yidisium", "wisuda"), ("toga", "toga"),
+    ("ijazah", "ijazah"), ("ijasah", "ijazah"), ("legalisir", "legalisir"),
+    ("lgalisir", "legalisir"), ("kp", "kerja praktik"), ("magang", "kerja praktik"),
+    ("pkl", "kerja praktik"), ("praktek", "kerja praktik"), ("toefl", "toefl"),
+    ("elpt", "toefl"), ("tofel", "toefl"), ("skor", "skor"), ("scor", "skor"),
+
+    ("bayar", "bayar"), ("byar", "bayar"), ("pembayaran", "bayar"), ("pmbyaran", "bayar"),
+    ("tf", "bayar"), ("transfer", "bayar"), ("biaya", "biaya"), ("biya", "biaya"),
+    ("tarif", "biaya"), ("harga", "biaya"), ("nominal", "biaya"), ("ukt", "ukt"),
+    ("spp", "ukt"), ("tagihan", "tagihan"), ("tgihan", "tagihan"), ("tunggakan", "tunggakan"),
+    ("nunggak", "tunggakan"), ("lunas", "lunas"), ("lnas", "lunas"), ("dispensasi", "dispensasi"),
+    ("dispen", "dispensasi"), ("keringanan", "dispensasi"), ("beasiswa", "beasiswa"),
+    ("besiswa", "beasiswa"), ("kipk", "kip-k"), ("kip-k", "kip-k"), ("pndaftaran", "daftar"),
+    ("potongan", "potongan"), ("ptongan", "potongan"), ("diskon", "potongan"),
+    ("cashback", "potongan"),
+
+    ("surat", "surat"), ("srat", "surat"), ("aktif", "aktif"), ("akrif", "aktif"),
+    ("cuti", "cuti"), ("cti", "cuti"), ("off", "cuti"), ("berhenti", "cuti"),
+    ("brenti", "cuti"), ("stop", "cuti"), ("pindah", "pindah"), ("pndah", "pindah"),
+    ("mutasi", "pindah"), ("ganti", "ganti"), ("revisi", "ganti"), ("ubah", "ganti"),
+    ("prodi", "prodi"), ("jurusan", "prodi"), ("prdi", "prodi"), ("fakultas", "fakultas"),
+    ("baak", "baa"), ("baa", "baa"), ("tu", "tu"), ("tata usaha", "tu"),
+    ("wifi", "wifi"), ("wfi", "wifi"), ("internet", "wifi"), ("hotspot", "hotspot"),
+    ("hospot", "hotspot"), ("password", "password"), ("pasword", "password"),
+    ("pw", "password"), ("sandi", "password"), ("reset", "reset"),
+    ("perpus", "perpustakaan"), ("perpstakaan", "perpustakaan"), ("pustaka", "perpustakaan"),
+    ("buku", "buku"), ("masjid", "masjid"), ("msjid", "masjid"), ("mushola", "mushola"),
+    ("mshola", "mushola"), ("sholat", "sholat"), ("kantin", "kantin"), ("makan", "makan"),
+    ("laper", "makan"), ("foodcourt", "kantin"),
+
+    ("kapan", "kapan"), ("kpn", "kapan"), ("kpan", "kapan"), ("tgl", "tanggal"),
+    ("tanggal", "tanggal"), ("mana", "mana"), ("dmn", "dimana"), ("dimana", "dimana"),
+    ("dmna", "dimana"), ("bagaimana", "bagaimana"), ("gmn", "bagaimana"),
+    ("gmna", "bagaimana"), ("gimana", "bagaimana"), ("apa", "apa"), ("ap", "apa"),
+    ("apakah", "apa"), ("apkh", "apa"), ("berapa", "berapa"), ("brp", "berapa"),
+    ("brpa", "berapa"), ("brapa", "berapa"), ("siapa", "siapa"), ("sapa", "siapa"),
+    ("syapa", "siapa"), ("syarat", "syarat"), ("syrat", "syarat"), ("sarat", "syarat"),
+    ("persyaratan", "syarat"), ("dokumen", "dokumen"), ("berkas", "dokumen"),
+    ("dkumen", "dokumen"), ("file", "dokumen"), ("info", "info"), ("inpo", "info"),
+    ("informasi", "info"), ("spill", "info"), ("eror", "error"), ("error", "error"),
+    ("down", "error"), ("lemot", "error"), ("bug", "error"), ("bantu", "tolong"),
+    ("tolong", "tolong"), ("tlong", "tolong"), ("help", "tolong"),
+)
+
+INFLECTION_SUFFIXES = ("ku", "mu", "nya", "lah", "kah", "pun")
+
+class NormalizationConflictError(ValueError):
+    pass
+
+def build_lookup_table(entries):
+    table = {}
+    for key, value in entries:
+        if key in table and table[key] != value:
+            raise NormalizationConflictError(f"Kata '{key}' dipetakan ganda: '{table[key]}' vs '{value}'")
+        table[key] = value
+    return MappingProxyType(table)
+
+normalizad_word_dict = build_lookup_table(NORMALIZATION_ENTRIES)
+
+class CompiledNormalizer:
+    def __init__(self, lookup, suffixes=INFLECTION_SUFFIXES, max_memo=50000):
+        self.lookup = lookup
+        self.suffixes = tuple(suffixes)
+        self.max_memo = max_memo
+        self._tokenize = re.compile(r'[a-z0-9]+').findall
+        self._memo = {}
+
+    def _normalize_token(self, token):
+        for suffix in self.suffixes:
+            if token.endswith(suffix):
+                token = token[:-len(suffix)]
+                break
+        if not token:
+            return None
+        return self.lookup.get(token, token)
+
+    def normalize(self, text):
+        memo = self._memo
+        out = []
+        for token in self._tokenize(text.lower()):
+            try:
+                word = memo[token]
+            except KeyError:
+                word = self._normalize_token(token)
+                if len(memo) < self.max_memo:
+                    memo[token] = word
+            if word is not None:
+                out.append(word)
+        return " ".join(out)
+
+    def normalize_many(self, texts):
+        normalize = self.normalize
+        return [normalize(text) for text in texts]
+
+default_normalizer = CompiledNormalizer(normalizad_word_dict)
 
 def text_normalize(text):
-    text = text.lower()
-    text = re.sub(r'[^a-z0-9\s]', ' ', text)
-    text = re.sub(r'(ku|mu|nya|lah|kah|pun)\b', '', text)
-    words = text.split()
-    normalized_words = []
-    for word in words:
-        if word in normalizad_word_dict:
-            normalized_words.append(normalizad_word_dict[word])
-        else:
-            normalized_words.append(word)
-    result = " ".join(normalized_words)
-    return re.sub(r'\s+', ' ', result).strip()
\ No newline at end of file
+    return default_normalizer.normalize(text)
+
+def normalize_many(texts):
+    return default_normalizer.normalize_many(texts)
@@ -0,0 +1,231 @@
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from utils.text_preprocessing import normalizad_word_dict, normalize_many
+
+CACHE_FORMAT_VERSION = 1
+PARALLEL_MIN_PATTERNS = 2000
+CHUNK_SIZE = 500
+STEM_TOKEN_CACHE = 50000
+CACHE_KEEP = 3
+MANIFEST_NAME = "training_manifest.json"
+MANIFEST_FORMAT_VERSION = 1
+
+_worker_preprocessor = None
+
+def _new_preprocessor():
+    from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
+    from utils.preprocessing_cache import CachedPreprocessor
+    # Stem per kata lewat cache token: kosakata korpus sangat berulang antar pola.
+    return CachedPreprocessor(StemmerFactory().create_stemmer(), token_cache_size=STEM_TOKEN_CACHE, utterance_cache_size=0)
+
+def _init_worker():
+    global _worker_preprocessor
+    _worker_preprocessor = _new_preprocessor()
+
+def _stem_patterns(preprocessor, patterns):
+    return [preprocessor.stem(p) for p in normalize_many(patterns)]
+
+def _stem_chunk(patterns):
+    return _stem_patterns(_worker_preprocessor, patterns)
+
+def preprocess_patterns(patterns, workers=None, chunk_size=CHUNK_SIZE):
+    # Hanya pola unik yang diproses; urutan dan duplikat dipulihkan setelahnya.
+    unique = list(dict.fromkeys(patterns))
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if workers <= 1 or len(unique) < PARALLEL_MIN_PATTERNS:
+        processed = _stem_patterns(_new_preprocessor(), unique)
+    else:
+        chunks = [unique[i:i + chunk_size] for i in range(0, len(unique), chunk_size)]
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+            processed = [s for chunk in pool.map(_stem_chunk, chunks) for s in chunk]
+    lookup = dict(zip(unique, processed))
+    return [lookup[p] for p in patterns]
+
+def corpus_fingerprint(raw, **params):
+    h = hashlib.sha256()
+    h.update(raw)
+    h.update(json.dumps({"format": CACHE_FORMAT_VERSION, **params}, sort_keys=True).encode("utf-8"))
+    # Kamus normalisasi ikut di-hash: mengubahnya harus membuang cache.
+    h.update(repr(sorted(normalizad_word_dict.items())).encode("utf-8"))
+    return h.hexdigest()[:20]
+
+class TrainingCorpus:
+    def __init__(self, sentences, tags, intent_tags, padded, tokenizer, lbl_encoder, fingerprint, from_cache=False):
+        self.sentences = sentences
+        self.tags = tags
+        self.intent_tags = intent_tags
+        self.padded = padded
+        self.tokenizer = tokenizer
+        self.lbl_encoder = lbl_encoder
+        self.fingerprint = fingerprint
+        self.from_cache = from_cache
+
+    @property
+    def labels(self):
+        return self.lbl_encoder.transform(self.tags)
+
+def _label_encoder(classes):
+    from sklearn.preprocessing import LabelEncoder
+    encoder = LabelEncoder()
+    encoder.classes_ = np.asarray(classes)
+    return encoder
+
+def _save_cache(path, corpus):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            sentences=np.array(corpus.sentences, dtype=str),
+            tags=np.array(corpus.tags, dtype=str),
+            intent_tags=np.array(corpus.intent_tags, dtype=str),
+            padded=corpus.padded,
+            classes=np.asarray(corpus.lbl_encoder.classes_, dtype=str),
+            tokenizer_json=np.array(corpus.tokenizer.to_json()),
+        )
+    os.replace(tmp, path)
+
+def _load_cache(path, fingerprint):
+    from tensorflow.keras.preprocessing.text import tokenizer_from_json
+    with np.load(path) as f:
+        return TrainingCorpus(
+            sentences=f["sentences"].tolist(),
+            tags=f["tags"].tolist(),
+            intent_tags=f["intent_tags"].tolist(),
+            padded=f["padded"],
+            tokenizer=tokenizer_from_json(str(f["tokenizer_json"])),
+            lbl_encoder=_label_encoder(f["classes"].tolist()),
+            fingerprint=fingerprint,
+            from_cache=True,
+        )
+
+def _prune_cache(cache_dir, keep=CACHE_KEEP):
+    files = [os.path.join(cache_dir, n) for n in os.listdir(cache_dir) if n.endswith(".npz")]
+    files.sort(key=os.path.getmtime, reverse=True)
+    for path in files[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def encode_sentences(tokenizer, sentences, max_len=30):
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+    return pad_sequences(tokenizer.texts_to_sequences(sentences), truncating='post', maxlen=max_len).astype(np.int32)
+
+def load_training_corpus(data_path, cache_dir=None, max_len=30, vocab_size=8000, workers=None):
+    with open(data_path, 'rb') as f:
+        raw = f.read()
+    fingerprint = corpus_fingerprint(raw, max_len=max_len, vocab_size=vocab_size)
+    cache_path = os.path.join(cache_dir, f"{fingerprint}.npz") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            return _load_cache(cache_path, fingerprint)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    from sklearn.preprocessing import LabelEncoder
+    from tensorflow.keras.preprocessing.text import Tokenizer
+
+    data = json.loads(raw.decode('utf-8'))
+    patterns, tags, intent_tags = [], [], []
+    for intent in data['intents']:
+        patterns.extend(intent['patterns'])
+        tags.extend([intent['tag']] * len(intent['patterns']))
+        if intent['tag'] not in intent_tags:
+            intent_tags.append(intent['tag'])
+    sentences = preprocess_patterns(patterns, workers)
+
+    tokenizer = Tokenizer(num_words=vocab_size, oov_token="<OOV>")
+    tokenizer.fit_on_texts(sentences)
+    padded = encode_sentences(tokenizer, sentences, max_len)
+    lbl_encoder = LabelEncoder()
+    lbl_encoder.fit(tags)
+    corpus = TrainingCorpus(sentences, tags, intent_tags, padded, tokenizer, lbl_encoder, fingerprint)
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        _save_cache(cache_path, corpus)
+        _prune_cache(cache_dir)
+    return corpus
+
+def extend_tokenizer(tokenizer, sentences):
+    # fit_on_texts mengurutkan ulang word_index menurut frekuensi (indeks lama bergeser);
+    # kata baru cukup ditambahkan di ujung agar baris embedding lama tetap berlaku.
+    from tensorflow.keras.preprocessing.text import text_to_word_sequence
+    added = []
+    for text in sentences:
+        tokenizer.document_count += 1
+        seq = text_to_word_sequence(text, filters=tokenizer.filters, lower=tokenizer.lower, split=tokenizer.split)
+        for w in seq:
+            tokenizer.word_counts[w] = tokenizer.word_counts.get(w, 0) + 1
+            if w not in tokenizer.word_index:
+                index = len(tokenizer.word_index) + 1
+                tokenizer.word_index[w] = index
+                tokenizer.index_word[index] = w
+                added.append(w)
+        for w in set(seq):
+            tokenizer.word_docs[w] = tokenizer.word_docs.get(w, 0) + 1
+            tokenizer.index_docs[tokenizer.word_index[w]] = tokenizer.word_docs[w]
+    return added
+
+def extend_label_encoder(lbl_encoder, tags):
+    # classes_ bertipe object: LabelEncoder memetakan lewat dict, jadi urutan tidak harus terurut
+    # dan label baru bisa ditambahkan di ujung tanpa menggeser indeks lama.
+    classes = [str(c) for c in lbl_encoder.classes_]
+    known = set(classes)
+    added = [t for t in dict.fromkeys(tags) if t not in known]
+    lbl_encoder.classes_ = np.array(classes + added, dtype=object)
+    return added
+
+def pattern_digest(sentence):
+    return hashlib.sha1(sentence.encode("utf-8")).hexdigest()[:16]
+
+def build_manifest(corpus, classes, tokenizer, mode, max_len, vocab_size, parent=None):
+    patterns = {}
+    for sentence, tag in zip(corpus.sentences, corpus.tags):
+        patterns.setdefault(tag, set()).add(pattern_digest(sentence))
+    return {
+        "format_version": MANIFEST_FORMAT_VERSION,
+        "fingerprint": corpus.fingerprint,
+        "parent": parent,
+        "mode": mode,
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "max_len": max_len,
+        "vocab_size": vocab_size,
+        "vocab": len(tokenizer.word_index),
+        "classes": [str(c) for c in classes],
+        "patterns": {tag: sorted(digests) for tag, digests in patterns.items()},
+    }
+
+def load_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format_version") == MANIFEST_FORMAT_VERSION else None
+
+def write_manifest(path, manifest):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+def diff_corpus(manifest, corpus):
+    # Dibandingkan per kalimat hasil preprocessing: pola yang ter-stem sama tidak dianggap baru.
+    known = {tag: set(digests) for tag, digests in manifest["patterns"].items()}
+    new, kept, seen = [], [], set()
+    for i, (sentence, tag) in enumerate(zip(corpus.sentences, corpus.tags)):
+        digest = pattern_digest(sentence)
+        (kept if digest in known.get(tag, ()) else new).append(i)
+        seen.add((tag, digest))
+    classes, current = set(manifest["classes"]), set(corpus.intent_tags)
+    return {
+        "new": new,
+        "kept": kept,
+        "new_tags": [t for t in corpus.intent_tags if t not in classes],
+        "removed_tags": [t for t in manifest["classes"] if t not in current],
+        "removed_patterns": sum(len(d) for d in known.values()) - len({key for key in seen if key[1] in known.get(key[0], ())}),
+    }
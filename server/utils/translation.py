@@ -0,0 +1,226 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from utils.preprocessing_cache import LRUCache
+
+SEGMENT_PATTERN = re.compile(r'(?<=[.!?])\s+|\n+')
+GOOGLE_MAX_CHARS = 4500
+UNSPACED_LANGUAGES = ("ja", "zh-CN", "zh-TW", "th")
+
+def split_segments(text):
+    return [s.strip() for s in SEGMENT_PATTERN.split(text or "") if s and s.strip()]
+
+class GoogleTranslationBackend:
+    name = "google"
+
+    def __init__(self, source="id", target="ja", max_chars=GOOGLE_MAX_CHARS):
+        from deep_translator import GoogleTranslator
+        self.source = source
+        self.target = target
+        self.max_chars = max_chars
+        self.separator = "" if target in UNSPACED_LANGUAGES else " "
+        self._translator = GoogleTranslator(source=source, target=target)
+
+    def _chunks(self, texts):
+        chunk, size = [], 0
+        for text in texts:
+            if chunk and size + len(text) + 1 > self.max_chars:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(text)
+            size += len(text) + 1
+        if chunk:
+            yield chunk
+
+    def translate_many(self, texts):
+        results = []
+        for chunk in self._chunks(texts):
+            # Satu request untuk banyak segmen: digabung per baris lalu dipecah lagi.
+            # Jika jumlah baris hasil tidak cocok, jatuh ke translate_batch per segmen.
+            joined = self._translator.translate("\n".join(chunk)) or ""
+            lines = [line.strip() for line in joined.split("\n") if line.strip()]
+            if len(lines) != len(chunk):
+                lines = self._translator.translate_batch(chunk)
+            results.extend(lines)
+        return results
+
+class OfflineTranslationBackend:
+    # Pengganti lokal untuk tes/offline: kembalikan teks sumber (atau kamus statis) tanpa jaringan.
+    name = "offline"
+    separator = " "
+
+    def __init__(self, source="id", target="ja", mapping=None):
+        self.source = source
+        self.target = target
+        self.mapping = dict(mapping or {})
+        self.calls = 0
+
+    def translate_many(self, texts):
+        self.calls += 1
+        return [self.mapping.get(text, text) for text in texts]
+
+class TranslationCache:
+    def __init__(self, path, memory_size=4096):
+        self.path = path
+        self.memory = LRUCache(memory_size)
+        self._local = threading.local()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_connections)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "backend TEXT NOT NULL, source_lang TEXT NOT NULL, target_lang TEXT NOT NULL, "
+            "source TEXT NOT NULL, translated TEXT NOT NULL, created REAL NOT NULL, "
+            "PRIMARY KEY (backend, source_lang, target_lang, source))"
+        )
+
+    def _reset_connections(self):
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, backend, source_lang, target_lang, texts):
+        found = {}
+        missing = []
+        for text in texts:
+            value = self.memory.get((backend, source_lang, target_lang, text))
+            if value is None:
+                missing.append(text)
+            else:
+                found[text] = value
+        if missing:
+            conn = self._conn()
+            for i in range(0, len(missing), 500):
+                part = missing[i:i + 500]
+                rows = conn.execute(
+                    "SELECT source, translated FROM translations WHERE backend = ? AND source_lang = ? "
+                    f"AND target_lang = ? AND source IN ({','.join('?' * len(part))})",
+                    (backend, source_lang, target_lang, *part),
+                ).fetchall()
+                for source, translated in rows:
+                    found[source] = translated
+                    self.memory.put((backend, source_lang, target_lang, source), translated)
+        return found
+
+    def put_many(self, backend, source_lang, target_lang, pairs):
+        if not pairs:
+            return
+        now = time.time()
+        for source, translated in pairs:
+            self.memory.put((backend, source_lang, target_lang, source), translated)
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations (backend, source_lang, target_lang, source, translated, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(backend, source_lang, target_lang, s, t, now) for s, t in pairs],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def stats(self):
+        return {"path": self.path, "entries": len(self), "memory": self.memory.stats()}
+
+class CachedTranslator:
+    def __init__(self, backend, cache=None, prefilter=None, separator=None):
+        self.backend = backend
+        self.cache = cache
+        self.prefilter = prefilter
+        self.separator = getattr(backend, "separator", "") if separator is None else separator
+        self._lock = threading.Lock()
+        self.segments_cached = 0
+        self.segments_translated = 0
+        self.failures = 0
+
+    def _prepare(self, text):
+        segments = split_segments(text)
+        if self.prefilter is not None:
+            segments = [self.prefilter(s) for s in segments]
+        return segments
+
+    def _resolve(self, segments):
+        unique = list(dict.fromkeys(segments))
+        name, src, tgt = self.backend.name, self.backend.source, self.backend.target
+        found = self.cache.get_many(name, src, tgt, unique) if self.cache is not None else {}
+        missing = [s for s in unique if s not in found]
+        if missing:
+            try:
+                translated = self.backend.translate_many(missing)
+            except Exception:
+                translated = None
+            if translated is None or len(translated) != len(missing):
+                # Gagal: tidak ada yang disimpan ke cache; teks pemanggil dikembalikan apa adanya.
+                with self._lock:
+                    self.failures += 1
+            else:
+                pairs = [(s, t) for s, t in zip(missing, translated) if t]
+                if self.cache is not None:
+                    self.cache.put_many(name, src, tgt, pairs)
+                found.update(pairs)
+                with self._lock:
+                    self.segments_translated += len(pairs)
+        with self._lock:
+            self.segments_cached += len(unique) - len(missing)
+        return found
+
+    def _join(self, text, segments, found):
+        # Ada segmen yang tidak terjemah: kembalikan input asli (seperti translator lama), jangan
+        # menyambung segmen sumber dengan separator bahasa target ("" untuk ja).
+        if any(s not in found for s in segments):
+            return text
+        return self.separator.join(found[s] for s in segments)
+
+    def translate(self, text):
+        segments = self._prepare(text)
+        if not segments:
+            return ""
+        return self._join(text, segments, self._resolve(segments))
+
+    def translate_many(self, texts):
+        prepared = [self._prepare(t) for t in texts]
+        found = self._resolve([s for segments in prepared for s in segments])
+        return [self._join(text, segments, found) for text, segments in zip(texts, prepared)]
+
+    def seed(self, texts, batch_size=64):
+        texts = list(texts)
+        for i in range(0, len(texts), batch_size):
+            self.translate_many(texts[i:i + batch_size])
+        return self.stats()
+
+    def stats(self):
+        payload = {
+            "backend": self.backend.name,
+            "segments_cached": self.segments_cached,
+            "segments_translated": self.segments_translated,
+            "failures": self.failures,
+        }
+        if self.cache is not None:
+            payload["cache"] = self.cache.stats()
+        return payload
+
+def create_translation_backend(name="google", source="id", target="ja"):
+    if name == "google":
+        return GoogleTranslationBackend(source, target)
+    if name == "offline":
+        return OfflineTranslationBackend(source, target)
+    raise ValueError(f"Backend terjemahan tidak dikenal: {name}")
+
+def create_translator(backend="google", cache_path=None, prefilter=None, source="id", target="ja", memory_size=4096):
+    cache = TranslationCache(cache_path, memory_size) if cache_path else None
+    return CachedTranslator(create_translation_backend(backend, source, target), cache, prefilter)
@@ -0,0 +1,444 @@
+import time
+import random
+import asyncio
+import threading
+import urllib.parse
+import requests
+from requests.adapters import HTTPAdapter
+from utils.metrics import Histogram
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=15.0, clock=time.monotonic):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.trips = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                # Setengah terbuka: hanya satu request percobaan yang diloloskan.
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.trips += 1
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+                self._probe_in_flight = False
+
+    def stats(self):
+        return {"state": self.state, "consecutive_failures": self._failures, "trips": self.trips}
+
+class TTSRequestError(Exception):
+    # 4xx: request-nya yang salah (mis. teks terlalu panjang), bukan replikanya. Tidak di-retry / failover.
+    def __init__(self, status_code):
+        super().__init__(f"Backend TTS menolak request: HTTP {status_code}")
+        self.status_code = status_code
+
+class StyleBertClient:
+    def __init__(self, url, connect_timeout=2.0, read_timeout=30.0, retries=2, backoff=0.2,
+                 pool_size=16, breaker=None, method="auto", health_path="/models/info"):
+        self.url = url
+        self.timeout = (float(connect_timeout), float(read_timeout))
+        self.retries = max(0, int(retries))
+        self.backoff = float(backoff)
+        self.breaker = breaker or CircuitBreaker()
+        self.method = method
+        parts = urllib.parse.urlsplit(url)
+        self.health_url = urllib.parse.urlunsplit((parts.scheme, parts.netloc, health_path, "", ""))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, int(pool_size)), max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.pool_size = max(1, int(pool_size))
+        self.latency = Histogram()
+        self._lock = threading.Lock()
+        self._async_session = None
+        self.counts = {"ok": 0, "error": 0, "retried": 0, "rejected": 0, "client_error": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def _get_url(self, params):
+        return f"{self.url}?{urllib.parse.urlencode(params, quote_via=urllib.parse.quote)}"
+
+    def _use_get(self, status_code):
+        # Hanya 405 yang berarti server tidak menerima POST (mis. Style-Bert-VITS2 versi lama, query saja).
+        # 422 dkk. adalah validasi per request dan tidak boleh mengubah metode untuk request lain.
+        if status_code == 405 and self.method == "auto":
+            self.method = "get"
+            return True
+        return False
+
+    def _send(self, params):
+        if self.method != "get":
+            # POST form body: teks panjang tidak masuk query string.
+            response = self.session.post(self.url, data=params, timeout=self.timeout)
+            if not self._use_get(response.status_code):
+                return response
+        return self.session.get(self._get_url(params), timeout=self.timeout)
+
+    def _async_client(self):
+        if self._async_session is None:
+            import httpx
+            self._async_session = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0]),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+        return self._async_session
+
+    async def _asend(self, params):
+        client = self._async_client()
+        if self.method != "get":
+            response = await client.post(self.url, data=params)
+            if not self._use_get(response.status_code):
+                return response
+        return await client.get(self._get_url(params))
+
+    def _backoff_delay(self, attempt):
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def _sleep_before_retry(self, attempt):
+        time.sleep(self._backoff_delay(attempt))
+
+    def _outcome(self, response):
+        # -> (selesai, konten); belum selesai berarti perlu diulang. 4xx langsung TTSRequestError.
+        if response is not None and response.status_code == 200:
+            self.breaker.record_success()
+            self._count("ok")
+            return True, response.content
+        if response is not None and response.status_code < 500:
+            # 4xx: backend sehat -> breaker tidak dihitung gagal, tidak diulang.
+            self.breaker.record_success()
+            self._count("client_error")
+            raise TTSRequestError(response.status_code)
+        return False, None
+
+    def _give_up(self):
+        self.breaker.record_failure()
+        self._count("error")
+        return None
+
+    def synthesize(self, params):
+        if not self.breaker.allow():
+            self._count("rejected")
+            return None
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            try:
+                response = self._send(params)
+            except requests.RequestException:
+                response = None
+            self.latency.observe((time.perf_counter() - started) * 1000.0)
+            done, content = self._outcome(response)
+            if done:
+                return content
+            if attempt < self.retries:
+                self._count("retried")
+                self._sleep_before_retry(attempt)
+        return self._give_up()
+
+    async def asynthesize(self, params):
+        # Varian async (httpx) untuk ASGI: retry, breaker, metode, dan statistik sama dengan synthesize().
+        import httpx
+        if not self.breaker.allow():
+            self._count("rejected")
+            return None
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            try:
+                response = await self._asend(params)
+            except httpx.HTTPError:
+                response = None
+            self.latency.observe((time.perf_counter() - started) * 1000.0)
+            done, content = self._outcome(response)
+            if done:
+                return content
+            if attempt < self.retries:
+                self._count("retried")
+                await asyncio.sleep(self._backoff_delay(attempt))
+        return self._give_up()
+
+    def health(self, timeout=1.0):
+        try:
+            response = self.session.get(self.health_url, timeout=(timeout, timeout))
+        except requests.RequestException:
+            return False
+        return response.status_code < 500
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+        return {"url": self.url, "method": self.method, **counts, "breaker": self.breaker.stats(), "latency_ms": self.latency.snapshot()}
+
+    def close(self):
+        self.session.close()
+
+    async def aclose(self):
+        if self._async_session is not None:
+            await self._async_session.aclose()
+            self._async_session = None
+
+class TTSReplica:
+    def __init__(self, client, model_id=None, max_in_flight=4):
+        self.client = client
+        self.model_id = model_id
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.in_flight = 0
+        self.healthy = True
+        self.served = 0
+
+    @property
+    def usable(self):
+        return self.healthy and self.client.breaker.state != CircuitBreaker.OPEN
+
+    @property
+    def available(self):
+        return self.in_flight < self.max_in_flight and self.usable
+
+    def stats(self):
+        return {
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "served": self.served,
+            "model_id": self.model_id,
+            **self.client.stats(),
+        }
+
+class TTSDispatcher:
+    def __init__(self, replicas, acquire_timeout=30.0, health_interval=10.0):
+        if not replicas:
+            raise ValueError("Minimal satu backend TTS diperlukan")
+        self.replicas = list(replicas)
+        self.acquire_timeout = float(acquire_timeout)
+        self.health_interval = float(health_interval)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._health_thread = None
+        self.waits = 0
+        self.failovers = 0
+        self.client_errors = 0
+        if self.health_interval > 0:
+            self.start_health_checks()
+
+    def _pick(self, exclude):
+        # Least-outstanding: replika sehat dengan request berjalan paling sedikit; seri -> acak.
+        candidates = [r for r in self.replicas if r not in exclude and r.available]
+        if not candidates:
+            return None
+        low = min(r.in_flight for r in candidates)
+        return random.choice([r for r in candidates if r.in_flight == low])
+
+    def _try_acquire(self, exclude):
+        # Dipanggil dengan self._cond terkunci. -> (replika, masih_ada_harapan)
+        replica = self._pick(exclude)
+        if replica is not None:
+            replica.in_flight += 1
+            return replica, True
+        # Semua replika mati / breaker terbuka: gagal cepat, jangan menunggu slot.
+        return None, any(r.usable and r not in exclude for r in self.replicas)
+
+    def _acquire(self, exclude):
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while True:
+                replica, waitable = self._try_acquire(exclude)
+                if replica is not None or not waitable:
+                    return replica
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self.waits += 1
+                self._cond.wait(min(remaining, 0.5))
+
+    async def _aacquire(self, exclude, poll_s=0.02):
+        deadline = time.monotonic() + self.acquire_timeout
+        waited = False
+        while True:
+            with self._cond:
+                replica, waitable = self._try_acquire(exclude)
+                if replica is not None or not waitable:
+                    return replica
+                if not waited:
+                    self.waits += 1
+                    waited = True
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(poll_s)
+
+    def _release(self, replica, ok):
+        with self._cond:
+            replica.in_flight -= 1
+            if ok:
+                replica.served += 1
+            self._cond.notify()
+
+    @property
+    def model_id(self):
+        # model_id bersama semua replika (None = tiap request memakai model_id-nya sendiri).
+        ids = {r.model_id for r in self.replicas}
+        return ids.pop() if len(ids) == 1 else None
+
+    def _call_params(self, replica, params):
+        call_params = dict(params)
+        if replica.model_id is not None:
+            call_params["model_id"] = replica.model_id
+        return call_params
+
+    def _client_error(self):
+        # Request yang ditolak (4xx) akan ditolak juga oleh replika lain: berhenti, jangan failover.
+        with self._cond:
+            self.client_errors += 1
+        return None
+
+    def _failover(self):
+        with self._cond:
+            self.failovers += 1
+
+    def synthesize(self, params):
+        tried = []
+        while len(tried) < len(self.replicas):
+            replica = self._acquire(tried)
+            if replica is None:
+                return None
+            tried.append(replica)
+            content = None
+            try:
+                content = replica.client.synthesize(self._call_params(replica, params))
+            except TTSRequestError:
+                return self._client_error()
+            finally:
+                self._release(replica, content is not None)
+            if content is not None:
+                return content
+            self._failover()
+        return None
+
+    async def asynthesize(self, params):
+        tried = []
+        while len(tried) < len(self.replicas):
+            replica = await self._aacquire(tried)
+            if replica is None:
+                return None
+            tried.append(replica)
+            content = None
+            try:
+                content = await replica.client.asynthesize(self._call_params(replica, params))
+            except TTSRequestError:
+                return self._client_error()
+            finally:
+                self._release(replica, content is not None)
+            if content is not None:
+                return content
+            self._failover()
+        return None
+
+    def check_health(self):
+        for replica in self.replicas:
+            healthy = replica.client.health()
+            with self._cond:
+                replica.healthy = healthy
+                self._cond.notify_all()
+        return any(r.healthy for r in self.replicas)
+
+    def health(self):
+        return self.check_health()
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            try:
+                self.check_health()
+            except Exception:
+                pass
+
+    def start_health_checks(self):
+        if self._health_thread is not None and self._health_thread.is_alive():
+            return
+        self._stop.clear()
+        self._health_thread = threading.Thread(target=self._health_loop, name="tts-health", daemon=True)
+        self._health_thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        self.stop()
+        for replica in self.replicas:
+            replica.client.close()
+
+    async def aclose(self):
+        for replica in self.replicas:
+            await replica.client.aclose()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "replicas": [r.stats() for r in self.replicas],
+                "healthy": sum(1 for r in self.replicas if r.healthy),
+                "waits": self.waits,
+                "failovers": self.failovers,
+                "client_errors": self.client_errors,
+            }
+
+def parse_backend_urls(spec):
+    # "http://a:5001/voice,http://b:5001/voice|1" -> [(url, model_id or None), ...]
+    backends = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        url, _, model_id = item.partition("|")
+        backends.append((url.strip(), int(model_id) if model_id.strip() else None))
+    return backends
+
+def create_tts_dispatcher(spec, model_id=None, max_in_flight=4, health_interval=10.0, breaker_failures=5, breaker_reset=15.0, **client_kwargs):
+    backends = [(url, model_id if replica_model is None else replica_model) for url, replica_model in parse_backend_urls(spec)]
+    # Cache audio dikunci per model_id; replika dengan model berbeda bisa menyajikan audio model lain.
+    model_ids = {replica_model for _, replica_model in backends}
+    if len(model_ids) > 1:
+        raise ValueError(f"Semua replika TTS harus memakai model_id yang sama: {sorted(model_ids, key=str)}")
+    replicas = [
+        TTSReplica(
+            StyleBertClient(url, breaker=CircuitBreaker(breaker_failures, breaker_reset), **client_kwargs),
+            model_id=replica_model,
+            max_in_flight=max_in_flight,
+        )
+        for url, replica_model in backends
+    ]
+    acquire_timeout = sum(client_kwargs.get(k, d) for k, d in (("connect_timeout", 2.0), ("read_timeout", 30.0)))
+    return TTSDispatcher(replicas, acquire_timeout=acquire_timeout, health_interval=health_interval)
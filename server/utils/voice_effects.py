@@ -0,0 +1,190 @@
+import time
+import threading
+from functools import lru_cache
+import numpy as np
+from scipy import signal
+
+PITCH_UP, PITCH_DOWN = 13, 10
+BREATH_NOISE_SECONDS = 30
+TTS_STAGES = ("pitch", "formant", "breathiness", "warmth")
+SPEAK_STAGES = ("smooth", "humble", "pitch", "formant", "breathiness", "warmth", "breath")
+
+def _parallel_sos(branches):
+    # Gabungkan filter paralel sum(g_i * H_i) menjadi satu transfer function, lalu ke SOS,
+    # sehingga filter bank cukup satu kali sosfilt.
+    tfs = [(gain, *signal.sos2tf(sos)) for gain, sos in branches]
+    den = np.array([1.0])
+    for _, _, a in tfs:
+        den = np.polymul(den, a)
+    num = np.array([0.0])
+    for i, (gain, b, _) in enumerate(tfs):
+        term = gain * b
+        for j, (_, _, a) in enumerate(tfs):
+            if j != i:
+                term = np.polymul(term, a)
+        num = np.polyadd(num, term)
+    poles = np.concatenate([np.roots(a) for _, _, a in tfs])
+    return signal.zpk2sos(np.roots(num), poles, num[0] / den[0])
+
+def _cutoff(fs, hz):
+    # Backend 16 kHz / 8 kHz: frekuensi desain (mis. 8 kHz) bisa >= Nyquist dan membuat butter() error.
+    return min(hz, 0.45 * fs)
+
+def _band(fs, low, high):
+    high = _cutoff(fs, high)
+    return [min(low, 0.5 * high), high]
+
+@lru_cache(maxsize=8)
+def design_filters(sample_rate):
+    fs = sample_rate
+    warmth_band_b, warmth_band_a = signal.butter(1, _band(fs, 300, 5000), btype='band', fs=fs)
+    # Mix warmth 0.7*x + 0.3*band(x) = (0.7*a + 0.3*b) / a -> satu seksi tambahan setelah high-pass.
+    warmth_mix = np.concatenate([0.7 * warmth_band_a + 0.3 * warmth_band_b, warmth_band_a])
+    return {
+        "formant": _parallel_sos([
+            (0.5, signal.butter(2, _cutoff(fs, 400), 'low', fs=fs, output='sos')),
+            (0.65, signal.butter(2, _band(fs, 800, 3500), btype='band', fs=fs, output='sos')),
+            (1.2, signal.butter(2, _cutoff(fs, 3500), 'high', fs=fs, output='sos')),
+        ]),
+        "breath": signal.butter(4, _band(fs, 2000, 8000), btype='band', fs=fs, output='sos'),
+        "warmth": np.vstack([signal.butter(2, _cutoff(fs, 200), 'high', fs=fs, output='sos'), warmth_mix[None, :]]),
+        "smooth": signal.butter(3, _cutoff(fs, 8000), 'low', fs=fs, output='sos'),
+        "humble": signal.butter(2, _band(fs, 250, 4500), btype='band', fs=fs),
+    }
+
+@lru_cache(maxsize=8)
+def breath_noise_bank(sample_rate, seconds=BREATH_NOISE_SECONDS, seed=0):
+    # Noise napas tidak bergantung pada audio: cukup difilter sekali, lalu diambil potongan acak.
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(0, 0.008, int(sample_rate * seconds))
+    bank = signal.sosfilt(design_filters(sample_rate)["breath"], noise).astype(np.float32)
+    bank *= 0.08
+    bank.flags.writeable = False
+    return bank
+
+@lru_cache(maxsize=8)
+def _fade_curves(sample_rate):
+    n = int(sample_rate * 0.012)
+    fade_in = (np.linspace(0, 1, n) ** 1.5).astype(np.float32)
+    return fade_in, fade_in[::-1].copy()
+
+@lru_cache(maxsize=8)
+def _breath_burst(sample_rate):
+    n = int(sample_rate * 0.12)
+    return (np.random.default_rng(1).normal(0, 0.002, n) * np.hanning(n) * 0.15).astype(np.float32)
+
+class VoiceEffectsChain:
+    def __init__(self, sample_rate, feminine=True, warmth=True, smooth=True, humble=True, breath=True):
+        self.sample_rate = int(sample_rate)
+        self.enabled = {
+            "pitch": feminine,
+            "formant": feminine,
+            "breathiness": feminine,
+            "warmth": warmth,
+            "smooth": smooth,
+            "humble": humble,
+            "breath": breath,
+        }
+        self.filters = design_filters(self.sample_rate)
+        self._rng = np.random.default_rng()
+        self._rng_lock = threading.Lock()
+        self._stages = {
+            "pitch": self._pitch,
+            "formant": self._formant,
+            "breathiness": self._breathiness,
+            "warmth": self._warmth,
+            "smooth": self._smooth,
+            "humble": self._humble,
+            "breath": self._breath,
+        }
+
+    def _pitch(self, audio):
+        # Round-trip resample 1.3x turun lalu naik: polyphase FIR, bukan dua FFT sepanjang sinyal.
+        n = len(audio)
+        shifted = signal.resample_poly(audio, PITCH_DOWN, PITCH_UP)
+        restored = signal.resample_poly(shifted, PITCH_UP, PITCH_DOWN)
+        out = np.zeros(n, dtype=np.float32)
+        m = min(n, len(restored))
+        out[:m] = restored[:m]
+        return out
+
+    def _formant(self, audio):
+        out = signal.sosfilt(self.filters["formant"], audio).astype(np.float32)
+        out *= 0.95 / (np.max(np.abs(out)) + 1e-8)
+        return out
+
+    def _breathiness(self, audio):
+        bank = breath_noise_bank(self.sample_rate)
+        n = len(audio)
+        audio *= 0.92
+        with self._rng_lock:
+            start = int(self._rng.integers(0, max(1, len(bank) - n)))
+        pos = 0
+        while pos < n:
+            take = min(n - pos, len(bank) - start)
+            audio[pos:pos + take] += bank[start:start + take]
+            pos += take
+            start = 0
+        return audio
+
+    def _warmth(self, audio):
+        out = signal.sosfilt(self.filters["warmth"], audio).astype(np.float32)
+        out *= 1.02
+        np.tanh(out, out=out)
+        out *= 0.94
+        return out
+
+    def _smooth(self, audio):
+        out = signal.sosfilt(self.filters["smooth"], audio).astype(np.float32)
+        fade_in, fade_out = _fade_curves(self.sample_rate)
+        n = len(fade_in)
+        if n > 0 and len(out) > n * 2:
+            out[:n] *= fade_in
+            out[-n:] *= fade_out
+        return out
+
+    def _humble(self, audio):
+        audio *= 0.88
+        b, a = self.filters["humble"]
+        # filtfilt butuh sinyal lebih panjang dari padlen; klip sangat pendek cukup diberi gain saja.
+        if len(audio) <= 3 * max(len(a), len(b)):
+            return audio
+        return signal.filtfilt(b, a, audio).astype(np.float32)
+
+    def _breath(self, audio):
+        burst = _breath_burst(self.sample_rate)
+        out = np.empty(len(audio) + 2 * len(burst), dtype=np.float32)
+        out[:len(burst)] = burst
+        out[len(burst):len(burst) + len(audio)] = audio
+        out[len(burst) + len(audio):] = burst
+        return out
+
+    def _run_stage(self, stage, audio):
+        # Seperti efek lama: tahap yang gagal dilewati, tahap lain tetap jalan.
+        try:
+            return self._stages[stage](audio)
+        except Exception:
+            return audio
+
+    def apply(self, stage, audio):
+        if not self.enabled.get(stage):
+            return audio
+        return self._run_stage(stage, np.array(audio, dtype=np.float32))
+
+    def run(self, audio, stages=TTS_STAGES, timings=None):
+        # Satu salinan float32 di awal; tahap berikutnya bekerja in-place bila memungkinkan.
+        audio = np.array(audio, dtype=np.float32)
+        for stage in stages:
+            if not self.enabled.get(stage):
+                continue
+            if timings is None:
+                audio = self._run_stage(stage, audio)
+            else:
+                started = time.perf_counter()
+                audio = self._run_stage(stage, audio)
+                timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+        return audio
+
+@lru_cache(maxsize=32)
+def get_effects_chain(sample_rate, feminine=True, warmth=True, smooth=True, humble=True, breath=True):
+    return VoiceEffectsChain(sample_rate, feminine, warmth, smooth, humble, breath)
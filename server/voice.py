@@ -8,17 +8,32 @@ import re
 import speech_recognition as sr
 import numpy as np
 import soundfile as sf
-import requests
-import urllib.parse
+import math
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from faster_whisper import WhisperModel
-from scipy import signal
-from deep_translator import GoogleTranslator
+from utils.stt_service import STTService
+from scipy.signal import resample_poly
+from utils.translation import create_translator
+from utils.tts_client import create_tts_dispatcher
+from utils.audio_cache import audio_cache_key, create_audio_cache
+from utils.metrics import StageClock, timed
+from utils.voice_effects import SPEAK_STAGES, TTS_STAGES, get_effects_chain
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-STYLE_BERT_API_URL = "http://127.0.0.1:5001/voice"
+STYLE_BERT_API_URL = os.environ.get("STYLE_BERT_API_URL", "http://127.0.0.1:5001/voice")
+STYLE_BERT_API_URLS = os.environ.get("STYLE_BERT_API_URLS", STYLE_BERT_API_URL)
 STYLE_BERT_MODEL_ID = 0
+TTS_CONNECT_TIMEOUT = float(os.environ.get("TTS_CONNECT_TIMEOUT", "2"))
+TTS_READ_TIMEOUT = float(os.environ.get("TTS_READ_TIMEOUT", "30"))
+TTS_RETRIES = int(os.environ.get("TTS_RETRIES", "2"))
+TTS_MAX_CONNECTIONS = int(os.environ.get("TTS_MAX_CONNECTIONS", "32"))
+TTS_BREAKER_FAILURES = int(os.environ.get("TTS_BREAKER_FAILURES", "5"))
+TTS_BREAKER_RESET_S = float(os.environ.get("TTS_BREAKER_RESET_S", "15"))
+TTS_HTTP_METHOD = os.environ.get("TTS_HTTP_METHOD", "auto")
+TTS_REPLICA_MAX_IN_FLIGHT = int(os.environ.get("TTS_REPLICA_MAX_IN_FLIGHT", "4"))
+TTS_HEALTH_INTERVAL_S = float(os.environ.get("TTS_HEALTH_INTERVAL_S", "10"))
 
 ENABLE_NATURAL_BREATH = True
 ENABLE_VOICE_WARMTH = True
@@ -28,14 +43,52 @@ ENABLE_NATURAL_FILLERS = True
 ENABLE_SMART_PAUSES = True
 ENABLE_FEMININE_VOICE = True
 
-DEVICE_STT = "cpu"
+DEVICE_STT = os.environ.get("STT_DEVICE", "cpu")
+WHISPER_SAMPLE_RATE = 16000
+STT_MODEL_SIZE = os.environ.get("STT_MODEL_SIZE", "base")
+STT_COMPUTE_TYPE = os.environ.get("STT_COMPUTE_TYPE", "int8")
+STT_MODE = os.environ.get("STT_MODE", "thread")
+STT_WORKERS = int(os.environ.get("STT_WORKERS", "1"))
+STT_CPU_THREADS = int(os.environ.get("STT_CPU_THREADS", "0"))
+STT_BEAM_SIZE = int(os.environ.get("STT_BEAM_SIZE", "5"))
+STT_VAD = os.environ.get("STT_VAD", "0") == "1"
+STT_VAD_MIN_SILENCE_MS = int(os.environ.get("STT_VAD_MIN_SILENCE_MS", "500"))
+STT_MAX_QUEUE = int(os.environ.get("STT_MAX_QUEUE", "32"))
+
+TTS_STREAM_TRANSLATE_WORKERS = int(os.environ.get("TTS_STREAM_TRANSLATE_WORKERS", "4"))
+TTS_STREAM_SYNTH_WORKERS = int(os.environ.get("TTS_STREAM_SYNTH_WORKERS", "2"))
+TTS_STREAM_DSP_WORKERS = int(os.environ.get("TTS_STREAM_DSP_WORKERS", "2"))
+STREAM_MIN_SENTENCE_CHARS = 12
+
+TTS_CACHE_ENABLED = os.environ.get("TTS_CACHE", "1") != "0"
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", os.path.join(BASE_DIR, "cache", "tts"))
+TTS_CACHE_MEMORY_MB = float(os.environ.get("TTS_CACHE_MEMORY_MB", "64"))
+TTS_CACHE_DISK_MB = float(os.environ.get("TTS_CACHE_DISK_MB", "1024"))
+
+TRANSLATION_BACKEND = os.environ.get("TRANSLATION_BACKEND", "google")
+TRANSLATION_CACHE_PATH = os.environ.get("TRANSLATION_CACHE_PATH", os.path.join(BASE_DIR, "cache", "translations.sqlite3"))
 
 class AnimeVoiceAssistant:
     def __init__(self):
-        self.stt_model = None
+        self.stt = STTService(
+            model_size=STT_MODEL_SIZE,
+            device=DEVICE_STT,
+            compute_type=STT_COMPUTE_TYPE,
+            workers=STT_WORKERS,
+            cpu_threads=STT_CPU_THREADS,
+            beam_size=STT_BEAM_SIZE,
+            vad_filter=STT_VAD,
+            vad_min_silence_ms=STT_VAD_MIN_SILENCE_MS,
+            mode=STT_MODE,
+            max_queue=STT_MAX_QUEUE,
+        )
         self.recognizer = None
         self.rvc_device = None
-        self.translator = GoogleTranslator(source="id", target="ja")
+        self.translator = create_translator(
+            TRANSLATION_BACKEND,
+            TRANSLATION_CACHE_PATH,
+            prefilter=self._apply_jp_domain_filter,
+        )
         
         self.thinking_fillers = [
             "...",
@@ -54,6 +107,23 @@ class AnimeVoiceAssistant:
             "、",
         ]
 
+        self._stream_pools = None
+        self._stream_pools_lock = threading.Lock()
+        self.tts_client = create_tts_dispatcher(
+            STYLE_BERT_API_URLS,
+            model_id=STYLE_BERT_MODEL_ID,
+            max_in_flight=TTS_REPLICA_MAX_IN_FLIGHT,
+            health_interval=TTS_HEALTH_INTERVAL_S,
+            breaker_failures=TTS_BREAKER_FAILURES,
+            breaker_reset=TTS_BREAKER_RESET_S,
+            connect_timeout=TTS_CONNECT_TIMEOUT,
+            read_timeout=TTS_READ_TIMEOUT,
+            retries=TTS_RETRIES,
+            pool_size=TTS_MAX_CONNECTIONS,
+            method=TTS_HTTP_METHOD,
+        )
+        self.audio_cache = create_audio_cache(TTS_CACHE_DIR, TTS_CACHE_MEMORY_MB, TTS_CACHE_DISK_MB) if TTS_CACHE_ENABLED else None
+
     def _apply_jp_domain_filter(self, text):
         if not text:
             return ""
@@ -97,8 +167,7 @@ class AnimeVoiceAssistant:
 
     def _translate_id_to_jp(self, text):
         try:
-            filtered = self._apply_jp_domain_filter(text)
-            return self.translator.translate(filtered)
+            return self.translator.translate(text) or text
         except:
             return text
 
@@ -189,123 +258,36 @@ class AnimeVoiceAssistant:
         
         return text
 
+    def _effects(self, sample_rate):
+        return get_effects_chain(
+            int(sample_rate),
+            feminine=ENABLE_FEMININE_VOICE,
+            warmth=ENABLE_VOICE_WARMTH,
+            smooth=ENABLE_SMOOTH_TRANSITIONS,
+            humble=ENABLE_HUMBLE_TONE,
+            breath=ENABLE_NATURAL_BREATH,
+        )
+
     def _apply_feminine_pitch(self, audio_data, sample_rate=44100):
-        if not ENABLE_FEMININE_VOICE:
-            return audio_data
-        
-        audio = np.asarray(audio_data, dtype=np.float32)
-        
-        try:
-            from scipy.signal import resample
-            pitch_shift_factor = 1.30
-            
-            new_length = int(len(audio) / pitch_shift_factor)
-            audio_shifted = resample(audio, new_length)
-            
-            audio = resample(audio_shifted, len(audio))
-            
-        except:
-            pass
-        
-        return audio
+        return self._effects(sample_rate).apply("pitch", audio_data)
 
     def _apply_feminine_formant(self, audio_data, sample_rate=44100):
-        if not ENABLE_FEMININE_VOICE:
-            return audio_data
-        
-        audio = np.asarray(audio_data, dtype=np.float32)
-        
-        try:
-            sos_high = signal.butter(2, 3500, 'high', fs=sample_rate, output='sos')
-            high_freq = signal.sosfilt(sos_high, audio)
-            
-            sos_mid = signal.butter(2, [800, 3500], btype='band', fs=sample_rate, output='sos')
-            mid_freq = signal.sosfilt(sos_mid, audio)
-            
-            sos_low = signal.butter(2, 400, 'low', fs=sample_rate, output='sos')
-            low_freq = signal.sosfilt(sos_low, audio)
-            
-            audio = low_freq * 0.5 + mid_freq * 0.65 + high_freq * 1.2
-            
-            audio = audio / (np.max(np.abs(audio)) + 1e-8) * 0.95
-            
-        except:
-            pass
-        
-        return audio
+        return self._effects(sample_rate).apply("formant", audio_data)
 
     def _apply_feminine_breathiness(self, audio_data, sample_rate=44100):
-        if not ENABLE_FEMININE_VOICE:
-            return audio_data
-        
-        audio = np.asarray(audio_data, dtype=np.float32)
-        
-        try:
-            breath_noise = np.random.normal(0, 0.008, len(audio)).astype(np.float32)
-            
-            sos = signal.butter(4, [2000, 8000], btype='band', fs=sample_rate, output='sos')
-            breath_filtered = signal.sosfilt(sos, breath_noise)
-            
-            audio = audio * 0.92 + breath_filtered * 0.08
-            
-        except:
-            pass
-        
-        return audio
+        return self._effects(sample_rate).apply("breathiness", audio_data)
 
     def _add_natural_breath(self, audio_data, sample_rate=44100):
-        if not ENABLE_NATURAL_BREATH:
-            return audio_data
-        audio = np.asarray(audio_data, dtype=np.float32)
-        breath_duration = int(sample_rate * 0.12)
-        breath = np.random.normal(0, 0.002, breath_duration).astype(np.float32)
-        breath *= np.hanning(breath_duration)
-        breath *= 0.15
-        return np.concatenate([breath, audio, breath])
+        return self._effects(sample_rate).apply("breath", audio_data)
 
     def _apply_voice_warmth(self, audio_data, sample_rate=44100):
-        if not ENABLE_VOICE_WARMTH:
-            return audio_data
-        audio = np.asarray(audio_data, dtype=np.float32)
-        try:
-            sos_low = signal.butter(2, 200, 'high', fs=sample_rate, output='sos')
-            audio = signal.sosfilt(sos_low, audio)
-            sos_warmth = signal.butter(1, [300, 5000], btype='band', fs=sample_rate, output='sos')
-            warm_signal = signal.sosfilt(sos_warmth, audio)
-            audio = audio * 0.7 + warm_signal * 0.3
-            audio = np.tanh(audio * 1.02) * 0.94
-        except:
-            pass
-        return audio
+        return self._effects(sample_rate).apply("warmth", audio_data)
 
     def _smooth_audio_transitions(self, audio_data, sample_rate=44100):
-        if not ENABLE_SMOOTH_TRANSITIONS:
-            return audio_data
-        audio = np.asarray(audio_data, dtype=np.float32)
-        try:
-            sos = signal.butter(3, 8000, 'low', fs=sample_rate, output='sos')
-            audio = signal.sosfilt(sos, audio)
-        except:
-            pass
-        fade_duration = int(sample_rate * 0.012)
-        if fade_duration > 0 and len(audio) > fade_duration * 2:
-            fade_in = np.linspace(0, 1, fade_duration) ** 1.5
-            fade_out = np.linspace(1, 0, fade_duration) ** 1.5
-            audio[:fade_duration] *= fade_in
-            audio[-fade_duration:] *= fade_out
-        return audio
+        return self._effects(sample_rate).apply("smooth", audio_data)
 
     def _apply_humble_characteristics(self, audio_data, sample_rate=44100):
-        if not ENABLE_HUMBLE_TONE:
-            return audio_data
-        audio = np.asarray(audio_data, dtype=np.float32)
-        audio = audio * 0.88
-        try:
-            b, a = signal.butter(2, [250, 4500], btype='band', fs=sample_rate)
-            audio = signal.filtfilt(b, a, audio)
-        except:
-            pass
-        return audio
+        return self._effects(sample_rate).apply("humble", audio_data)
 
     def _normalize_tts_text(self, text):
         s = (text or "").strip()
@@ -322,23 +304,15 @@ class AnimeVoiceAssistant:
         sf.write(buf, x, sr, format="WAV", subtype="PCM_16")
         return buf.getvalue()
 
-    def _ensure_stt(self):
-        if self.stt_model is not None and self.recognizer is not None:
-            return
-        self.stt_model = WhisperModel("base", device=DEVICE_STT, compute_type="int8")
-        self.recognizer = sr.Recognizer()
-
     def listen(self):
-        self._ensure_stt()
+        if self.recognizer is None:
+            self.recognizer = sr.Recognizer()
         with sr.Microphone() as source:
             print("\n[LISTENING]...")
             self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
             try:
                 audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
-                with open("temp_input.wav", "wb") as f:
-                    f.write(audio.get_wav_data())
-                segments, _ = self.stt_model.transcribe("temp_input.wav", language="id")
-                text = "".join([s.text for s in segments]).strip()
+                text = self.transcribe_audio(audio.get_wav_data())
                 if text:
                     print(f"[USER]: {text}")
                     return text
@@ -360,31 +334,26 @@ class AnimeVoiceAssistant:
             return "Whisper"
         return "Neutral"
 
-    def _generate_style_bert_audio(self, text, emotion, output_path):
-        try:
-            style = self._map_emotion_to_style(emotion)
-            params = {
-                "text": text,
-                "model_id": STYLE_BERT_MODEL_ID,
-                "style": style,
-                "style_weight": 0.5,
-                "language": "JP",
-                "sdp_ratio": 0.3,
-                "noise": 0.6,
-                "noisew": 0.8,
-                "length": 1.35
-            }
-            encoded = urllib.parse.urlencode(params, quote_via=urllib.parse.quote)
-            url = f"{STYLE_BERT_API_URL}?{encoded}"
-            response = requests.get(url, timeout=30)
-            if response.status_code == 200:
-                with open(output_path, "wb") as f:
-                    f.write(response.content)
-                return True
-            else:
-                return False
-        except:
-            return False
+    def _style_bert_params(self, text, emotion):
+        return {
+            "text": text,
+            "model_id": STYLE_BERT_MODEL_ID,
+            "style": self._map_emotion_to_style(emotion),
+            "style_weight": 0.5,
+            "language": "JP",
+            "sdp_ratio": 0.3,
+            "noise": 0.6,
+            "noisew": 0.8,
+            "length": 1.35
+        }
+
+    def _fetch_style_bert_wav(self, text, emotion):
+        with timed("tts_synth"):
+            return self.tts_client.synthesize(self._style_bert_params(text, emotion))
+
+    async def _afetch_style_bert_wav(self, text, emotion):
+        with timed("tts_synth"):
+            return await self.tts_client.asynthesize(self._style_bert_params(text, emotion))
 
     async def speak_anime(self, text):
         print(f"[AI]: {text}")
@@ -392,47 +361,140 @@ class AnimeVoiceAssistant:
         jp_text_enhanced = self._process_japanese_text(jp_text)
         print(f"[JP]: {jp_text_enhanced}")
         
-        output_wav = os.path.join(BASE_DIR, "output_anime.wav")
         norm_text = self._normalize_tts_text(jp_text_enhanced)
-        success = self._generate_style_bert_audio(norm_text, "Neutral", output_wav)
-        if success:
-            try:
-                audio_data, sr = sf.read(output_wav, dtype='float32')
-                audio_data = self._smooth_audio_transitions(audio_data, sr)
-                audio_data = self._apply_humble_characteristics(audio_data, sr)
-                audio_data = self._apply_feminine_pitch(audio_data, sr)
-                audio_data = self._apply_feminine_formant(audio_data, sr)
-                audio_data = self._apply_feminine_breathiness(audio_data, sr)
-                audio_data = self._apply_voice_warmth(audio_data, sr)
-                audio_data = self._add_natural_breath(audio_data, sr)
-                sf.write(output_wav, audio_data, sr)
-            except:
-                pass
-            self.play_audio(output_wav)
+        raw = self._fetch_style_bert_wav(norm_text, "Neutral")
+        if raw is not None:
+            self.play_audio(io.BytesIO(self.render_tts_audio(raw, SPEAK_STAGES)[0]))
 
-    def synthesize_bytes(self, text, voice=None, pitch=None, emotion=None, f0method=None):
-        output_wav = os.path.join(BASE_DIR, "output_tts_bytes.wav")
-        jp_text = self._translate_id_to_jp(text)
+    def prepare_tts_text(self, text):
+        with timed("translate"):
+            jp_text = self._translate_id_to_jp(text)
         jp_text_enhanced = self._process_japanese_text(jp_text)
-        norm_text = self._normalize_tts_text(jp_text_enhanced)
-        success = self._generate_style_bert_audio(norm_text, emotion, output_wav)
-        if success:
+        return self._normalize_tts_text(jp_text_enhanced)
+
+    def render_tts_audio(self, wav_bytes, stages=TTS_STAGES):
+        # -> (audio, rendered); rendered False = DSP gagal dan audio mentah dikembalikan (jangan di-cache).
+        with timed("dsp"):
             try:
-                audio_data, sr = sf.read(output_wav, dtype='float32')
-                audio_data = self._apply_feminine_pitch(audio_data, sr)
-                audio_data = self._apply_feminine_formant(audio_data, sr)
-                audio_data = self._apply_feminine_breathiness(audio_data, sr)
-                audio_data = self._apply_voice_warmth(audio_data, sr)
-                sf.write(output_wav, audio_data, sr)
+                audio_data, sr = sf.read(io.BytesIO(wav_bytes), dtype='float32')
+                audio_data = self._effects(sr).run(audio_data, stages)
+                buf = io.BytesIO()
+                sf.write(buf, audio_data, sr, format="WAV", subtype="PCM_16")
+                return buf.getvalue(), True
             except:
-                pass
-            with open(output_wav, "rb") as f:
-                audio_bytes = f.read()
-            if os.path.exists(output_wav):
-                os.remove(output_wav)
-            return audio_bytes, "audio/wav"
-        else:
-            return self._silence_wav_bytes(), "audio/wav"
+                return bytes(wav_bytes), False
+
+    def finish_tts_audio(self, key, raw):
+        audio_bytes, rendered = self.render_tts_audio(raw)
+        # Hanya hasil sukses yang disimpan; fallback (hening / audio tanpa efek) tidak boleh menempel di cache.
+        if rendered:
+            self.store_tts_audio(key, audio_bytes)
+        return audio_bytes
+
+    def tts_cache_key(self, text, emotion=None):
+        params = self._style_bert_params("", emotion)
+        params.pop("text")
+        style = params.pop("style")
+        # Replika bisa menimpa model_id (url|model_id); kunci memakai model yang benar-benar menyajikan.
+        if self.tts_client.model_id is not None:
+            params["model_id"] = self.tts_client.model_id
+        dsp_flags = {
+            "feminine": ENABLE_FEMININE_VOICE,
+            "warmth": ENABLE_VOICE_WARMTH,
+            "fillers": ENABLE_NATURAL_FILLERS,
+            "pauses": ENABLE_SMART_PAUSES,
+        }
+        return audio_cache_key(self._normalize_tts_text(text), style, params, dsp_flags)
+
+    def cached_tts_audio(self, text, emotion=None):
+        if self.audio_cache is None:
+            return None, None
+        key = self.tts_cache_key(text, emotion)
+        return key, self.audio_cache.get(key)
+
+    def store_tts_audio(self, key, audio_bytes):
+        if self.audio_cache is not None and key is not None:
+            self.audio_cache.put(key, audio_bytes)
+
+    def synthesize_bytes(self, text, voice=None, pitch=None, emotion=None, f0method=None):
+        with timed("synthesize"):
+            key, cached = self.cached_tts_audio(text, emotion)
+            if cached is not None:
+                return cached, "audio/wav"
+            raw = self._fetch_style_bert_wav(self.prepare_tts_text(text), emotion)
+            if raw is None:
+                return self._silence_wav_bytes(), "audio/wav"
+            return self.finish_tts_audio(key, raw), "audio/wav"
+
+    def split_sentences(self, text):
+        parts = [p.strip() for p in re.split(r'(?<=[.!?])\s+', (text or "").strip()) if p.strip()]
+        sentences = []
+        carry = ""
+        for part in parts:
+            part = f"{carry} {part}".strip() if carry else part
+            if len(part) < STREAM_MIN_SENTENCE_CHARS:
+                carry = part
+                continue
+            sentences.append(part)
+            carry = ""
+        if carry:
+            if sentences:
+                sentences[-1] = f"{sentences[-1]} {carry}"
+            else:
+                sentences.append(carry)
+        return sentences
+
+    def _get_stream_pools(self):
+        if self._stream_pools is None:
+            with self._stream_pools_lock:
+                if self._stream_pools is None:
+                    self._stream_pools = (
+                        ThreadPoolExecutor(TTS_STREAM_TRANSLATE_WORKERS, thread_name_prefix="tts-translate"),
+                        ThreadPoolExecutor(TTS_STREAM_SYNTH_WORKERS, thread_name_prefix="tts-synth"),
+                        ThreadPoolExecutor(TTS_STREAM_DSP_WORKERS, thread_name_prefix="tts-dsp"),
+                    )
+        return self._stream_pools
+
+    def synthesize_stream(self, text, emotion=None):
+        # Semua tahap sudah disubmit saat fungsi ini kembali; pemanggil bisa mengerjakan hal lain
+        # (mis. mengirim teks balasan) sementara terjemahan dan sintesis berjalan.
+        sentences = self.split_sentences(text)
+        if not sentences:
+            return iter(())
+        translate_pool, synth_pool, dsp_pool = self._get_stream_pools()
+        cached = [self.cached_tts_audio(s, emotion) for s in sentences]
+        translations = [
+            None if hit is not None else translate_pool.submit(self.prepare_tts_text, s)
+            for s, (_, hit) in zip(sentences, cached)
+        ]
+
+        def synth_stage(i):
+            key, hit = cached[i]
+            if hit is not None:
+                return hit
+            raw = self._fetch_style_bert_wav(translations[i].result(), emotion)
+            if raw is None:
+                return None
+            return dsp_pool.submit(self.finish_tts_audio, key, raw)
+
+        stages = [synth_pool.submit(synth_stage, i) for i in range(len(sentences))]
+        return self._drain_stream(sentences, translations, stages)
+
+    def _drain_stream(self, sentences, translations, stages):
+        try:
+            for i, stage in enumerate(stages):
+                result = stage.result()
+                if result is None:
+                    audio_bytes = self._silence_wav_bytes()
+                elif isinstance(result, bytes):
+                    audio_bytes = result
+                else:
+                    audio_bytes = result.result()
+                yield i, sentences[i], audio_bytes, "audio/wav"
+        finally:
+            for future in translations + stages:
+                if future is not None:
+                    future.cancel()
 
     def play_audio(self, file_path):
         pygame.mixer.init()
@@ -445,23 +507,48 @@ class AnimeVoiceAssistant:
             pass
         finally:
             pygame.mixer.quit()
-            if os.path.exists(file_path):
+            if isinstance(file_path, str) and os.path.exists(file_path):
                 try:
                     os.remove(file_path)
                 except:
                     pass
 
     def warmup_rvc(self):
+        return self.tts_client.health()
+
+    def decode_audio(self, data):
+        # Decode di memori ke float32 mono 16 kHz (format input array Whisper).
+        # BytesIO atas bytes tidak menyalin buffer; memoryview/bytearray diterima langsung.
+        if isinstance(data, np.ndarray):
+            return np.ascontiguousarray(data, dtype=np.float32)
+        stream = data if hasattr(data, "read") else io.BytesIO(data)
+        audio, sample_rate = sf.read(stream, dtype='float32', always_2d=True)
+        audio = audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+        if sample_rate != WHISPER_SAMPLE_RATE:
+            g = math.gcd(int(sample_rate), WHISPER_SAMPLE_RATE)
+            audio = resample_poly(audio, WHISPER_SAMPLE_RATE // g, int(sample_rate) // g).astype(np.float32)
+        return np.ascontiguousarray(audio, dtype=np.float32)
+
+    def transcribe_audio(self, data):
+        clock = StageClock()
         try:
-            requests.get(STYLE_BERT_API_URL.replace("/voice", ""), timeout=1)
-            return True
-        except:
-            return False
+            audio = self.decode_audio(data)
+        except Exception:
+            # Format yang tidak didukung libsndfile (webm/mp3 dari browser): biarkan
+            # faster-whisper (PyAV) men-decode langsung dari stream di memori.
+            if hasattr(data, "seek"):
+                data.seek(0)
+            audio = data if hasattr(data, "read") else io.BytesIO(data)
+        clock.lap("stt_decode")
+        text = self.stt.transcribe(audio)
+        clock.lap("stt")
+        return text
 
     def transcribe_file(self, audio_path):
-        self._ensure_stt()
-        segments, _ = self.stt_model.transcribe(audio_path, language="id")
-        return "".join([s.text for s in segments]).strip()
+        if isinstance(audio_path, str):
+            with open(audio_path, "rb") as f:
+                return self.transcribe_audio(f.read())
+        return self.transcribe_audio(audio_path)
 
 if __name__ == "__main__":
     bot = AnimeVoiceAssistant()